@@ -0,0 +1,120 @@
+"""Compare the fixed and the adaptive concurrency against a simulated upstream that queues and throttles.
+
+The upstream serves `-capacity` requests at the same time in `-latency` seconds each, queues the requests beyond that,
+and throttles (rejects) them when `-queue` requests are already waiting, like a rate-limited RDAP or DNS server. Every
+target is queried through `Metrics.track()` exactly as the analysis stages do, and a throttled query is retried after
+`-backoff` seconds. The fixed mode runs `-threads` workers, the adaptive one a `concurrency.Controller` that starts at
+`-threads`.
+
+Usage:
+    python benchmarks/adaptive.py [-n 2000] [-threads 10] [-capacity 64] [-queue 32] [-latency 0.02]
+"""
+
+import argparse
+import concurrent.futures
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import concurrency  # noqa: E402
+import metrics  # noqa: E402
+
+
+class Upstream:
+    """A FIFO queue in front of `capacity` servers, in virtual time: every request knows when it will be served."""
+
+    def __init__(self, capacity: int, queue: int, latency: float):
+        self.latency = latency
+        self.queue = queue
+        self._free_at = [0.0] * capacity  # When every server finishes its queued requests (a min-heap).
+        self._starts: list[float] = []  # When the accepted requests start to be served.
+        self._lock = threading.Lock()
+
+    def query(self) -> bool:
+        """Returns False if the query is throttled."""
+        with self._lock:
+            now = time.perf_counter()
+            self._starts = [s for s in self._starts if s > now]
+            throttled = len(self._starts) >= self.queue
+            if throttled:
+                done = now + self.latency / 10
+            else:
+                start = max(now, self._free_at[0])
+                done = start + self.latency
+                heapq.heapreplace(self._free_at, done)
+                self._starts.append(start)
+
+        time.sleep(max(done - time.perf_counter(), 0))
+        return not throttled
+
+
+def run(n: int, workers: int, upstream: Upstream, backoff: float, controller: concurrency.Controller | None) -> dict:
+    stats = controller.stats if controller is not None else metrics.Metrics()
+
+    def lookup(i: int) -> None:
+        while True:
+            slot = controller.slot('rdap') if controller is not None else concurrency.contextlib.nullcontext()
+            with slot, stats.track('rdap', str(i)) as span:
+                ok = upstream.query()
+                span.outcome = 'ok' if ok else 'throttled'
+            if ok:
+                return
+            stats.retry('rdap')
+            time.sleep(backoff)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lookup, range(n)))
+    seconds = time.perf_counter() - start
+
+    s = stats.snapshot()['stages']['rdap']
+    return {
+        'seconds': round(seconds, 3),
+        'targets_per_second': round(n / seconds),
+        'throttled': s['outcomes'].get('throttled', 0),
+        'max_in_flight': s['max_in_flight'],
+        'final_limit': s['limit'],
+        'p50': s['latency']['p50'],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=2000, help='Number of targets.')
+    parser.add_argument('-threads', type=int, default=10, help='The fixed concurrency, and the initial adaptive one.')
+    parser.add_argument('-capacity', type=int, default=64, help='The requests that the upstream serves at once.')
+    parser.add_argument('-queue', type=int, default=32, help='The waiting requests beyond which it throttles.')
+    parser.add_argument('-latency', type=float, default=0.02, help='The service time of a request (seconds).')
+    parser.add_argument('-backoff', type=float, default=0.1, help='The delay before a throttled query is retried.')
+    args = parser.parse_args()
+
+    for mode in ('fixed', 'adaptive'):
+        upstream = Upstream(args.capacity, args.queue, args.latency)
+        if mode == 'fixed':
+            result = run(args.n, args.threads, upstream, args.backoff, None)
+        else:
+            controller = concurrency.Controller(metrics.Metrics(), args.threads, stages=('rdap',))
+            result = run(args.n, concurrency.MAX_LIMIT, upstream, args.backoff, controller)
+
+        print(
+            json.dumps(
+                {
+                    'benchmark': 'adaptive',
+                    'mode': mode,
+                    'threads': args.threads,
+                    'capacity': args.capacity,
+                    'targets': args.n,
+                    **result,
+                }
+            )
+        )
+
+
+if __name__ == '__main__':
+    main()
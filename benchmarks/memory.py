@@ -0,0 +1,78 @@
+"""Measure the per-result memory of the analysis results.
+
+Compares a plain `list` of pydantic models (how `Analyzer` used to keep its results) against `store.ResultStore`.
+
+Usage:
+    python benchmarks/memory.py [-n 1000000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import models  # noqa: E402
+import store  # noqa: E402
+
+
+COUNTRIES = ['United States', 'Germany', 'Netherlands', 'Ireland', 'Japan', 'Brazil', 'India', 'France']
+CONTINENTS = ['North America', 'Europe', 'Europe', 'Europe', 'Asia', 'South America', 'Asia', 'Europe']
+ASNS = ['GOOGLE - Google LLC', 'AMAZON-02 - Amazon.com Inc.', 'CLOUDFLARENET - Cloudflare Inc.', 'AKAMAI-AS']
+
+
+def make_ipv4(i: int) -> models.IPV4:
+    # Build fresh string objects on purpose: RDAP/GeoIP replies never share their strings.
+    k = i % len(COUNTRIES)
+    return models.IPV4(
+        ipv4=f'{1 + (i >> 24) % 223}.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}',
+        visibility=''.join(['Pub', 'lic']),
+        asn_country_code=''.join(['U', 'S']),
+        asn_description=''.join([ASNS[i % len(ASNS)], ' US']),
+        asn_network=''.join([ASNS[i % len(ASNS)].split(' ')[0], '-NET']),
+        geoip_continent=''.join([CONTINENTS[k], '']),
+        geoip_country=''.join([COUNTRIES[k], '']),
+        pingable=i % 3 == 0,
+    )
+
+
+def measure(n: int, container_factory) -> float:
+    gc.collect()
+    tracemalloc.start()
+    container = container_factory()
+    for i in range(n):
+        container.append(make_ipv4(i))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    gc.collect()
+    return size / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=1_000_000, help='Number of results.')
+    args = parser.parse_args()
+
+    per_model = measure(args.n, list)
+    per_store = measure(args.n, lambda: store.ResultStore(models.IPV4))
+
+    print(
+        json.dumps(
+            {
+                'benchmark': 'memory',
+                'results': args.n,
+                'bytes_per_result_pydantic_list': round(per_model, 1),
+                'bytes_per_result_store': round(per_store, 1),
+                'reduction': round(per_model / per_store, 1),
+            }
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
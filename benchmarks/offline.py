@@ -0,0 +1,274 @@
+"""Offline throughput benchmarks of `analysis.Analyzer` against local stand-ins (see `standins.py`).
+
+Every scenario/scale pair runs in a fresh interpreter, so that its peak RSS is its own. One JSON object per run is
+written to stdout (and to `-output`), e.g.:
+
+    {"scenario": "e2e-fqdn", "scale": 1000, "targets_per_sec": 812.4, "p50_ms": 9.1, "p99_ms": 31.7, ...}
+
+Usage:
+    python benchmarks/offline.py [-scales 100,1000] [-scenarios e2e-fqdn,stage-dns] [-dns-latency 0.005]
+"""
+
+import argparse
+import concurrent.futures
+import ipaddress
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+import analysis  # noqa: E402
+import recording  # noqa: E402
+import standins  # noqa: E402
+import targets  # noqa: E402
+import verbose  # noqa: E402
+
+
+SCENARIOS = [
+    'e2e-ipv4',
+    'e2e-ipv4-per-ip',
+    'e2e-cidr',
+    'e2e-fqdn',
+    'e2e-url',
+    'e2e-overlap',
+    'e2e-collapse',
+    'e2e-replay',
+    'stage-dns',
+    'stage-rdap',
+    'stage-geoip',
+    'stage-ping',
+    'stage-http',
+]
+
+
+class TimedAnalyzer(analysis.Analyzer):
+    """Records the latency of every analyzed target."""
+
+    latencies: dict[str, list[float]] = {}
+
+    def _timed(self, kind: str, populate, *args):
+        start = time.perf_counter()
+        result = populate(*args)
+        self.latencies.setdefault(kind, []).append(time.perf_counter() - start)
+        return result
+
+    def _populate_ipv4(self, *args):
+        return self._timed('ipv4', super()._populate_ipv4, *args)
+
+    def _populate_cidr(self, *args):
+        return self._timed('cidr', super()._populate_cidr, *args)
+
+    def _populate_fqdn(self, *args):
+        return self._timed('fqdn', super()._populate_fqdn, *args)
+
+    def _populate_url(self, *args):
+        return self._timed('url', super()._populate_url, *args)
+
+
+def write_geoip_csv(directory: str) -> str:
+    """A GeoIP database that splits the stand-in address space into /20 networks."""
+    path = os.path.join(directory, 'geoip2-ipv4.csv')
+    with open(path, 'w') as f:
+        f.write(
+            'network,geoname_id,continent_code,continent_name,country_iso_code,country_name,'
+            'is_anonymous_proxy,is_satellite_provider\n'
+        )
+        for network in standins.BASE_NETWORK.subnets(new_prefix=20):
+            f.write(f'{network},6252001,NA,North America,US,United States,0,0\n')
+    return path
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_stage(analyzer: analysis.Analyzer, call, items: list, threads: int) -> tuple[list[float], int]:
+    latencies = []
+    errors = 0
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            call(item)
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        for latency, ok in executor.map(timed, items):
+            latencies.append(latency)
+            errors += 0 if ok else 1
+
+    return latencies, errors
+
+
+def run_scenario(args: argparse.Namespace) -> dict:
+    verbose.SILENT = True
+    scale = args.scale
+
+    dns_server = standins.DNSStandIn(latency=args.dns_latency, loss=args.dns_loss).start()
+    rdap_server = standins.RDAPStandIn(latency=args.rdap_latency).start()
+    farm = standins.HTTPFarm(latency=args.http_latency).start()
+
+    analyzer = TimedAnalyzer(
+        dns_servers=[dns_server.host],
+        dns_port=dns_server.port,
+        dns_delay=args.dns_delay,
+        rdap_url=rdap_server.url,
+        rdap_retry_delay=0.1,
+        # Pinging the stand-in addresses would leave the host, so only `stage-ping` pings (loopback).
+        enrichments={'rdap', 'geoip', 'http'},
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        analyzer.parse_geoip_data(write_geoip_csv(tmp))
+
+    errors = 0
+    start = time.perf_counter()
+
+    if args.run in ('e2e-ipv4', 'e2e-ipv4-per-ip'):
+        # Consecutive IPs, whose RDAP replies are shared by network range unless every IP is queried.
+        if args.run == 'e2e-ipv4-per-ip':
+            analyzer.rdap_ranges = None
+        analyzer.analyze_ipv4s([standins.address(i) for i in range(scale)], args.threads)
+        latencies = analyzer.latencies.get('ipv4', [])
+    elif args.run == 'e2e-cidr':
+        cidrs = [str(s) for s, _ in zip(standins.BASE_NETWORK.subnets(new_prefix=24), range(scale))]
+        analyzer.analyze_cidrs(cidrs, args.threads)
+        latencies = analyzer.latencies.get('cidr', [])
+    elif args.run == 'e2e-fqdn':
+        analyzer.analyze_fqdns([f'cname-{i}.bench.test' for i in range(scale)], args.threads)
+        latencies = analyzer.latencies.get('fqdn', [])
+    elif args.run == 'e2e-url':
+        analyzer.analyze_urls([farm.url(i) for i in range(scale)], args.threads)
+        latencies = analyzer.latencies.get('url', [])
+    elif args.run in ('e2e-overlap', 'e2e-collapse'):
+        # A scope of /16s, with /24s and IPs inside them, analyzed without and with `Targeter.collapse()`.
+        targeter = targets.Targeter()
+        blocks = list(standins.BASE_NETWORK.subnets(new_prefix=16))[:4]
+        subnets = [s for b in blocks for s in b.subnets(new_prefix=24)]
+        targeter.cidrs_v4 = [str(b) for b in blocks] + [str(s) for s, _ in zip(subnets, range(scale // 2))]
+        targeter.ipv4s = [str(s.network_address + 1 + i % 254) for i, s in zip(range(scale // 2), subnets)]
+        if args.run == 'e2e-collapse':
+            analyzer.covering = targeter.collapse()
+        analyzer.analyze_cidrs(targeter.cidrs_v4, args.threads)
+        analyzer.analyze_ipv4s(targeter.ipv4s, args.threads)
+        latencies = analyzer.latencies.get('cidr', []) + analyzer.latencies.get('ipv4', [])
+    elif args.run == 'e2e-replay':
+        # The CPU side of the analysis: the FQDNs are analyzed against the stand-ins while their responses are
+        # recorded, and only the replay of the recording by a fresh analyzer is measured.
+        names = [f'cname-{i}.bench.test' for i in range(scale)]
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer.recorder = recording.Recorder(tmp)
+            analyzer.analyze_fqdns(names, args.threads)
+            analyzer.recorder.close()
+
+            analyzer = TimedAnalyzer(
+                dns_delay=0.0,
+                rdap_retry_delay=0.0,
+                geoip_records=analyzer.geoip_records,
+                geoip_index=analyzer.geoip_index,
+                enrichments=analyzer.enrichments,
+            )
+            analyzer.replay(recording.Replayer(tmp))
+            start = time.perf_counter()
+            analyzer.analyze_fqdns(names, args.threads)
+        latencies = analyzer.latencies.get('fqdn', [])
+    elif args.run == 'stage-dns':
+        names = [f'host-{i}.bench.test' for i in range(scale)]
+        latencies, errors = run_stage(analyzer, lambda n: analyzer._resolve(n, 'A'), names, args.threads)
+    elif args.run == 'stage-rdap':
+        ips = [standins.address(i) for i in range(scale)]
+        latencies, errors = run_stage(analyzer, analyzer._lookup_rdap, ips, args.threads)
+    elif args.run == 'stage-geoip':
+        ips = [ipaddress.IPv4Address(standins.address(i)) for i in range(scale)]
+        latencies, errors = run_stage(analyzer, analyzer._lookup_geoip, ips, args.threads)
+    elif args.run == 'stage-ping':
+        ips = standins.loopback_targets(scale)
+        latencies, errors = run_stage(analyzer, lambda ip: analyzer._ping(ip) or 1 / 0, ips, args.threads)
+    elif args.run == 'stage-http':
+        urls = [farm.url(i) for i in range(scale)]
+        latencies, errors = run_stage(analyzer, lambda u: analyzer._probe(u)['reachable'] or 1 / 0, urls, args.threads)
+    else:
+        raise ValueError(f'unknown scenario {args.run!r}')
+
+    elapsed = time.perf_counter() - start
+
+    dns_server.stop()
+    rdap_server.stop()
+    farm.stop()
+
+    return {
+        'scenario': args.run,
+        'scale': scale,
+        'threads': args.threads,
+        'elapsed_sec': round(elapsed, 3),
+        'targets_per_sec': round(scale / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'errors': errors,
+        'dns_queries': dns_server.queries,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'stages': analyzer.stats.snapshot()['stages'],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-scales', default='100,1000', help='Comma-separated number of targets per run.')
+    parser.add_argument('-scenarios', default=','.join(SCENARIOS), help='Comma-separated scenarios.')
+    parser.add_argument('-threads', type=int, default=10, help='Worker threads, as with `scopez -threads`.')
+    parser.add_argument('-dns-latency', type=float, default=0.0, help='Seconds before the DNS stand-in answers.')
+    parser.add_argument('-dns-loss', type=float, default=0.0, help='Fraction of DNS queries that are dropped.')
+    parser.add_argument('-dns-delay', type=float, default=0.0, help='The `Analyzer.dns_delay` between queries.')
+    parser.add_argument('-rdap-latency', type=float, default=0.0, help='Seconds before the RDAP stand-in answers.')
+    parser.add_argument('-http-latency', type=float, default=0.0, help='Seconds before the HTTP targets answer.')
+    parser.add_argument('-output', default='', help='Also append the JSON results to this file.')
+    parser.add_argument('-run', default='', help=argparse.SUPPRESS)
+    parser.add_argument('-scale', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_scenario(args)))
+        return
+
+    passthrough = [
+        f'-threads={args.threads}',
+        f'-dns-latency={args.dns_latency}',
+        f'-dns-loss={args.dns_loss}',
+        f'-dns-delay={args.dns_delay}',
+        f'-rdap-latency={args.rdap_latency}',
+        f'-http-latency={args.http_latency}',
+    ]
+    for scenario in args.scenarios.split(','):
+        for scale in args.scales.split(','):
+            command = [sys.executable, __file__, f'-run={scenario}', f'-scale={scale}', *passthrough]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                line = json.dumps({'scenario': scenario, 'scale': int(scale), 'error': completed.stderr.strip()})
+            else:
+                line = completed.stdout.strip().splitlines()[-1]
+            print(line, flush=True)
+            if args.output:
+                with open(args.output, 'a') as f:
+                    f.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Measure the parse throughput of a large targets file, serially and with worker processes.
+
+Writes a synthetic file of mixed targets (IPs, FQDNs, URLs and invalid lines), parses it with
+`targets.Targeter.parse_targets_file` and with `parse_targets_file_parallel` for every worker count, and checks that
+every parse finds the same targets.
+
+Usage:
+    python benchmarks/parsing.py [-n 1000000] [-workers 2,4,8] [-file /tmp/targets.txt]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import targets  # noqa: E402
+
+
+def write_targets(filepath: str, n: int) -> None:
+    with open(filepath, 'w') as f:
+        for i in range(n):
+            kind = i % 4
+            if kind == 0:
+                f.write(f'10.{i % 256}.{i // 256 % 256}.{i // 65536 % 256}\n')
+            elif kind == 1:
+                f.write(f'host-{i}.bench.test\n')
+            elif kind == 2:
+                f.write(f'https://host-{i}.bench.test/path\n')
+            else:
+                f.write(f'not a target {i}\n')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=1_000_000, help='Number of lines of the targets file.')
+    parser.add_argument('-workers', default=f'2,{os.cpu_count()}', help='Comma-separated worker counts.')
+    parser.add_argument(
+        '-file', default=os.path.join(tempfile.gettempdir(), 'targets.txt'), help='Where to write the targets file.'
+    )
+    args = parser.parse_args()
+
+    write_targets(args.file, args.n)
+
+    runs = [('serial', 0)] + [('parallel', int(w)) for w in args.workers.split(',')]
+    reference = None
+    for mode, workers in runs:
+        targeter = targets.Targeter()
+        start = time.perf_counter()
+        if workers:
+            targeter.parse_targets_file_parallel(args.file, workers)
+        else:
+            targeter.parse_targets_file(args.file)
+        seconds = time.perf_counter() - start
+
+        reference = reference or targeter.model_dump()
+        print(
+            json.dumps(
+                {
+                    'benchmark': 'parsing',
+                    'mode': mode,
+                    'workers': workers,
+                    'lines': args.n,
+                    'seconds': round(seconds, 3),
+                    'lines_per_second': round(args.n / seconds),
+                    'identical': targeter.model_dump() == reference,
+                }
+            )
+        )
+
+
+if __name__ == '__main__':
+    main()
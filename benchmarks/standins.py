@@ -0,0 +1,194 @@
+"""Local stand-ins for the services that scopez talks to: DNS, RDAP and HTTP targets.
+
+Names and addresses follow a fixed scheme so that the benchmarks can generate matching targets:
+
+- `cname-N.bench.test` is a CNAME to `host-N.bench.test`.
+- `host-N.bench.test` has a single A record, `address(N)`, inside 100.64.0.0/10.
+- `/ip/<address>` on the RDAP stand-in returns the /22 network that contains the address.
+"""
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+import http.server
+import ipaddress
+import json
+import random
+import re
+import socket
+import threading
+import time
+
+
+BASE_NETWORK = ipaddress.IPv4Network('100.64.0.0/10')
+NAME_RE = re.compile(r'^(cname|host)-(\d+)\.bench\.test\.$')
+
+
+def address(n: int) -> str:
+    """The A record of `host-N.bench.test`."""
+    return str(BASE_NETWORK.network_address + 1 + n % (BASE_NETWORK.num_addresses - 2))
+
+
+class DNSStandIn:
+    """A UDP DNS server with configurable latency and packet loss."""
+
+    def __init__(self, latency: float = 0.0, loss: float = 0.0, host: str = '127.0.0.1'):
+        self.latency = latency
+        self.loss = loss
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))
+        self.host, self.port = self.sock.getsockname()
+        self.queries = 0
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self) -> 'DNSStandIn':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.sock.close()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            self.queries += 1
+            if random.random() < self.loss:
+                continue
+            if self.latency > 0:
+                threading.Timer(self.latency, self._reply, (data, addr)).start()
+            else:
+                self._reply(data, addr)
+
+    def _reply(self, data: bytes, addr: tuple) -> None:
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        match = NAME_RE.match(question.name.to_text().lower())
+
+        if match is None:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif match.group(1) == 'cname' and question.rdtype == dns.rdatatype.CNAME:
+            target = f'host-{match.group(2)}.bench.test.'
+            response.answer.append(dns.rrset.from_text(question.name, 60, 'IN', 'CNAME', target))
+        elif match.group(1) == 'host' and question.rdtype == dns.rdatatype.A:
+            ip = address(int(match.group(2)))
+            response.answer.append(dns.rrset.from_text(question.name, 60, 'IN', 'A', ip))
+
+        try:
+            self.sock.sendto(response.to_wire(), addr)
+        except OSError:
+            pass
+
+
+class _QuietServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class _HTTPStandIn:
+    latency = 0.0
+
+    def __init__(self, handler: type[http.server.BaseHTTPRequestHandler], latency: float = 0.0):
+        handler = type(handler.__name__, (handler,), {'latency': latency})
+        self.server = _QuietServer(('127.0.0.1', 0), handler)
+        self.host, self.port = self.server.server_address
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _RDAPHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        match = re.match(r'^/ip/([0-9.]+)$', self.path)
+        if match is None:
+            self.send_error(404)
+            return
+
+        network = ipaddress.IPv4Network(f'{match.group(1)}/22', strict=False)
+        body = json.dumps(
+            {
+                'objectClassName': 'ip network',
+                'handle': f'NET-{network.network_address}',
+                'name': f'BENCH-NET-{int(network.network_address) >> 10}',
+                'country': 'US',
+                'startAddress': str(network.network_address),
+                'endAddress': str(network.broadcast_address),
+                'entities': [{'vcardArray': ['vcard', [['fn', {}, 'text', 'Benchmark Networks Inc.']]]}],
+            }
+        ).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rdap+json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _TargetHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Server', 'bench-farm')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RDAPStandIn(_HTTPStandIn):
+    """An RDAP server that answers every `/ip/<address>` query with a /22 network."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(_RDAPHandler, latency)
+
+
+class HTTPFarm:
+    """A set of HTTP target servers on loopback ports."""
+
+    def __init__(self, size: int = 4, latency: float = 0.0):
+        self.servers = [_HTTPStandIn(_TargetHandler, latency) for _ in range(size)]
+
+    def start(self) -> 'HTTPFarm':
+        for s in self.servers:
+            s.start()
+        return self
+
+    def stop(self) -> None:
+        for s in self.servers:
+            s.stop()
+
+    def url(self, n: int) -> str:
+        return f'{self.servers[n % len(self.servers)].url}/{n}'
+
+
+def loopback_targets(count: int) -> list[str]:
+    """Addresses inside 127.0.0.0/8 that answer pings on every host."""
+    return [str(ipaddress.IPv4Address('127.0.0.1') + i) for i in range(count)]
@@ -0,0 +1,95 @@
+"""Check the cold-start time of the CLI against a budget.
+
+Every scenario is started in a fresh interpreter a few times. The check fails (exit code 1) when the median wall-clock
+time exceeds the budget, or when a scenario imports one of the heavy dependencies that only specific features need.
+
+Usage:
+    python benchmarks/startup.py [-budget 0.5] [-runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Modules that must not be imported unless the feature that needs them is used (a package includes its submodules).
+HEAVY_MODULES = [
+    'pandas',
+    'matplotlib',
+    'networkx',
+    'rich.progress',
+    'scipy',
+    'numpy',
+    'PIL',
+    'ipwhois',
+    'requests',
+    'dns',
+]
+
+SCENARIOS = {
+    'version': [os.path.join(SRC_DIR, 'main.py'), '-version'],
+    'help': [os.path.join(SRC_DIR, 'main.py'), '-help'],
+    # What a short '-json' run of a few IP addresses imports before it starts to analyze.
+    'analysis': ['-c', 'import analysis, print, targets, journal, results, metrics, tracing'],
+}
+
+
+def imported_modules(args: list[str]) -> set[str]:
+    completed = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=SRC_DIR, capture_output=True, text=True)
+    modules = set()
+    for line in completed.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            modules.add(line.rsplit('|', 1)[1].strip())
+    return modules
+
+
+def is_heavy(module: str) -> bool:
+    return any(module == heavy or module.startswith(f'{heavy}.') for heavy in HEAVY_MODULES)
+
+
+def wall_time(args: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=SRC_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-budget', type=float, default=0.5, help='Maximum median seconds per scenario.')
+    parser.add_argument('-runs', type=int, default=5, help='Runs per scenario.')
+    args = parser.parse_args()
+
+    failed = False
+    heavy_by_scenario = {}
+    for name, command in SCENARIOS.items():
+        median = statistics.median(wall_time(command) for _ in range(args.runs))
+        heavy = sorted({m for m in imported_modules(command) if is_heavy(m)})
+        heavy_by_scenario[name] = heavy
+        ok = median <= args.budget and not heavy
+        failed = failed or not ok
+        print(
+            json.dumps(
+                {
+                    'scenario': name,
+                    'median_sec': round(median, 3),
+                    'budget_sec': args.budget,
+                    'heavy_imports': heavy,
+                    'ok': ok,
+                }
+            )
+        )
+
+    # Help is printed before any feature runs, so it must never pull in a heavy dependency.
+    assert not heavy_by_scenario['help'], f"'scopez -help' imports {', '.join(heavy_by_scenario['help'])}"
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Measure the layout and rendering time of large visualizations.
+
+Builds synthetic FQDN results (target -> CNAME -> 3 IPs spread over a few ASNs) and times every step of
+`visualization.Visualizer`, optionally with the ASN groups collapsed.
+
+Usage:
+    python benchmarks/visualization.py [-n 12500] [-asns 20] [-collapse] [-out /tmp/network.png]
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import graph  # noqa: E402
+import models  # noqa: E402
+import standins  # noqa: E402
+import visualization  # noqa: E402
+
+
+def make_fqdn(i: int, asns: int) -> models.FQDN:
+    ips = [models.IPV4(ipv4=standins.address(3 * i + j), asn_description=f'AS{(i + j) % asns}') for j in range(3)]
+    return models.FQDN(
+        fqdn=f'host-{i}.bench.test',
+        dns_chain=[f'host-{i}.bench.test', f'edge-{i}.cdn.bench.test'],
+        hosts_found=i % 10 != 0,
+        destination_ips=ips,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=12_500, help='Number of FQDN targets (~5 nodes each).')
+    parser.add_argument('-asns', type=int, default=20, help='Number of distinct ASNs of the IPs.')
+    parser.add_argument('-collapse', action='store_true', help='Collapse the large ASN groups into summary nodes.')
+    parser.add_argument(
+        '-out', default=os.path.join(tempfile.gettempdir(), 'network.png'), help='Where to save the image.'
+    )
+    args = parser.parse_args()
+
+    fqdns = [make_fqdn(i, args.asns) for i in range(args.n)]
+    visualizer = visualization.Visualizer(collapse_threshold=50 if args.collapse else sys.maxsize)
+    timings = {}
+
+    start = time.perf_counter()
+    G = graph.build([], [], fqdns, [])
+    G = graph.collapse_groups(G, visualizer.collapse_threshold)
+    timings['build_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pos = visualizer.layout(G)
+    timings['layout_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    visualizer.render(G, pos, args.out)
+    timings['render_seconds'] = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                'benchmark': 'visualization',
+                'targets': args.n,
+                'nodes': G.number_of_nodes(),
+                'edges': G.number_of_edges(),
+                **{k: round(v, 3) for k, v in timings.items()},
+                'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            }
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,138 @@
 import pydantic
-import ipwhois
-import dns.resolver
-import requests
-import pandas
 
+import base64
+import contextlib
 import ipaddress
+import math
 import subprocess
 import os
 import concurrent.futures
 import random
+import threading
 import urllib.parse
 import time
+import typing
+import warnings
 
+import cdn
+import concurrency
+import geoip
+import metrics
 import models
+import ranges
+import recording
+import store
 import verbose
+import x509
+
+
+if typing.TYPE_CHECKING:
+    import dns.resolver
+    import requests
+
+
+# The optional steps that enrich the analyzed IP addresses and URLs.
+ENRICHMENTS = ('rdap', 'geoip', 'cdn', 'ping', 'http')
+# The seconds after which the remaining stages of a target are abandoned.
+DEFAULT_TARGET_TIMEOUT = 300.0
+# The timeouts (seconds) of a single DNS resolution, RDAP query, ping and HTTP request.
+DNS_LIFETIME = 5.0
+RDAP_TIMEOUT = 10.0
+PING_TIMEOUT = 10.0
+HTTP_TIMEOUT = 2.0
+# The redirects that an HTTP probe follows.
+MAX_REDIRECTS = 10
+# The fields of `models.URL` that the HTTP probe captures.
+HTTP_FIELDS = ('reachable', 'status_code', 'server', 'redirects', 'tls_subject', 'tls_sans', 'tls_expires_at')
+# The IPs that share a prefix of this length wait for the RDAP reply of the first one, whose network likely contains
+# them, instead of being queried at the same time.
+RDAP_GROUP_PREFIX = 24
+
+
+class DeadlineExceeded(Exception):
+    """The deadline of the target (or of the run) expired before a stage could complete."""
+
+
+class NotRecorded(DeadlineExceeded):
+    """The replayed recording has no response to a request, which the recorded run never got to send."""
 
 
 class Analyzer(pydantic.BaseModel):
     """Analyzes raw targets and populates them with additiona information."""
 
-    analyzed_ipv4s: list[models.IPV4] = []
-    analyzed_cidrs: list[models.CIDR] = []
-    analyzed_fqdns: list[models.FQDN] = []
-    analyzed_urls: list[models.URL] = []
+    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
+
+    analyzed_ipv4s: store.ResultStore = pydantic.Field(default_factory=lambda: store.ResultStore(models.IPV4))
+    analyzed_cidrs: store.ResultStore = pydantic.Field(default_factory=lambda: store.ResultStore(models.CIDR))
+    analyzed_fqdns: store.ResultStore = pydantic.Field(default_factory=lambda: store.ResultStore(models.FQDN))
+    analyzed_urls: store.ResultStore = pydantic.Field(default_factory=lambda: store.ResultStore(models.URL))
     geoip_records: list[models.GeoIPRecord] = []
+    geoip_index: geoip.GeoIPIndex | None = None
+    cdn_index: cdn.CDNIndex | None = None
+    result_callbacks: list[typing.Callable[[pydantic.BaseModel], None]] = []
+    previous_results: dict[str, pydantic.BaseModel] = {}
+    freshness: dict[str, float] = {}
+    enrichments: set[str] = set(ENRICHMENTS)
+    dns_servers: list[str] = pydantic.Field(default_factory=lambda: list(DNS_SERVERS))
+    dns_port: int = 53
+    dns_delay: float = 1.0
+    rdap_url: str = ''
+    rdap_retry_delay: float = 5.0
+    target_timeout: float = DEFAULT_TARGET_TIMEOUT
+    deadline: float = math.inf
+    covering: dict[str, str] = {}
+    rdap_ranges: ranges.RangeCache | None = pydantic.Field(default_factory=ranges.RangeCache)
+    stats: metrics.Metrics = pydantic.Field(default_factory=metrics.Metrics)
+    limiter: concurrency.Controller | None = None
+    recorder: recording.Recorder | None = None
+    replayer: recording.Replayer | None = None
+    _target_deadline: threading.local = pydantic.PrivateAttr(default_factory=threading.local)
+    _network_rdap: dict[str, dict] = pydantic.PrivateAttr(default_factory=dict)
+    _network_lookups: dict[str, threading.Event] = pydantic.PrivateAttr(default_factory=dict)
+    _network_lock: threading.Lock = pydantic.PrivateAttr(default_factory=threading.Lock)
+    _range_lookups: dict[int, threading.Event] = pydantic.PrivateAttr(default_factory=dict)
+    _range_lock: threading.Lock = pydantic.PrivateAttr(default_factory=threading.Lock)
+    _http_sessions: threading.local = pydantic.PrivateAttr(default_factory=threading.local)
+
+    def adapt_concurrency(self, initial: int) -> int:
+        """Adapts the concurrency of every network stage to its latency and errors, instead of the worker threads.
+
+        Args:
+            initial (int): The initial concurrency limit of every stage.
+
+        Returns:
+            int: The number of worker threads to analyze with, so that the stage limits are what bounds the concurrency.
+        """
+        self.limiter = concurrency.Controller(self.stats, initial)
+        return concurrency.MAX_LIMIT
+
+    def limit_runtime(self, seconds: float, started: float | None = None) -> None:
+        """Abandons the remaining stages of every target once the run takes longer than `seconds`.
+
+        Args:
+            seconds (float): The run time budget.
+            started (float | None): When the run started (`time.monotonic()`). Defaults to now.
+        """
+        self.deadline = (time.monotonic() if started is None else started) + seconds
+
+    def replay(self, replayer: recording.Replayer) -> None:
+        """Serves the external responses of a recording instead of the network (see `_exchange()`).
+
+        The recorded RDAP replies are shared by network range (see `rdap_ranges`) before any IP is looked up, since
+        which IP of a range got queried depends on the timing of the recorded run.
+
+        Args:
+            replayer (recording.Replayer): The recording.
+        """
+        self.replayer = replayer
+        if self.rdap_ranges is not None:
+            for response in replayer.responses('rdap'):
+                if 'reply' in response:
+                    self.rdap_ranges.add(response['reply'])
 
     def parse_geoip_data(self, geoip_csv_database_filepath: str):
-        data_frame = pandas.read_csv(geoip_csv_database_filepath).where(pandas.notnull, None)
-        records = data_frame.to_dict(orient='records')
-
-        for r in records:
-            self.geoip_records.append(
-                models.GeoIPRecord(
-                    network=r.get('network'),
-                    geoname_id=r.get('geoname_id'),
-                    continent_code=r.get('continent_code'),
-                    continent_name=r.get('continent_name'),
-                    country_iso_code=r.get('country_iso_code'),
-                    country_name=r.get('country_name'),
-                    is_anonymous_proxy=r.get('is_anonymous_proxy'),
-                    is_satellite_provider=r.get('is_satellite_provider'),
-                )
-            )
+        self.geoip_records.extend(geoip.read_records(geoip_csv_database_filepath))
+        self.geoip_index = geoip.GeoIPIndex(self.geoip_records)
 
     def analyze_ipv4s(self, ipv4s: list[str], no_threads: int) -> None:
         """Analyze the IP addresses (v4) and populate them with information.
@@ -52,13 +143,14 @@ class Analyzer(pydantic.BaseModel):
         """
         verbose.debug('Analyze IPV4s.')
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=no_threads) as executor:
-            futures = [executor.submit(self._populate_ipv4, ip) for ip in ipv4s]
+        verbose.progress_start('IPv4s', len(ipv4s))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=no_threads, thread_name_prefix='ipv4') as executor:
+            futures = [executor.submit(self._analyze, 'ipv4', self._populate_ipv4, ip) for ip in ipv4s]
 
             for future in concurrent.futures.as_completed(futures):
                 ipv4_obj = future.result()
-                verbose.normal(ipv4_obj.ipv4)
-                self.analyzed_ipv4s.append(ipv4_obj)
+                verbose.progress_advance('IPv4s')
+                self._collect(self.analyzed_ipv4s, ipv4_obj)
 
     def analyze_cidrs(self, cidrs: list[str], no_threads: int) -> None:
         """Analyze the CIDR IP addresses (v4) and populate them with information.
@@ -69,13 +161,14 @@ class Analyzer(pydantic.BaseModel):
         """
         verbose.debug('Analyze CIDRs.')
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=no_threads) as executor:
-            futures = [executor.submit(self._populate_cidr, cidr) for cidr in cidrs]
+        verbose.progress_start('CIDRs', len(cidrs))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=no_threads, thread_name_prefix='cidr') as executor:
+            futures = [executor.submit(self._analyze, 'cidr', self._populate_cidr, cidr) for cidr in cidrs]
 
             for future in concurrent.futures.as_completed(futures):
                 cidr_obj = future.result()
-                verbose.normal(cidr_obj.cidr)
-                self.analyzed_cidrs.append(cidr_obj)
+                verbose.progress_advance('CIDRs')
+                self._collect(self.analyzed_cidrs, cidr_obj)
 
     def analyze_fqdns(self, fqdns: list[str], no_threads: int) -> None:
         """Analyze the FQDNs and populate them with information.
@@ -86,13 +179,14 @@ class Analyzer(pydantic.BaseModel):
         """
         verbose.debug('Analyze FQDNs.')
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=no_threads) as executor:
-            futures = [executor.submit(self._populate_fqdn, fqdn) for fqdn in fqdns]
+        verbose.progress_start('FQDNs', len(fqdns))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=no_threads, thread_name_prefix='fqdn') as executor:
+            futures = [executor.submit(self._analyze, 'fqdn', self._populate_fqdn, fqdn) for fqdn in fqdns]
 
             for future in concurrent.futures.as_completed(futures):
                 fqdn_obj = future.result()
-                verbose.normal(fqdn_obj.fqdn)
-                self.analyzed_fqdns.append(fqdn_obj)
+                verbose.progress_advance('FQDNs')
+                self._collect(self.analyzed_fqdns, fqdn_obj)
 
     def analyze_urls(self, urls: list[str], no_threads: int) -> None:
         """Analyze the URLS and populate them with information.
@@ -103,15 +197,157 @@ class Analyzer(pydantic.BaseModel):
         """
         verbose.debug('Analyze URLs.')
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=no_threads) as executor:
-            futures = [executor.submit(self._populate_url, url) for url in urls]
+        verbose.progress_start('URLs', len(urls))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=no_threads, thread_name_prefix='url') as executor:
+            futures = [executor.submit(self._analyze, 'url', self._populate_url, url) for url in urls]
 
             for future in concurrent.futures.as_completed(futures):
                 url_obj = future.result()
-                verbose.normal(url_obj.url)
-                self.analyzed_urls.append(url_obj)
+                verbose.progress_advance('URLs')
+                self._collect(self.analyzed_urls, url_obj)
+
+    def analyze_target(self, kind: str, target: str) -> pydantic.BaseModel:
+        """Analyzes a single target in the calling thread, without storing the result.
+
+        Args:
+            kind (str): The kind of the target: 'ipv4', 'cidr', 'fqdn' or 'url'.
+            target (str): The target in raw format.
+
+        Returns:
+            pydantic.BaseModel: The `models.IPV4`, `models.CIDR`, `models.FQDN` or `models.URL`.
+        """
+        populate = {
+            'ipv4': self._populate_ipv4,
+            'cidr': self._populate_cidr,
+            'fqdn': self._populate_fqdn,
+            'url': self._populate_url,
+        }
+        return self._analyze(kind, populate[kind], target)
+
+    def restore(self, result: pydantic.BaseModel) -> None:
+        """Adds a result that was analyzed by a previous run (e.g. replayed from a journal) without re-analyzing it.
 
-    def _populate_ipv4(self, ipv4: str) -> models.IPV4:
+        Args:
+            result (pydantic.BaseModel): A `models.IPV4`, `models.CIDR`, `models.FQDN` or `models.URL`.
+        """
+        stores = {
+            'ipv4': self.analyzed_ipv4s,
+            'cidr': self.analyzed_cidrs,
+            'fqdn': self.analyzed_fqdns,
+            'url': self.analyzed_urls,
+        }
+        stores[result.type].append(result)
+
+    def results(self) -> typing.Iterator[pydantic.BaseModel]:
+        """Iterates over all the analyzed results (IPv4s, CIDRs, FQDNs and URLs)."""
+        yield from self.analyzed_ipv4s
+        yield from self.analyzed_cidrs
+        yield from self.analyzed_fqdns
+        yield from self.analyzed_urls
+
+    def _analyze(self, kind: str, populate: typing.Callable, target: str) -> pydantic.BaseModel:
+        """Runs the `populate` function of a single target within its deadline and tracks it as `analyze-<kind>`."""
+        deadline = self.deadline
+        if self.target_timeout > 0:
+            deadline = min(deadline, time.monotonic() + self.target_timeout)
+
+        self._target_deadline.at = deadline
+        try:
+            with self.stats.track(f'analyze-{kind}', target):
+                return populate(target, self.previous_results.get(target))
+        finally:
+            del self._target_deadline.at
+
+    def _collect(self, results: store.ResultStore, result: pydantic.BaseModel) -> None:
+        """Stores a completed result and hands it to the `result_callbacks` (e.g. the checkpoint journal)."""
+        results.append(result)
+        for callback in self.result_callbacks:
+            callback(result)
+
+    def _classify_cdn(self) -> cdn.CDNIndex:
+        """Returns the CDN index, which is loaded from the bundled providers file on first use."""
+        if self.cdn_index is None:
+            self.cdn_index = cdn.load()
+        return self.cdn_index
+
+    def _fqdn_cdn(self, f: models.FQDN) -> str:
+        """Returns the CDN of the first hop of the DNS chain with a CDN suffix, or else of the first destination IP."""
+        if 'cdn' not in self.enrichments:
+            return ''
+
+        for name in f.dns_chain:
+            provider = self._classify_cdn().classify_name(name)
+            if provider:
+                return provider
+
+        return next((ip.cdn for ip in f.destination_ips if ip.cdn), '')
+
+    def _slot(self, stage: str) -> typing.ContextManager:
+        """Holds a place within the adaptive concurrency limit of the stage, if there is one."""
+        return self.limiter.slot(stage) if self.limiter is not None else contextlib.nullcontext()
+
+    def _remaining(self) -> float:
+        """Returns the seconds left until the deadline of the target that this thread analyzes (or of the run)."""
+        return getattr(self._target_deadline, 'at', self.deadline) - time.monotonic()
+
+    def _budget(self, timeout: float) -> float:
+        """Caps the timeout of a network call at the time left, and raises `DeadlineExceeded` if there is none."""
+        remaining = self._remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded()
+        return min(timeout, remaining)
+
+    @contextlib.contextmanager
+    def _until_deadline(self, result: pydantic.BaseModel, stage: str) -> typing.Iterator[None]:
+        """Abandons the `stage` of the result when its deadline expires, and records it in `timed_out`."""
+        try:
+            yield
+        except DeadlineExceeded:
+            verbose.debug(f"The deadline of {getattr(result, result.type)} expired: abandon the '{stage}' stage.")
+            result.timed_out.append(stage)
+
+    def _exchange(self, stage: str, key: str, request: typing.Callable[[], dict]) -> dict:
+        """Sends an external request of a stage and returns its response, which is recorded (see `recorder`), or
+        returns the recorded response instead (see `replayer`).
+
+        Args:
+            stage (str): The stage, e.g. 'dns'.
+            key (str): What identifies the request within the stage, e.g. 'example.com A'.
+            request (Callable[[], dict]): Sends the request and returns the response as JSON data. A request that is
+                abandoned (e.g. at its deadline) raises instead, and is not recorded.
+
+        Returns:
+            dict: The response.
+
+        Raises:
+            NotRecorded: If the replayed recording has no (further) response to the request.
+        """
+        if self.replayer is not None:
+            response = self.replayer.next(stage, key)
+            if response is None:
+                raise NotRecorded()
+            if self.replayer.latency:
+                time.sleep(max(min(response['latency'], self._remaining()), 0))
+            return response
+
+        started = time.monotonic()
+        response = request()
+        if self.recorder is not None:
+            self.recorder.record(stage, key, time.monotonic() - started, response)
+        return response
+
+    def _fresh(self, previous: pydantic.BaseModel | None, stage: str) -> bool:
+        """Checks whether the `stage` of a previous result is recent enough to be carried forward."""
+        if previous is None:
+            return False
+
+        fresh = time.time() - getattr(previous, f'{stage}_checked_at') < self.freshness.get(stage, 0)
+        if fresh:
+            self.stats.cache_hit(stage)
+
+        return fresh
+
+    def _populate_ipv4(self, ipv4: str, previous: models.IPV4 | None = None) -> models.IPV4:
         verbose.debug(f'Analyze {ipv4}.')
 
         ipv4_obj = models.IPV4()
@@ -130,51 +366,59 @@ class Analyzer(pydantic.BaseModel):
         ########
         # RDAP #
         ########
-        if ipv4_obj.visibility == 'Public':
-            while True:
-                try:
-                    whois = ipwhois.IPWhois(ipv4_obj.ipv4)
-                    rdap = whois.lookup_rdap(depth=1) or {}
-                    break
-                except Exception:
-                    time.sleep(5)
-                    continue
-            ipv4_obj.asn_network = rdap.get('network', {}).get('name', '').replace(',', '')
-            ipv4_obj.asn_country_code = rdap.get('asn_country_code')
-            ipv4_obj.asn_description = rdap.get('asn_description', '').replace(',', '')
-        else:
+        if ipv4_obj.visibility == 'Public' and self._fresh(previous, 'rdap'):
+            ipv4_obj.asn_network = previous.asn_network
+            ipv4_obj.asn_country_code = previous.asn_country_code
+            ipv4_obj.asn_description = previous.asn_description
+            ipv4_obj.rdap_checked_at = previous.rdap_checked_at
+        elif ipv4_obj.visibility == 'Public' and 'rdap' in self.enrichments:
+            with self._until_deadline(ipv4_obj, 'rdap'):
+                rdap = self._rdap_of(ipv4, ipv4)
+                ipv4_obj.asn_network = rdap.get('network', {}).get('name', '').replace(',', '')
+                ipv4_obj.asn_country_code = rdap.get('asn_country_code')
+                ipv4_obj.asn_description = rdap.get('asn_description', '').replace(',', '')
+                ipv4_obj.rdap_checked_at = time.time()
+        elif ipv4_obj.visibility == 'Private':
             ipv4_obj.asn_network = 'N/A'
             ipv4_obj.asn_country_code = 'N/A'
             ipv4_obj.asn_description = 'N/A'
+            ipv4_obj.rdap_checked_at = time.time()
 
         #########
         # GeoIP #
         #########
-        if ipv4_obj.visibility == 'Public':
-            for r in self.geoip_records:
-                network = ipaddress.IPv4Network(r.network)
-
-                if ip in network:
-                    ipv4_obj.geoip_continent = r.continent_name
-                    ipv4_obj.geoip_country = r.country_name
-        else:
+        if ipv4_obj.visibility == 'Public' and 'geoip' in self.enrichments:
+            record = self._lookup_geoip(ip)
+            if record is not None:
+                ipv4_obj.geoip_continent = record.continent_name
+                ipv4_obj.geoip_country = record.country_name
+        elif ipv4_obj.visibility == 'Private':
             ipv4_obj.geoip_continent = 'N/A'
             ipv4_obj.geoip_country = 'N/A'
 
+        #######
+        # CDN #
+        #######
+        if ipv4_obj.visibility == 'Public' and 'cdn' in self.enrichments:
+            ipv4_obj.cdn = self._classify_cdn().classify_ip(ip)
+
         ########
         # Ping #
         ########
-        if ipv4_obj.visibility == 'Public':
-            param = '-n' if os.sys.platform.lower() == 'win32' else '-c'
-            command = ['ping', param, '1', '-i', '0.2', ipv4]
-            pingable = subprocess.call(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0
-            ipv4_obj.pingable = pingable
-        else:
+        if ipv4_obj.visibility == 'Public' and self._fresh(previous, 'ping'):
+            ipv4_obj.pingable = previous.pingable
+            ipv4_obj.ping_checked_at = previous.ping_checked_at
+        elif ipv4_obj.visibility == 'Public' and 'ping' in self.enrichments:
+            with self._until_deadline(ipv4_obj, 'ping'):
+                ipv4_obj.pingable = self._ping(ipv4)
+                ipv4_obj.ping_checked_at = time.time()
+        elif ipv4_obj.visibility == 'Private':
             ipv4_obj.pingable = False
+            ipv4_obj.ping_checked_at = time.time()
 
         return ipv4_obj
 
-    def _populate_cidr(self, cidr: str) -> models.CIDR:
+    def _populate_cidr(self, cidr: str, previous: models.CIDR | None = None) -> models.CIDR:
         verbose.debug(f'Analyze {cidr}.')
 
         cidr_obj = models.CIDR()
@@ -194,39 +438,41 @@ class Analyzer(pydantic.BaseModel):
         ########
         # RDAP #
         ########
-        if cidr_obj.visibility == 'Public':
-            ip = cidr.split('/')[0]
-            while True:
-                try:
-                    whois = ipwhois.IPWhois(ip)
-                    rdap = whois.lookup_rdap(depth=1) or {}
-                    break
-                except Exception:
-                    time.sleep(5)
-                    continue
-            cidr_obj.asn_network = rdap.get('network', {}).get('name', '').replace(',', '')
-            cidr_obj.asn_country_code = rdap.get('asn_country_code')
-            cidr_obj.asn_description = rdap.get('asn_description', '').replace(',', '')
-        else:
+        if cidr_obj.visibility == 'Public' and self._fresh(previous, 'rdap'):
+            cidr_obj.asn_network = previous.asn_network
+            cidr_obj.asn_country_code = previous.asn_country_code
+            cidr_obj.asn_description = previous.asn_description
+            cidr_obj.rdap_checked_at = previous.rdap_checked_at
+        elif cidr_obj.visibility == 'Public' and 'rdap' in self.enrichments:
+            with self._until_deadline(cidr_obj, 'rdap'):
+                rdap = self._rdap_of(cidr, cidr.split('/')[0])
+                cidr_obj.asn_network = rdap.get('network', {}).get('name', '').replace(',', '')
+                cidr_obj.asn_country_code = rdap.get('asn_country_code')
+                cidr_obj.asn_description = rdap.get('asn_description', '').replace(',', '')
+                cidr_obj.rdap_checked_at = time.time()
+        elif cidr_obj.visibility == 'Private':
             cidr_obj.asn_network = 'N/A'
             cidr_obj.asn_country_code = 'N/A'
             cidr_obj.asn_description = 'N/A'
+            cidr_obj.rdap_checked_at = time.time()
 
         #########
         # GeoIP #
         #########
-        if cidr_obj.visibility == 'Public':
+        if cidr_obj.visibility == 'Public' and 'geoip' in self.enrichments:
             for r in self.geoip_records:
                 if cidr_obj.asn_network == r.network:
                     cidr_obj.geoip_continent = r.continent_name
                     cidr_obj.geoip_country = r.country_name
-        else:
+        elif cidr_obj.visibility == 'Private':
             cidr_obj.geoip_continent = 'N/A'
             cidr_obj.geoip_country = 'N/A'
 
         return cidr_obj
 
-    def _populate_fqdn(self, fqdn: str) -> models.FQDN:
+    def _populate_fqdn(self, fqdn: str, previous: models.FQDN | None = None) -> models.FQDN:
+        import dns.resolver
+
         verbose.debug(f'Analyze {fqdn}.')
 
         ######################################################################################
@@ -244,80 +490,99 @@ class Analyzer(pydantic.BaseModel):
         #    - else check for A records for the hostname.                                    #
         ######################################################################################
         f = models.FQDN(fqdn=fqdn, dns_chain=[fqdn], destination_ips=[])
+        previous_ips = {ip.ipv4: ip for ip in previous.destination_ips} if previous is not None else {}
+
+        if self._fresh(previous, 'dns'):
+            f.dns_chain = list(previous.dns_chain)
+            f.hosts_found = previous.hosts_found
+            f.destination_ips = [self._populate_ipv4(ip, previous_ips.get(ip)) for ip in previous_ips]
+            f.dns_checked_at = previous.dns_checked_at
+            f.cdn = self._fqdn_cdn(f)
+            return f
+
+        with self._until_deadline(f, 'dns'):
+            #############################
+            # Discover the CNAME Chain. #
+            #############################
+            while True:
+                cname_record = ''
+                try:
+                    answer = self._resolve(f.dns_chain[-1], 'CNAME')
 
-        #############################
-        # Discover the CNAME Chain. #
-        #############################
-        while True:
-            cname_record = ''
-            try:
-                answer = dns.resolver.resolve_at(random.choice(DNS_SERVERS), f.dns_chain[-1], 'CNAME')
-                time.sleep(1)
+                    for rdap in answer:
+                        cname_record = str(rdap.target).rstrip('.')  # Remove the trailing dot.
 
-                for rdap in answer:
-                    cname_record = str(rdap.target).rstrip('.')  # Remove the trailing dot.
+                except dns.resolver.NXDOMAIN:
+                    # NXDOMAIN stands for Non-Existent Domain.
+                    break
 
-            except dns.resolver.NXDOMAIN:
-                # NXDOMAIN stands for Non-Existent Domain.
-                break
+                except dns.resolver.NoAnswer:
+                    # The domain does exist, but the specific DNS record type you're asking for is missing.
+                    break
+
+                except dns.resolver.LifetimeTimeout:
+                    # The resolution lifetime expired.
+                    verbose.debug('dns.resolver.LifetimeTimeout')
+                    self.stats.retry('dns')
+                    continue
 
-            except dns.resolver.NoAnswer:
-                # The domain does exist, but the specific DNS record type you're asking for is missing.
-                break
+                except dns.resolver.NoNameservers:
+                    # If no non-broken nameservers are available to answer the question.
+                    verbose.debug('dns.resolver.NoNameservers')
+                    self.stats.retry('dns')
+                    continue
 
-            except dns.resolver.LifetimeTimeout:
-                # The resolution lifetime expired.
-                verbose.debug('dns.resolver.LifetimeTimeout')
-                continue
+                f.dns_chain.append(cname_record)
 
-            except dns.resolver.NoNameservers:
-                # If no non-broken nameservers are available to answer the question.
-                verbose.debug('dns.resolver.NoNameservers')
-                continue
+            ############################################################
+            # For the last link in the DNS chain, check its A records. #
+            ############################################################
+            while True:
+                try:
+                    answer = self._resolve(f.dns_chain[-1], 'A')
 
-            f.dns_chain.append(cname_record)
+                    resolved_ips = []
+                    for rdap in answer:
+                        resolved_ips.append(str(rdap.address))
 
-        ############################################################
-        # For the last link in the DNS chain, check its A records. #
-        ############################################################
-        while True:
-            try:
-                answer = dns.resolver.resolve_at(random.choice(DNS_SERVERS), f.dns_chain[-1], 'A')
-                time.sleep(1)
+                    f.hosts_found = True
 
-                resolved_ips = []
-                for rdap in answer:
-                    resolved_ips.append(str(rdap.address))
+                    for ip in resolved_ips:
+                        ip_obj = self._populate_ipv4(ip, previous_ips.get(ip))
+                        f.destination_ips.append(ip_obj)
 
-                f.hosts_found = True
+                    break
 
-                for ip in resolved_ips:
-                    ip_obj = self._populate_ipv4(ip)
-                    f.destination_ips.append(ip_obj)
+                except dns.resolver.NXDOMAIN:
+                    # NXDOMAIN stands for Non-Existent Domain.
+                    break
 
-                break
+                except dns.resolver.NoAnswer:
+                    # The domain does exist, but the specific DNS record type you're asking for is missing.
+                    break
 
-            except dns.resolver.NXDOMAIN:
-                # NXDOMAIN stands for Non-Existent Domain.
-                break
+                except dns.resolver.LifetimeTimeout:
+                    # The resolution lifetime expired.
+                    verbose.debug('dns.resolver.LifetimeTimeout')
+                    self.stats.retry('dns')
+                    continue
 
-            except dns.resolver.NoAnswer:
-                # The domain does exist, but the specific DNS record type you're asking for is missing.
-                break
+                except dns.resolver.NoNameservers:
+                    # If no non-broken nameservers are available to answer the question.
+                    verbose.debug('dns.resolver.NoNameservers')
+                    self.stats.retry('dns')
+                    continue
 
-            except dns.resolver.LifetimeTimeout:
-                # The resolution lifetime expired.
-                verbose.debug('dns.resolver.LifetimeTimeout')
-                continue
+            f.dns_checked_at = time.time()
 
-            except dns.resolver.NoNameservers:
-                # If no non-broken nameservers are available to answer the question.
-                verbose.debug('dns.resolver.NoNameservers')
-                continue
+        #######
+        # CDN #
+        #######
+        f.cdn = self._fqdn_cdn(f)
 
         return f
 
-    def _populate_url(self, url: str) -> models.URL:
+    def _populate_url(self, url: str, previous: models.URL | None = None) -> models.URL:
         verbose.debug(f'Analyze {url}.')
 
         parsed_url = urllib.parse.urlparse(url)
@@ -332,19 +597,331 @@ class Analyzer(pydantic.BaseModel):
             path=parsed_url.path,
         )
 
-        u.fqdn = self._populate_fqdn(parsed_url.hostname)
+        u.fqdn = self._populate_fqdn(parsed_url.hostname, previous.fqdn if previous is not None else None)
+        u.cdn = u.fqdn.cdn
 
         ########
         # CURL #
         ########
-        try:
-            requests.get(u.url, verify=False, timeout=2)
-            u.reachable = True
-        except requests.exceptions.RequestException:
-            u.reachable = False
+        if self._fresh(previous, 'http'):
+            for field in HTTP_FIELDS:
+                setattr(u, field, getattr(previous, field))
+            u.http_checked_at = previous.http_checked_at
+        elif 'http' in self.enrichments:
+            with self._until_deadline(u, 'http'):
+                for field, value in self._probe(u.url).items():
+                    setattr(u, field, value)
+                u.http_checked_at = time.time()
 
         return u
 
+    ##########
+    # Stages #
+    ##########
+
+    def _resolve(self, name: str, rdtype: str) -> 'dns.resolver.Answer':
+        """Queries a random DNS server for the `rdtype` records of `name`."""
+        import dns.resolver
+
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = [random.choice(self.dns_servers)]
+        resolver.port = self.dns_port
+        resolver.lifetime = self._budget(DNS_LIFETIME)
+
+        def query() -> dict:
+            try:
+                answer = resolver.resolve(name, rdtype)
+            except (
+                dns.resolver.NXDOMAIN,
+                dns.resolver.NoAnswer,
+                dns.resolver.LifetimeTimeout,
+                dns.resolver.NoNameservers,
+            ) as e:
+                return {'error': type(e).__name__}
+            if self.recorder is None:
+                return {'answer': answer}  # Only a recorded answer needs to be encoded.
+            return {'message': base64.b64encode(answer.response.to_wire()).decode()}
+
+        with self._slot('dns'), self.stats.track('dns', name) as span:
+            span.args = {'rdtype': rdtype, 'server': resolver.nameservers[0]}
+            response = self._exchange('dns', f'{name} {rdtype}', query)
+            error = response.get('error')
+            if error is not None:
+                if error in ('NXDOMAIN', 'NoAnswer'):
+                    span.outcome = 'negative'
+                elif error == 'LifetimeTimeout':
+                    span.outcome = 'timeout'
+                raise getattr(dns.resolver, error)()
+
+            answer = response.get('answer')
+            if answer is None:
+                import dns.message
+                import dns.name
+                import dns.rdataclass
+                import dns.rdatatype
+
+                answer = dns.resolver.Answer(
+                    dns.name.from_text(name),
+                    dns.rdatatype.from_text(rdtype),
+                    dns.rdataclass.IN,
+                    dns.message.from_wire(base64.b64decode(response['message'])),
+                )
+
+        with self.stats.track('dns-delay', name):
+            # Spread the queries, otherwise we trigger a DOS response.
+            time.sleep(max(min(self.dns_delay, self._remaining()), 0))
+
+        return answer
+
+    def _rdap_of(self, target: str, address: str) -> dict:
+        """Retrieves the RDAP data of a target, or of the CIDR that covers it (see `covering`) once per CIDR."""
+        network = self.covering.get(target)
+        if network is None:
+            return self._lookup_rdap_in_range(address)
+
+        with self._network_lock:
+            lookup = self._network_lookups.get(network)
+            first = lookup is None
+            if first:
+                lookup = self._network_lookups[network] = threading.Event()
+
+        if first:
+            try:
+                self._network_rdap[network] = self._lookup_rdap_in_range(network.split('/')[0])
+            finally:
+                lookup.set()
+        else:
+            remaining = self._remaining()
+            lookup.wait(None if math.isinf(remaining) else max(remaining, 0))
+            if network in self._network_rdap:
+                self.stats.cache_hit('rdap')
+            elif self._remaining() <= 0:
+                raise DeadlineExceeded()
+            else:
+                # The lookup of the CIDR was abandoned at its own deadline.
+                return self._lookup_rdap_in_range(address)
+
+        return self._network_rdap[network]
+
+    def _lookup_rdap_in_range(self, ip: str) -> dict:
+        """Retrieves the RDAP data of an IP address from the network range of an earlier reply (see `rdap_ranges`).
+
+        The IPs that share a prefix (`RDAP_GROUP_PREFIX`) are looked up one at a time: the first one is queried, and
+        the ones that wait for it need no query of their own when the stored range of its reply (its network range
+        within its `asn_cidr`) contains them.
+        """
+        if self.rdap_ranges is None:
+            return self._lookup_rdap(ip)
+
+        group = int(ipaddress.IPv4Address(ip)) >> (32 - RDAP_GROUP_PREFIX)
+        while True:
+            with self._range_lock:
+                reply = self.rdap_ranges.get(ip)
+                lookup = self._range_lookups.get(group)
+                first = reply is None and lookup is None
+                if first:
+                    lookup = self._range_lookups[group] = threading.Event()
+
+            if reply is not None:
+                self.stats.cache_hit('rdap')
+                return reply
+
+            if first:
+                try:
+                    reply = self._lookup_rdap(ip)
+                    self.rdap_ranges.add(reply)
+                    return reply
+                finally:
+                    with self._range_lock:
+                        del self._range_lookups[group]
+                    lookup.set()
+
+            remaining = self._remaining()
+            if not lookup.wait(None if math.isinf(remaining) else max(remaining, 0)):
+                raise DeadlineExceeded()
+            # Queried next (or waits for the next IP of the group) unless the range of the reply contains the IP.
+
+    def _lookup_rdap(self, ip: str) -> dict:
+        """Retrieves the RDAP data of an IP address and retries until it succeeds or its deadline expires."""
+        import ipwhois
+
+        def query(timeout: float) -> dict:
+            try:
+                if self.rdap_url != '':
+                    return {'reply': self._query_rdap_server(ip, timeout)}
+                return {'reply': ipwhois.IPWhois(ip, timeout=timeout).lookup_rdap(depth=1) or {}}
+            except ipwhois.exceptions.HTTPRateLimitError as e:
+                return {'error': str(e), 'outcome': 'throttled'}
+            except Exception as e:
+                return {'error': str(e), 'outcome': 'error'}
+
+        while True:
+            timeout = self._budget(RDAP_TIMEOUT)
+            with self._slot('rdap'), self.stats.track('rdap', ip) as span:
+                response = self._exchange('rdap', ip, lambda: query(timeout))
+                if 'error' not in response:
+                    return response['reply']
+                verbose.debug(f'The RDAP lookup of {ip} failed: {response["error"]}')
+                span.outcome = response['outcome']
+
+            self.stats.retry('rdap')
+            with self.stats.track('rdap-backoff', ip):
+                time.sleep(max(min(self.rdap_retry_delay, self._remaining()), 0))
+
+    def _query_rdap_server(self, ip: str, timeout: float = RDAP_TIMEOUT) -> dict:
+        """Queries the RDAP server at `rdap_url` directly and maps its reply to the `ipwhois` format."""
+        import ipwhois
+
+        response = _requests().get(f'{self.rdap_url.rstrip("/")}/ip/{ip}', timeout=timeout)
+        if response.status_code == 429:
+            raise ipwhois.exceptions.HTTPRateLimitError(f'{self.rdap_url} throttles the queries')
+        response.raise_for_status()
+        data = response.json()
+
+        registrant = ''
+        for entity in data.get('entities', []):
+            for item in entity.get('vcardArray', [None, []])[1]:
+                if item[0] == 'fn':
+                    registrant = registrant or item[3]
+
+        return {
+            'asn_country_code': data.get('country'),
+            'asn_description': registrant,
+            'network': {
+                'name': data.get('name', ''),
+                'start_address': data.get('startAddress'),
+                'end_address': data.get('endAddress'),
+            },
+        }
+
+    def _lookup_geoip(self, ip: ipaddress.IPv4Address) -> models.GeoIPRecord | None:
+        """Finds the GeoIP record of the network that contains the IP address."""
+        if self.geoip_index is None:
+            self.geoip_index = geoip.GeoIPIndex(self.geoip_records)
+
+        with self.stats.track('geoip', str(ip)) as span:
+            found = self.geoip_index.lookup(ip)
+            span.outcome = 'ok' if found is not None else 'miss'
+
+        return found
+
+    def _ping(self, ip: str) -> bool:
+        """Sends a single ICMP echo request to the IP address."""
+        param = '-n' if os.sys.platform.lower() == 'win32' else '-c'
+        command = ['ping', param, '1', '-i', '0.2', ip]
+
+        def send(timeout: float) -> dict:
+            try:
+                code = subprocess.call(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                if self._remaining() <= 0:
+                    raise DeadlineExceeded()
+                return {'pingable': False}
+            except OSError:
+                return {'pingable': False}
+            return {'pingable': code == 0}
+
+        timeout = self._budget(PING_TIMEOUT)
+        with self._slot('ping'), self.stats.track('ping', ip) as span:
+            try:
+                pingable = self._exchange('ping', ip, lambda: send(timeout))['pingable']
+            except DeadlineExceeded:
+                span.outcome = 'deadline'
+                raise
+            span.outcome = 'ok' if pingable else 'no-reply'
+
+        return pingable
+
+    def _probe(self, url: str) -> dict:
+        """Requests the URL, following its redirects, and captures the reply and the TLS certificate of its server.
+
+        Everything is read from the connections of the request itself: the certificate from the TLS handshake of the
+        first HTTPS hop, and the redirects reuse the connections of the thread's session (see `_session()`). The body
+        of the final reply is not downloaded.
+
+        Returns:
+            dict: The `HTTP_FIELDS` of `models.URL`, i.e. `reachable` and, if the URL answers, the final `status_code`
+                and `server`, the `redirects` (the URLs after the requested one) and the `tls_*` certificate fields.
+        """
+        requests = _requests()
+        captured = {}
+
+        def capture(response: 'requests.Response', **kwargs) -> None:
+            if 'tls_subject' not in captured:
+                der = _peer_certificate(response)
+                if der:
+                    try:
+                        certificate = x509.parse(der)
+                    except ValueError as e:
+                        verbose.debug(f'Ignore the certificate of {response.url}: {e}')
+                    else:
+                        captured['tls_subject'] = certificate.subject
+                        captured['tls_sans'] = certificate.sans
+                        captured['tls_expires_at'] = certificate.expires_at
+            if response.is_redirect and self._remaining() <= 0:
+                response.close()
+                raise DeadlineExceeded()
+
+        def request(timeout: float) -> dict:
+            try:
+                response = self._session().get(
+                    url, verify=False, timeout=timeout, stream=True, hooks={'response': capture}
+                )
+            except requests.exceptions.TooManyRedirects as e:
+                response = e.response
+            except requests.exceptions.Timeout:
+                if self._remaining() <= 0:
+                    raise DeadlineExceeded()
+                return {'outcome': 'timeout', 'fields': {'reachable': False}}
+            except requests.exceptions.RequestException:
+                return {'outcome': 'unreachable', 'fields': {'reachable': False}}
+
+            response.close()
+            fields = {
+                'reachable': True,
+                'status_code': response.status_code,
+                'server': response.headers.get('Server', ''),
+                'redirects': [r.url for r in response.history[1:]] + [response.url] if response.history else [],
+                **captured,
+            }
+            return {'outcome': 'throttled' if response.status_code == 429 else 'ok', 'fields': fields}
+
+        timeout = self._budget(HTTP_TIMEOUT)
+        with self._slot('http'), self.stats.track('http', url) as span:
+            try:
+                response = self._exchange('http', url, lambda: request(timeout))
+            except DeadlineExceeded:
+                span.outcome = 'deadline'
+                raise
+            span.outcome = response['outcome']
+
+        return response['fields']
+
+    def _session(self) -> 'requests.Session':
+        """The HTTP session of the current thread, whose connections are reused by the redirects and later probes."""
+        session = getattr(self._http_sessions, 'session', None)
+        if session is None:
+            session = self._http_sessions.session = _requests().Session()
+            session.max_redirects = MAX_REDIRECTS
+        return session
+
+
+def _requests() -> 'requests':
+    """Imports `requests` on first use and silences its warnings about the unverified HTTPS requests."""
+    import requests
+    import urllib3
+
+    warnings.simplefilter('ignore', urllib3.exceptions.InsecureRequestWarning)
+
+    return requests
+
+
+def _peer_certificate(response: 'requests.Response') -> bytes | None:
+    """Returns the (DER) certificate of the TLS connection of a streamed reply, before the connection is released."""
+    sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+    getpeercert = getattr(sock, 'getpeercert', None)
+    return getpeercert(binary_form=True) if getpeercert is not None else None
+
 
 DNS_SERVERS = [
     # Google
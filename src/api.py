@@ -0,0 +1,181 @@
+import pydantic
+
+import asyncio
+import concurrent.futures
+import os.path
+import typing
+
+import analysis
+import geoip
+import incremental
+import ranges
+import targets
+
+
+# The kinds of targets that are analyzed, by the name of their list in `targets.Targeter`.
+KINDS = {'ipv4s': 'ipv4', 'cidrs_v4': 'cidr', 'fqdns': 'fqdn', 'urls': 'url'}
+GEOIP_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geoip2-ipv4.csv')
+
+
+class Scanner:
+    """Analyzes targets from Python, for services that would otherwise run the CLI for every batch.
+
+    A scanner is meant to be long-lived: the GeoIP index (if the 'geoip' enrichment is enabled), the worker threads and
+    a cache of the recent results are kept across the calls of `analyze()`. A cached result is reused per stage for as
+    long as the stage is fresh (see `incremental.parse_freshness()`), exactly as with the `-previous` option of the CLI.
+
+    Nothing is printed, since the `verbose` console is never set up.
+
+    Example:
+        async with api.Scanner(concurrency=20, enrichments={'rdap', 'geoip'}) as scanner:
+            async for result in scanner.analyze(['1.1.1.1', 'example.com']):
+                print(result.model_dump_json())
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 10,
+        enrichments: typing.Iterable[str] = analysis.ENRICHMENTS,
+        freshness: str = incremental.DEFAULT_FRESHNESS,
+        geoip_filepath: str = GEOIP_FILEPATH,
+        cache_size: int = 100_000,
+        adaptive: bool = False,
+        target_timeout: float = analysis.DEFAULT_TARGET_TIMEOUT,
+    ):
+        """
+        Creates a scanner and loads its GeoIP index, unless the 'geoip' enrichment is disabled.
+
+        Args:
+            concurrency (int): The max number of targets that are analyzed at the same time.
+            enrichments (Iterable[str]): The optional steps to run, out of `analysis.ENRICHMENTS`.
+            freshness (str): How long the cached results stay fresh per stage, e.g. 'rdap=7d,dns=1h'.
+            geoip_filepath (str): The GeoIP database (CSV). Defaults to the one that ships with scopez.
+            cache_size (int): The max number of cached results. The oldest ones are evicted first.
+            adaptive (bool): Adapt the concurrency of every network stage (DNS, RDAP, ping and HTTP) to its latency and
+                errors, starting from `concurrency`, instead of analyzing at most `concurrency` targets at the same time.
+            target_timeout (float): The seconds after which the remaining stages of a target are abandoned and listed
+                in its `timed_out` field (0: never). Such results are not cached.
+
+        Raises:
+            ValueError: If an enrichment is unknown or the freshness cannot be parsed.
+        """
+        unknown = set(enrichments) - set(analysis.ENRICHMENTS)
+        if unknown:
+            raise ValueError(f'unknown enrichments {sorted(unknown)}, use any of {", ".join(analysis.ENRICHMENTS)}')
+
+        self.cache_size = cache_size
+        windows = incremental.parse_freshness(freshness)
+        self.analyzer = analysis.Analyzer(
+            enrichments=set(enrichments),
+            freshness=windows,
+            target_timeout=target_timeout,
+            # The network ranges of the RDAP replies are reused across batches while the replies are fresh.
+            rdap_ranges=ranges.RangeCache(max_age=windows['rdap']) if windows.get('rdap', 0) > 0 else None,
+        )
+        self.concurrency = self.analyzer.adapt_concurrency(concurrency) if adaptive else concurrency
+        if 'geoip' in self.analyzer.enrichments:
+            self.load_geoip(geoip_filepath)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='api')
+        self._targeter = targets.Targeter()
+
+    def load_geoip(self, filepath: str) -> None:
+        """(Re-)loads the GeoIP database. The index is swapped at once, so every lookup sees either the old or the new one."""
+        records = geoip.read_records(filepath)
+        self.analyzer.geoip_records = records
+        self.analyzer.geoip_index = geoip.GeoIPIndex(records)
+
+    async def analyze(
+        self, raw_targets: typing.Iterable[str] | typing.AsyncIterable[str]
+    ) -> typing.AsyncIterator[pydantic.BaseModel]:
+        """
+        Analyzes raw targets and yields their results as they complete.
+
+        The targets are consumed lazily and at most `concurrency` of them are in progress at the same time, so the
+        input can be a generator of any length. Duplicates are analyzed once, and targets that are invalid or of a kind
+        that is not analyzed (e.g. with a port) are skipped.
+
+        Args:
+            raw_targets (Iterable[str] | AsyncIterable[str]): The targets, e.g. '1.1.1.1', '10.0.0.0/24', 'example.com'
+                or 'https://example.com'.
+
+        Yields:
+            pydantic.BaseModel: A `models.IPV4`, `models.CIDR`, `models.FQDN` or `models.URL` per target.
+
+        """
+        loop = asyncio.get_running_loop()
+        pending: set[asyncio.Future] = set()
+        seen: set[str] = set()
+
+        try:
+            async for raw in _iterate(raw_targets):
+                target = raw.strip()
+                kind = KINDS.get(self._targeter._classify(target))
+                if kind is None or target in seen:
+                    continue
+                seen.add(target)
+
+                if len(pending) >= self.concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        yield self._cache(future.result())
+
+                pending.add(loop.run_in_executor(self._executor, self.analyzer.analyze_target, kind, target))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield self._cache(future.result())
+        finally:
+            # The consumer stopped early (or an analysis failed): the targets that have not started are dropped.
+            for future in pending:
+                future.cancel()
+
+    def close(self) -> None:
+        """Waits for the running analyses and stops the worker threads."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def __aenter__(self) -> 'Scanner':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def _cache(self, result: pydantic.BaseModel) -> pydantic.BaseModel:
+        """Keeps a successful result for the next calls, and evicts the oldest ones beyond `cache_size`."""
+        cache = self.analyzer.previous_results
+        if not incremental.failed(result):
+            key = getattr(result, result.type)
+            cache.pop(key, None)
+            cache[key] = result
+            while len(cache) > self.cache_size:
+                del cache[next(iter(cache))]
+
+        return result
+
+
+async def analyze(
+    raw_targets: typing.Iterable[str] | typing.AsyncIterable[str], **options
+) -> typing.AsyncIterator[pydantic.BaseModel]:
+    """
+    Analyzes raw targets with a one-off `Scanner`, and yields their results as they complete.
+
+    Args:
+        raw_targets (Iterable[str] | AsyncIterable[str]): The targets.
+        **options: The options of `Scanner`, e.g. `concurrency` or `enrichments`.
+
+    Yields:
+        pydantic.BaseModel: A `models.IPV4`, `models.CIDR`, `models.FQDN` or `models.URL` per target.
+
+    """
+    async with Scanner(**options) as scanner:
+        async for result in scanner.analyze(raw_targets):
+            yield result
+
+
+async def _iterate(items: typing.Iterable[str] | typing.AsyncIterable[str]) -> typing.AsyncIterator[str]:
+    if isinstance(items, typing.AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
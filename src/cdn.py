@@ -0,0 +1,79 @@
+import ipaddress
+import json
+import os.path
+
+
+# The published IPv4 ranges and CNAME suffixes of the CDN (and edge hosting) providers.
+PROVIDERS_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cdn-providers.json')
+
+
+class CDNIndex:
+    """Classifies IP addresses and DNS names by the CDN provider that serves them.
+
+    The IP ranges are compiled into a prefix index: a hash table of the network addresses per prefix length, which is
+    searched from the longest prefix length to the shortest, so a lookup costs at most one probe per distinct length.
+    The CNAME suffixes are compiled into a trie of their reversed labels (e.g. net -> cloudflare -> cdn), so a name is
+    classified with one step per label. In both cases the most specific match wins.
+    """
+
+    def __init__(self, providers: dict[str, dict]):
+        """
+        Compiles the providers into the indexes.
+
+        Args:
+            providers (dict[str, dict]): The `ipv4` ranges (CIDRs) and `cnames` suffixes of every provider, by name.
+
+        Raises:
+            ValueError: If a range is not a valid IPv4 network.
+
+        """
+        self._prefixes: dict[int, dict[int, str]] = {}
+        self._suffixes: dict = {}
+
+        for name, provider in providers.items():
+            for cidr in provider.get('ipv4', []):
+                network = ipaddress.IPv4Network(cidr)
+                self._prefixes.setdefault(network.prefixlen, {})[int(network.network_address)] = name
+            for suffix in provider.get('cnames', []):
+                node = self._suffixes
+                for label in reversed(suffix.lower().strip('.').split('.')):
+                    node = node.setdefault(label, {})
+                node[''] = name  # The empty label cannot occur in a name, so it marks the end of a suffix.
+
+        self._lengths = sorted(self._prefixes, reverse=True)
+        self._masks = {length: (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF for length in self._lengths}
+
+    def classify_ip(self, ip: str | ipaddress.IPv4Address) -> str:
+        """Returns the provider whose ranges contain the IP address, or '' if there is none."""
+        address = int(ipaddress.IPv4Address(ip))
+        for length in self._lengths:
+            name = self._prefixes[length].get(address & self._masks[length])
+            if name is not None:
+                return name
+        return ''
+
+    def classify_name(self, name: str) -> str:
+        """Returns the provider of the longest CNAME suffix that the name ends with, or '' if there is none."""
+        found = ''
+        node = self._suffixes
+        for label in reversed(name.lower().rstrip('.').split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get('', found)
+        return found
+
+
+def load(filepath: str = PROVIDERS_FILEPATH) -> CDNIndex:
+    """
+    Loads the CDN providers from a JSON file, such as the one that ships with scopez.
+
+    Args:
+        filepath (str): The path to the file, with a `providers` object of provider name -> `ipv4`/`cnames` lists.
+
+    Returns:
+        CDNIndex: The compiled index.
+
+    """
+    with open(filepath) as f:
+        return CDNIndex(json.load(f)['providers'])
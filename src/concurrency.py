@@ -0,0 +1,158 @@
+import contextlib
+import threading
+import time
+import typing
+
+import metrics
+
+
+# The stages whose concurrency is adapted: the ones that wait on the network.
+STAGES = ('dns', 'rdap', 'ping', 'http')
+# The range of the concurrency limit of a stage. The worker pools are sized for the upper bound.
+MIN_LIMIT = 1
+MAX_LIMIT = 256
+# The outcomes of a stage call that signal an overloaded or throttling upstream.
+CONGESTION_OUTCOMES = frozenset({'timeout', 'throttled', 'error'})
+# The outcomes that depend on the target rather than the upstream (e.g. a host that drops pings, or a call cut short
+# by the deadline of its target), which say nothing about the load.
+IGNORED_OUTCOMES = frozenset({'no-reply', 'unreachable', 'deadline'})
+
+# The weight of a new sample in the smoothed latency and congestion rate.
+SMOOTHING = 0.1
+# The baseline latency is the lowest one of the last 1-2 windows (seconds), so that it follows a slower upstream.
+BASELINE_WINDOW = 10.0
+
+
+class AdaptiveLimit:
+    """The concurrency limit of a single stage, adjusted to the latency and the congestion signals of its calls.
+
+    The limit grows by one per call while no call has signalled congestion yet (slow start), and by one per round of
+    `limit` calls afterwards (additive increase), but only while the stage uses at least half of its limit: a stage
+    that is starved by the others gains nothing from a higher limit.
+
+    It is multiplied by `latency_backoff` when the smoothed latency exceeds `tolerance` times the baseline (the queues
+    upstream fill up), and by `error_backoff` when the smoothed rate of congestion outcomes exceeds `error_tolerance`
+    (timeouts or throttling). It decreases at most once per smoothed latency, since the calls that complete right after
+    a decrease were all sent at the old limit.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = MIN_LIMIT,
+        max_limit: int = MAX_LIMIT,
+        tolerance: float = 2.0,
+        error_tolerance: float = 0.1,
+        latency_backoff: float = 0.9,
+        error_backoff: float = 0.5,
+    ):
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.error_tolerance = error_tolerance
+        self.latency_backoff = latency_backoff
+        self.error_backoff = error_backoff
+
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._slow_start = True
+        self._baselines: list[float] = []  # The lowest latency of the previous and the current window.
+        self._window_start = time.monotonic()
+        self._latency: float | None = None
+        self._congestion = 0.0
+        self._last_decrease = 0.0
+
+    @contextlib.contextmanager
+    def slot(self) -> typing.Iterator[None]:
+        """Waits until a call fits in the limit, and holds its place while it runs."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def observe(self, latency: float, congested: bool) -> None:
+        """
+        Adjusts the limit to a completed call.
+
+        Args:
+            latency (float): The duration of the call in seconds.
+            congested (bool): Whether the call timed out, was throttled or failed.
+
+        """
+        with self._condition:
+            self._congestion += SMOOTHING * (congested - self._congestion)
+            if not congested:
+                self._latency = (
+                    latency if self._latency is None else self._latency + SMOOTHING * (latency - self._latency)
+                )
+                self._observe_baseline(latency)
+
+            if self._congestion > self.error_tolerance:
+                self._decrease(self.error_backoff)
+            elif self._latency is not None and self._latency > self.tolerance * min(self._baselines):
+                self._decrease(self.latency_backoff)
+            elif not congested and self.in_flight >= self.limit / 2:
+                self.limit = min(self.limit + (1 if self._slow_start else 1 / self.limit), self.max_limit)
+                self._condition.notify()
+
+    def _observe_baseline(self, latency: float) -> None:
+        now = time.monotonic()
+        if not self._baselines or now - self._window_start >= BASELINE_WINDOW:
+            self._baselines = self._baselines[-1:] + [latency]
+            self._window_start = now
+        else:
+            self._baselines[-1] = min(self._baselines[-1], latency)
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self._latency or 0.0):
+            return
+
+        self.limit = max(self.limit * factor, self.min_limit)
+        self._slow_start = False
+        self._last_decrease = now
+
+
+class Controller:
+    """The adaptive concurrency limits of the network stages of an analysis.
+
+    The controller is a `metrics.Metrics` observer: every tracked call of a stage adjusts the limit of the stage, and
+    the limits are published as the `limit` gauge of the stage metrics.
+    """
+
+    def __init__(self, stats: metrics.Metrics, initial: int, stages: typing.Iterable[str] = STAGES):
+        """
+        Creates the limits and starts observing the stage calls.
+
+        Args:
+            stats (metrics.Metrics): The metrics of the analysis, whose stage calls are observed.
+            initial (int): The initial limit of every stage.
+            stages (Iterable[str]): The stages to limit. The calls of the other stages are not limited.
+
+        """
+        self.stats = stats
+        self.limits = {stage: AdaptiveLimit(initial) for stage in stages}
+        for stage, limit in self.limits.items():
+            stats.set_limit(stage, int(limit.limit))
+        stats.observers.append(self.observe)
+
+    def slot(self, stage: str) -> typing.ContextManager:
+        """Holds a place within the limit of `stage` while a call runs."""
+        limit = self.limits.get(stage)
+        return limit.slot() if limit is not None else contextlib.nullcontext()
+
+    def observe(self, span: metrics.Span, elapsed: float) -> None:
+        limit = self.limits.get(span.stage)
+        if limit is None or span.outcome in IGNORED_OUTCOMES:
+            return
+
+        limit.observe(elapsed, span.outcome in CONGESTION_OUTCOMES)
+        self.stats.set_limit(span.stage, int(limit.limit))
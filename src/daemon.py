@@ -0,0 +1,218 @@
+import pydantic
+import pydantic_core
+
+import asyncio
+import getpass
+import os
+import socket
+import stat
+import tempfile
+import threading
+import typing
+
+import results
+import verbose
+
+
+if typing.TYPE_CHECKING:
+    import api
+
+
+# The socket lives in a directory that only the user can write to: the runtime directory of the user, or a private
+# (0700) directory in the shared temp directory.
+SOCKET_PATH = os.environ.get('SCOPEZ_SOCKET') or os.path.join(
+    os.environ.get('XDG_RUNTIME_DIR') or os.path.join(tempfile.gettempdir(), f'scopez-{getpass.getuser()}'),
+    'scopez.sock',
+)
+CONNECT_TIMEOUT = 0.2
+
+
+class DaemonError(Exception):
+    """The daemon could not be reached or could not analyze a batch."""
+
+
+#
+# Server
+#
+
+
+class Daemon:
+    """Analyzes batches of targets for clients that connect to a Unix socket, with a warm `api.Scanner`.
+
+    The protocol is line based: a client sends its targets one per line and shuts down its side of the connection, and
+    the daemon streams back a JSON line per result (as with `-json`) as soon as it completes, and closes the connection.
+    A batch that fails gets a final `{"error": "..."}` line instead.
+
+    Up to `max_requests` batches are analyzed at the same time and the rest wait for their turn. The GeoIP database is
+    reloaded before a batch whenever the file changed since it was loaded (e.g. because a CLI run refreshed it).
+    """
+
+    def __init__(self, scanner: 'api.Scanner', geoip_filepath: str, max_requests: int = 4):
+        self.scanner = scanner
+        self.geoip_filepath = geoip_filepath
+        self.max_requests = max_requests
+        self._geoip_version = _file_version(geoip_filepath)
+        self._requests: asyncio.Semaphore | None = None
+        self._served = 0
+
+    async def serve(self, path: str) -> None:
+        """Listens on the Unix socket at `path` until the task is cancelled, and removes the socket afterwards."""
+        if is_running(path):
+            raise DaemonError(f"another daemon already listens on '{path}'")
+        if os.path.exists(path):
+            os.remove(path)  # Left behind by a daemon that was killed.
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not _is_private(directory):
+            raise DaemonError(f"'{directory}' can be written to by other users, so it cannot hold the socket")
+
+        self._requests = asyncio.Semaphore(self.max_requests)
+        # The socket is created without access for other users, rather than restricted once it is bound.
+        umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=path)
+        finally:
+            os.umask(umask)
+        verbose.info(f"Listen on '{path}'.")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async with self._requests:
+            self._served += 1
+            batch = self._served
+            self._reload_geoip()
+            verbose.debug(f'Analyze the batch #{batch}.')
+
+            count = 0
+            try:
+                async for result in self.scanner.analyze(_lines(reader)):
+                    writer.write(pydantic_core.to_json(result) + b'\n')
+                    await writer.drain()
+                    count += 1
+            except ConnectionError:
+                verbose.debug(f'The client of the batch #{batch} disconnected.')
+            except Exception as e:
+                verbose.error(f'The batch #{batch} failed: {e}')
+                writer.write(pydantic_core.to_json({'error': str(e)}) + b'\n')
+            else:
+                if count > 0:  # Empty batches are e.g. the connections of `is_running()`.
+                    verbose.info(f'Analyzed the batch #{batch}: {count} result(s).')
+            finally:
+                writer.close()
+
+    def _reload_geoip(self) -> None:
+        if 'geoip' not in self.scanner.analyzer.enrichments:
+            return
+        version = _file_version(self.geoip_filepath)
+        if version != self._geoip_version:
+            self.scanner.load_geoip(self.geoip_filepath)
+            self._geoip_version = version
+            verbose.info(f"Reloaded the geoip database from '{self.geoip_filepath}'.")
+
+
+async def _lines(reader: asyncio.StreamReader) -> typing.AsyncIterator[str]:
+    async for line in reader:
+        yield line.decode(errors='replace')
+
+
+def _file_version(filepath: str) -> tuple[int, int, int]:
+    """Changes whenever the file is rewritten or replaced (e.g. atomically by `geoip.refresh()`)."""
+    stat = os.stat(filepath)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+#
+# Client
+#
+
+
+def is_running(path: str = SOCKET_PATH) -> bool:
+    """Checks whether a daemon of this user accepts connections on the Unix socket at `path`."""
+    try:
+        _connect(path).close()
+    except PermissionError as e:
+        verbose.warning(f'Ignore the daemon socket: {e}')
+        return False
+    except OSError:
+        return False
+    return True
+
+
+def request(raw_targets: typing.Iterable[str], path: str = SOCKET_PATH) -> typing.Iterator[pydantic.BaseModel]:
+    """
+    Has the daemon analyze a batch of targets.
+
+    The targets are sent from a background thread while the results are read, so that a large batch cannot fill up
+    both directions of the socket.
+
+    Args:
+        raw_targets (Iterable[str]): The targets.
+        path (str): The Unix socket of the daemon.
+
+    Yields:
+        pydantic.BaseModel: The results, as they complete.
+
+    Raises:
+        DaemonError: If the daemon cannot be reached or the batch fails.
+
+    """
+    try:
+        sock = _connect(path)
+    except OSError as e:
+        raise DaemonError(f"no daemon listens on '{path}': {e}") from e
+    sock.settimeout(None)
+
+    def send() -> None:
+        try:
+            with sock.makefile('wb') as out:
+                for t in raw_targets:
+                    out.write(t.encode() + b'\n')
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass  # The daemon closed the connection, which the reader reports.
+
+    sender = threading.Thread(target=send, name='daemon-client', daemon=True)
+    sender.start()
+
+    with sock, sock.makefile('rb') as lines:
+        for line in lines:
+            if line.startswith(b'{"error"'):
+                raise DaemonError(f'the daemon failed to analyze the batch: {pydantic_core.from_json(line)["error"]}')
+            yield results.parse(line)
+
+    sender.join()
+
+
+def _connect(path: str) -> socket.socket:
+    """Connects to the socket at `path`, if it is one of this user in a directory that other users cannot tamper with
+    (so that no other user can pose as the daemon and forge results)."""
+    info = os.lstat(path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"'{path}' is not a socket of this user")
+    if not _is_private(os.path.dirname(os.path.abspath(path))):
+        raise PermissionError(f"'{path}' is in a directory that other users can write to")
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _is_private(directory: str) -> bool:
+    """Checks that no other user can replace the files of a directory: it belongs to this user (or root), and is only
+    writable by its owner, unless it has the sticky bit (e.g. /tmp)."""
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid not in (os.getuid(), 0):
+        return False
+    return not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH) or bool(info.st_mode & stat.S_ISVTX)
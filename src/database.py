@@ -0,0 +1,197 @@
+import pydantic
+import pydantic_core
+
+import sqlite3
+import threading
+import types
+import typing
+
+import models
+
+
+_OPEN_DATABASES: list['ResultDatabase'] = []
+
+# The table of every result model. A nested model of one of them (e.g. the FQDN of a URL) is a row of its table, which
+# the parent references by id. A list of models (e.g. the destination IPs of a FQDN) gets a table of its own, named
+# after the field, whose rows reference their parent.
+TABLES = {
+    models.IPV4: 'ipv4s',
+    models.CIDR: 'cidrs',
+    models.FQDN: 'fqdns',
+    models.URL: 'urls',
+}
+
+# Columns that are indexed besides the target (e.g. `ipv4`) and the parent reference of every table.
+INDEXED_FIELDS = ('asn_description',)
+
+_SQL_TYPES = {str: 'TEXT', int: 'INTEGER', bool: 'INTEGER', float: 'REAL'}
+
+
+class _Table:
+    """The schema of a table, derived from the fields of `model_cls`."""
+
+    def __init__(self, name: str, model_cls: type[pydantic.BaseModel], parent: str | None = None):
+        self.name = name
+        self.model_cls = model_cls
+        self.parent = parent  # The column that references the parent row, e.g. 'fqdn_id'.
+        self.key = model_cls.model_fields['type'].default
+        self.columns: list[tuple[str, str, str]] = []  # (field, column, SQL type)
+        self.children: list[tuple[str, type[pydantic.BaseModel]]] = []  # (field, model)
+
+        for field, info in model_cls.model_fields.items():
+            if field == 'type':
+                continue
+
+            annotation = _unwrap_optional(info.annotation)
+            args = typing.get_args(annotation)
+            if annotation in TABLES:
+                self.columns.append((field, f'{field}_id', 'INTEGER'))
+            elif typing.get_origin(annotation) is list and args and _is_model(args[0]):
+                self.children.append((field, args[0]))
+            else:
+                self.columns.append((field, field, _SQL_TYPES.get(annotation, 'TEXT')))
+
+    def create_sql(self) -> str:
+        columns = [f'{column} {sql_type}' for column, sql_type in self.column_types().items()]
+        return f'CREATE TABLE IF NOT EXISTS {self.name} ({", ".join(columns)})'
+
+    def column_types(self) -> dict[str, str]:
+        columns = {'id': 'INTEGER PRIMARY KEY'}
+        if self.parent is not None:
+            columns[self.parent] = 'INTEGER'
+        columns.update((column, sql_type) for _, column, sql_type in self.columns)
+        return columns
+
+    def insert_sql(self) -> str:
+        columns = self.column_types()
+        return f'INSERT INTO {self.name} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+
+    def index_columns(self) -> list[str]:
+        columns = [c for f, c, _ in self.columns if f == self.key or f in INDEXED_FIELDS]
+        if self.parent is not None:
+            columns.insert(0, self.parent)
+        return columns
+
+
+class ResultDatabase:
+    """SQLite database of the analysis results, for queries and joins after the run.
+
+    Every result model has a table whose columns are the fields of the model (see `TABLES`), and the destination IPs
+    of the FQDNs (of the targets and of the URLs) are rows of the `destination_ips` table. The results are buffered and
+    inserted in batches of `batch_size` rows, each in a single transaction. The indexes are created when the database
+    is closed, after the bulk of the inserts.
+
+    An existing database is appended to, and gets the columns of the fields that it lacks.
+    """
+
+    def __init__(self, filepath: str, batch_size: int = 1000):
+        self.filepath = filepath
+        self.batch_size = batch_size
+        self._connection = sqlite3.connect(filepath, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._lock = threading.RLock()
+
+        self._tables = {model_cls: _Table(name, model_cls) for model_cls, name in TABLES.items()}
+        self._children = {
+            field: _Table(field, child_cls, parent=f'{table.key}_id')
+            for table in self._tables.values()
+            for field, child_cls in table.children
+        }
+
+        with self._connection:
+            for table in self._all_tables():
+                self._connection.execute(table.create_sql())
+                # A database of an older version lacks the columns of the fields that were added since.
+                existing = {row[1] for row in self._connection.execute(f'PRAGMA table_info({table.name})')}
+                for column, sql_type in table.column_types().items():
+                    if column not in existing:
+                        self._connection.execute(f'ALTER TABLE {table.name} ADD COLUMN {column} {sql_type}')
+
+        self._ids = {
+            t.name: self._connection.execute(f'SELECT COALESCE(MAX(id), 0) FROM {t.name}').fetchone()[0]
+            for t in self._all_tables()
+        }
+        self._pending: dict[str, list[tuple]] = {t.name: [] for t in self._all_tables()}
+        self._count = 0
+        _OPEN_DATABASES.append(self)
+
+    def record(self, result: pydantic.BaseModel) -> None:
+        """Adds a result (and its nested results) to the database."""
+        with self._lock:
+            if self._connection is None:
+                return
+            self._insert(self._tables[type(result)], result)
+            if self._count >= self.batch_size:
+                self._flush()
+
+    def close(self) -> None:
+        """Inserts the pending results, creates the indexes and closes the database."""
+        with self._lock:
+            if self._connection is None:
+                return
+            self._flush()
+            with self._connection:
+                for table in self._all_tables():
+                    for column in table.index_columns():
+                        self._connection.execute(
+                            f'CREATE INDEX IF NOT EXISTS {table.name}_{column} ON {table.name} ({column})'
+                        )
+            self._connection.close()
+            self._connection = None
+
+        if self in _OPEN_DATABASES:
+            _OPEN_DATABASES.remove(self)
+
+    def _insert(self, table: _Table, result: pydantic.BaseModel, parent_id: int | None = None) -> int:
+        """Buffers the row of `result` and of its nested results, and returns its id."""
+        self._ids[table.name] += 1
+        row_id = self._ids[table.name]
+
+        row = [row_id] if table.parent is None else [row_id, parent_id]
+        for field, column, sql_type in table.columns:
+            value = getattr(result, field)
+            if value is not None and column != field:
+                value = self._insert(self._tables[type(value)], value)
+            elif value is not None and sql_type == 'TEXT' and not isinstance(value, str):
+                value = pydantic_core.to_json(value).decode()  # e.g. the DNS chain, as a JSON array.
+            row.append(value)
+        self._pending[table.name].append(tuple(row))
+        self._count += 1
+
+        for field, _ in table.children:
+            for value in getattr(result, field) or []:
+                self._insert(self._children[field], value, row_id)
+
+        return row_id
+
+    def _flush(self) -> None:
+        pending = self._pending
+        self._pending = {name: [] for name in pending}
+        self._count = 0
+
+        with self._connection:
+            for table in self._all_tables():
+                if pending[table.name]:
+                    self._connection.executemany(table.insert_sql(), pending[table.name])
+
+    def _all_tables(self) -> list[_Table]:
+        return list(self._tables.values()) + list(self._children.values())
+
+
+def close_all() -> None:
+    """Closes every open database, e.g. right before the process is terminated."""
+    for db in list(_OPEN_DATABASES):
+        db.close()
+
+
+def _unwrap_optional(annotation: typing.Any) -> typing.Any:
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        non_none = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(non_none) == 1:
+            return non_none[0]
+    return annotation
+
+
+def _is_model(annotation: typing.Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, pydantic.BaseModel)
@@ -0,0 +1,233 @@
+import bisect
+import csv
+import hashlib
+import ipaddress
+import json
+import os
+import tempfile
+import urllib.parse
+import warnings
+
+import models
+
+
+GEOIP_URL = 'https://raw.githubusercontent.com/datasets/geoip2-ipv4/refs/heads/main/data/geoip2-ipv4.csv'
+CHUNK_SIZE = 1 << 20
+
+
+class RefreshError(Exception):
+    """The GeoIP database could not be refreshed from its source."""
+
+
+def refresh(filepath: str, source: str = GEOIP_URL, timeout: float = 3600) -> bool:
+    """
+    Makes sure that `filepath` holds the current GeoIP database of `source`.
+
+    The database is streamed to a temporary file next to `filepath` while it is hashed, and is then swapped in
+    atomically, so concurrent runs never read a half-written file. What was downloaded is remembered in a sidecar
+    `<filepath>.meta.json`, so an unchanged dataset costs a single conditional request (ETag/If-Modified-Since) for URLs
+    or a `stat` for local mirrors. A local copy whose SHA-256 digest no longer matches (e.g. a corrupt file) is always
+    downloaded again.
+
+    Args:
+        filepath (str): Where the GeoIP database is stored.
+        source (str): An HTTP(S) URL or a local mirror path (or `file://` URL) of the GeoIP database.
+        timeout (float): The timeout of the HTTP request in seconds.
+
+    Returns:
+        bool: `True` if the database was (re-)downloaded, `False` if it was already up to date.
+
+    Raises:
+        RefreshError: If the source cannot be reached or read.
+
+    """
+    parsed = urllib.parse.urlparse(source)
+
+    try:
+        if parsed.scheme in ('http', 'https'):
+            return _refresh_from_url(filepath, source, timeout)
+        return _refresh_from_file(filepath, parsed.path if parsed.scheme == 'file' else source)
+    except OSError as e:
+        raise RefreshError(str(e)) from e
+
+
+class GeoIPIndex:
+    """The GeoIP networks as address intervals sorted by their first address, which are searched with `bisect`.
+
+    The networks of a GeoIP database do not overlap, so the only candidate for an address is the last network that
+    starts at or before it.
+    """
+
+    def __init__(self, records: list[models.GeoIPRecord]):
+        intervals = []
+        for r in records:
+            network = ipaddress.IPv4Network(r.network)
+            intervals.append((int(network.network_address), int(network.broadcast_address), r))
+        intervals.sort(key=lambda i: i[0])
+
+        self._starts = [start for start, _, _ in intervals]
+        self._ends = [end for _, end, _ in intervals]
+        self._records = [r for _, _, r in intervals]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def lookup(self, ip: ipaddress.IPv4Address) -> models.GeoIPRecord | None:
+        """Returns the record of the network that contains the IP address, if any."""
+        address = int(ip)
+        i = bisect.bisect_right(self._starts, address) - 1
+        if i >= 0 and address <= self._ends[i]:
+            return self._records[i]
+        return None
+
+
+def read_records(filepath: str) -> list[models.GeoIPRecord]:
+    """
+    Reads the records of a GeoIP database.
+
+    Args:
+        filepath (str): The path to the GeoIP database (CSV).
+
+    Returns:
+        list[models.GeoIPRecord]: The records, in the order of the file.
+
+    """
+    records = []
+    with open(filepath, newline='') as f:
+        for r in csv.DictReader(f):
+            records.append(
+                models.GeoIPRecord(
+                    network=r.get('network'),
+                    geoname_id=r.get('geoname_id') or 0,
+                    continent_code=r.get('continent_code') or None,
+                    continent_name=r.get('continent_name') or None,
+                    country_iso_code=r.get('country_iso_code') or None,
+                    country_name=r.get('country_name') or None,
+                    is_anonymous_proxy=r.get('is_anonymous_proxy') or 0,
+                    is_satellite_provider=r.get('is_satellite_provider') or 0,
+                )
+            )
+
+    return records
+
+
+def _refresh_from_url(filepath: str, url: str, timeout: float) -> bool:
+    import requests
+    import urllib3
+
+    warnings.simplefilter('ignore', urllib3.exceptions.InsecureRequestWarning)
+
+    meta = _read_meta(filepath)
+    headers = {}
+    if _is_intact(filepath, meta) and meta.get('source') == url:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        with requests.get(url, headers=headers, stream=True, verify=False, timeout=timeout) as response:
+            if response.status_code == 304:
+                return False
+            response.raise_for_status()
+
+            sha256, size = _stream_to(filepath, response.iter_content(CHUNK_SIZE))
+            _write_meta(
+                filepath,
+                {
+                    'source': url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'sha256': sha256,
+                    'size': size,
+                },
+            )
+    except requests.exceptions.RequestException as e:
+        raise RefreshError(str(e)) from e
+
+    return True
+
+
+def _refresh_from_file(filepath: str, mirror: str) -> bool:
+    stat = os.stat(mirror)
+    meta = _read_meta(filepath)
+
+    if (
+        _is_intact(filepath, meta)
+        and meta.get('source') == os.path.abspath(mirror)
+        and meta.get('mirror_size') == stat.st_size
+        and meta.get('mirror_mtime') == stat.st_mtime
+    ):
+        return False
+
+    with open(mirror, 'rb') as f:
+        sha256, size = _stream_to(filepath, iter(lambda: f.read(CHUNK_SIZE), b''))
+
+    _write_meta(
+        filepath,
+        {
+            'source': os.path.abspath(mirror),
+            'mirror_size': stat.st_size,
+            'mirror_mtime': stat.st_mtime,
+            'sha256': sha256,
+            'size': size,
+        },
+    )
+
+    return True
+
+
+def _stream_to(filepath: str, chunks) -> tuple[str, int]:
+    """Writes the chunks into a temporary file while hashing them, and atomically moves it to `filepath`."""
+    sha256 = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filepath)), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in chunks:
+                sha256.update(chunk)
+                size += len(chunk)
+                tmp.write(chunk)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return sha256.hexdigest(), size
+
+
+def _is_intact(filepath: str, meta: dict) -> bool:
+    """Checks that the database is the one that the metadata describes: its size first, then its SHA-256 digest."""
+    if not os.path.exists(filepath) or os.path.getsize(filepath) != meta.get('size'):
+        return False
+
+    sha256 = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest() == meta.get('sha256')
+
+
+def _meta_path(filepath: str) -> str:
+    return f'{filepath}.meta.json'
+
+
+def _read_meta(filepath: str) -> dict:
+    try:
+        with open(_meta_path(filepath)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(filepath: str, meta: dict) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filepath)), suffix='.part')
+    with os.fdopen(fd, 'w') as tmp:
+        json.dump(meta, tmp)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, _meta_path(filepath))
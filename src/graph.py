@@ -0,0 +1,255 @@
+import networkx as nx
+
+import json
+import os.path
+import typing
+import xml.sax.saxutils
+
+import models
+
+
+# The node attributes and their types. Every node has a `kind` ('target', 'ipv4', 'cidr', 'fqdn', 'url' or '404') and
+# a `name`; the rest depend on the kind.
+ATTRIBUTES = {
+    'kind': str,
+    'name': str,
+    'visibility': str,
+    'asn_description': str,
+    'asn_network': str,
+    'asn_country_code': str,
+    'geoip_continent': str,
+    'geoip_country': str,
+    'pingable': bool,
+    'number_of_hosts': int,
+    'hosts_found': bool,
+    'reachable': bool,
+    'status_code': int,
+    'summary': bool,
+    'members': int,
+}
+EXPORT_FORMATS = ('.graphml', '.gexf', '.json')
+
+# GraphML and GEXF share the type names.
+_XML_TYPES = {str: 'string', bool: 'boolean', int: 'long'}
+
+
+def build(
+    analyzed_ipv4s: list[models.IPV4],
+    analyzed_cidrs: list[models.CIDR],
+    analyzed_fqdns: list[models.FQDN],
+    analyzed_urls: list[models.URL],
+) -> nx.Graph:
+    """
+    Builds the target -> DNS chain -> IP graph of the analysis results.
+
+    The nodes are keyed by their name, so an IP (or a CNAME) that several FQDNs resolve to is a single node.
+
+    Returns:
+        nx.Graph: The graph.
+
+    """
+    total = len(analyzed_ipv4s) + len(analyzed_cidrs) + len(analyzed_fqdns) + len(analyzed_urls)
+    G = nx.Graph()
+    if total > 1:
+        G.add_node('center', kind='target', name='center')
+
+    for ip in analyzed_ipv4s:
+        _add_ipv4(G, ip)
+        if total > 1:
+            G.add_edge('center', ip.ipv4)
+
+    for c in analyzed_cidrs:
+        G.add_node(
+            c.cidr,
+            kind='cidr',
+            name=c.cidr,
+            number_of_hosts=c.number_of_hosts,
+            **_network_attributes(c),
+        )
+        if total > 1:
+            G.add_edge('center', c.cidr)
+
+    for f in analyzed_fqdns:
+        if total > 1:
+            G.add_edge('center', f.fqdn)
+        _add_fqdn(G, f)
+
+    for u in analyzed_urls:
+        G.add_node(u.url, kind='url', name=u.url, reachable=u.reachable, status_code=u.status_code)
+        if total > 1:
+            G.add_edge('center', u.url)
+        G.add_edge(u.url, u.fqdn.fqdn)
+        _add_fqdn(G, u.fqdn)
+
+    return G
+
+
+def collapse_groups(G: nx.Graph, threshold: int) -> nx.Graph:
+    """
+    Replaces the IPs of every ASN that has more than `threshold` of them with a single summary node.
+
+    Args:
+        G (nx.Graph): The graph, as returned by `build()`.
+        threshold (int): The number of IPs of an ASN up to which they are kept.
+
+    Returns:
+        nx.Graph: The graph with the summary nodes.
+
+    """
+    groups: dict[str, list] = {}
+    for n, data in G.nodes(data=True):
+        asn = data.get('asn_description')
+        if data['kind'] == 'ipv4' and asn and asn != 'N/A':
+            groups.setdefault(asn, []).append(n)
+
+    for asn, members in groups.items():
+        if len(members) <= threshold:
+            continue
+
+        summary = f'asn:{asn}'
+        neighbours = {m for n in members for m in G.neighbors(n)} - set(members)
+        G.remove_nodes_from(members)
+        G.add_node(
+            summary,
+            kind='ipv4',
+            name=f'{asn} ({len(members)} IPs)',
+            asn_description=asn,
+            summary=True,
+            members=len(members),
+        )
+        G.add_edges_from((summary, m) for m in neighbours)
+
+    return G
+
+
+def export(G: nx.Graph, filepath: str) -> None:
+    """
+    Writes the graph to a file, in the format of its extension: GraphML ('.graphml'), GEXF ('.gexf') or node-link
+    JSON ('.json'). The file is written node by node, without building the whole document in memory first.
+
+    Args:
+        G (nx.Graph): The graph.
+        filepath (str): The filename.
+
+    Raises:
+        ValueError: If the extension is not supported.
+
+    """
+    writers = {'.graphml': _graphml, '.gexf': _gexf, '.json': _node_link_json}
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext not in writers:
+        raise ValueError(f"unsupported graph format '{ext}', use one of {', '.join(EXPORT_FORMATS)}")
+
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.writelines(writers[ext](G))
+
+
+# --- Builders ---
+
+
+def _network_attributes(result: models.IPV4 | models.CIDR) -> dict:
+    return {
+        'visibility': result.visibility,
+        'asn_description': result.asn_description,
+        'asn_network': result.asn_network,
+        'asn_country_code': result.asn_country_code or '',
+        'geoip_continent': result.geoip_continent or '',
+        'geoip_country': result.geoip_country or '',
+    }
+
+
+def _add_ipv4(G: nx.Graph, ip: models.IPV4) -> None:
+    G.add_node(ip.ipv4, kind='ipv4', name=ip.ipv4, pingable=ip.pingable, **_network_attributes(ip))
+
+
+def _add_fqdn(G: nx.Graph, f: models.FQDN) -> None:
+    """Adds an FQDN with its DNS chain and its destination IPs (or a 404 node)."""
+    G.add_node(f.fqdn, kind='fqdn', name=f.fqdn, hosts_found=f.hosts_found)
+
+    for link in f.dns_chain:
+        if link != f.fqdn:
+            if link not in G:
+                G.add_node(link, kind='fqdn', name=link)
+            G.add_edge(f.fqdn, link)
+
+    last = f.dns_chain[-1] if f.dns_chain else f.fqdn
+    if f.hosts_found:
+        for ip in f.destination_ips:
+            _add_ipv4(G, ip)
+            G.add_edge(last, ip.ipv4)
+    else:
+        error = f'{f.fqdn} not found'
+        G.add_node(error, kind='404', name='404')
+        G.add_edge(last, error)
+
+
+# --- Writers ---
+
+
+def _graphml(G: nx.Graph) -> typing.Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    for name, kind in ATTRIBUTES.items():
+        yield f'  <key id="{name}" for="node" attr.name="{name}" attr.type="{_XML_TYPES[kind]}"/>\n'
+    yield '  <graph edgedefault="undirected">\n'
+
+    for n, data in G.nodes(data=True):
+        yield f'    <node id={_quote(n)}>'
+        for name, value in data.items():
+            yield f'<data key="{name}">{xml.sax.saxutils.escape(_format(value))}</data>'
+        yield '</node>\n'
+
+    for u, v in G.edges:
+        yield f'    <edge source={_quote(u)} target={_quote(v)}/>\n'
+
+    yield '  </graph>\n'
+    yield '</graphml>\n'
+
+
+def _gexf(G: nx.Graph) -> typing.Iterator[str]:
+    ids = {name: i for i, name in enumerate(ATTRIBUTES)}
+
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<gexf xmlns="http://gexf.net/1.3" version="1.3">\n'
+    yield '  <graph defaultedgetype="undirected" mode="static">\n'
+    yield '    <attributes class="node">\n'
+    for name, kind in ATTRIBUTES.items():
+        yield f'      <attribute id="{ids[name]}" title="{name}" type="{_XML_TYPES[kind]}"/>\n'
+    yield '    </attributes>\n'
+
+    yield '    <nodes>\n'
+    for n, data in G.nodes(data=True):
+        yield f'      <node id={_quote(n)} label={_quote(data["name"])}><attvalues>'
+        for name, value in data.items():
+            yield f'<attvalue for="{ids[name]}" value={_quote(_format(value))}/>'
+        yield '</attvalues></node>\n'
+    yield '    </nodes>\n'
+
+    yield '    <edges>\n'
+    for i, (u, v) in enumerate(G.edges):
+        yield f'      <edge id="{i}" source={_quote(u)} target={_quote(v)}/>\n'
+    yield '    </edges>\n'
+
+    yield '  </graph>\n'
+    yield '</gexf>\n'
+
+
+def _node_link_json(G: nx.Graph) -> typing.Iterator[str]:
+    """The format of `nx.node_link_data()`, which `nx.node_link_graph()` reads back."""
+    yield '{"directed": false, "multigraph": false, "graph": {}, "nodes": ['
+    for i, (n, data) in enumerate(G.nodes(data=True)):
+        yield (',\n' if i else '\n') + json.dumps({'id': n, **data})
+    yield '\n], "edges": ['
+    for i, (u, v) in enumerate(G.edges):
+        yield (',\n' if i else '\n') + json.dumps({'source': u, 'target': v})
+    yield '\n]}\n'
+
+
+def _format(value: typing.Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _quote(value: typing.Any) -> str:
+    return xml.sax.saxutils.quoteattr(str(value))
@@ -0,0 +1,202 @@
+import pydantic
+
+import json
+import time
+import typing
+
+import results
+import verbose
+
+
+DEFAULT_FRESHNESS = 'rdap=7d,dns=1h,ping=1h,http=1h'
+FRESHNESS_STAGES = ('dns', 'rdap', 'ping', 'http')
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+CHECKED_AT_SUFFIX = '_checked_at'
+# The list fields whose order is meaningful. Every other list (e.g. `destination_ips`) is compared as a set.
+ORDERED_FIELDS = {'dns_chain', 'redirects'}
+
+
+def parse_freshness(value: str) -> dict[str, float]:
+    """
+    Parses freshness windows such as `rdap=7d,dns=1h` into seconds per analysis stage.
+
+    Args:
+        value (str): Comma-separated `stage=duration` pairs. A duration is a number with an optional s/m/h/d/w unit.
+
+    Returns:
+        dict[str, float]: The freshness window of every stage in seconds.
+
+    Raises:
+        ValueError: If a stage is unknown (e.g. a typo such as `rdpa=7d`) or a duration cannot be parsed.
+
+    """
+    freshness = {}
+
+    for pair in value.split(','):
+        if pair.strip() == '':
+            continue
+        stage, _, duration = pair.partition('=')
+        stage = stage.strip().lower()
+        if stage not in FRESHNESS_STAGES:
+            raise ValueError(f"unknown stage '{stage}', use one of {', '.join(FRESHNESS_STAGES)}")
+        try:
+            freshness[stage] = parse_duration(duration)
+        except ValueError as e:
+            raise ValueError(f"invalid duration '{duration.strip()}' of the stage '{stage}'") from e
+
+    return freshness
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parses a duration such as `90`, `30m` or `1.5h` into seconds.
+
+    Args:
+        value (str): A number with an optional s/m/h/d/w unit.
+
+    Returns:
+        float: The duration in seconds.
+
+    """
+    value = value.strip().lower()
+    unit = UNITS.get(value[-1:], None)
+    number = value[:-1] if unit is not None else value
+    return float(number) * (unit or 1)
+
+
+def is_fresh(result: pydantic.BaseModel, freshness: dict[str, float], now: float | None = None) -> bool:
+    """
+    Checks whether every stage of a result (including its nested results) is within its freshness window.
+
+    Args:
+        result (pydantic.BaseModel): A previous analysis result.
+        freshness (dict[str, float]): The freshness window of every stage in seconds.
+        now (float | None): The current UNIX time.
+
+    Returns:
+        bool: `True` if the result can be carried forward as it is.
+
+    """
+    now = time.time() if now is None else now
+
+    for name in type(result).model_fields:
+        value = getattr(result, name)
+        if name.endswith(CHECKED_AT_SUFFIX):
+            if now - value >= freshness.get(name.removesuffix(CHECKED_AT_SUFFIX), 0):
+                return False
+        elif isinstance(value, pydantic.BaseModel):
+            if not is_fresh(value, freshness, now):
+                return False
+        elif isinstance(value, list):
+            if not all(is_fresh(v, freshness, now) for v in value if isinstance(v, pydantic.BaseModel)):
+                return False
+
+    return True
+
+
+def failed(result: pydantic.BaseModel) -> bool:
+    """
+    Checks whether the analysis of a target failed, in which case it has to be analyzed again from scratch.
+
+    Args:
+        result (pydantic.BaseModel): A previous analysis result.
+
+    Returns:
+        bool: `True` for results that timed out, for FQDNs without hosts and for unreachable URLs.
+
+    """
+    if timed_out(result):
+        return True
+    if result.type == 'fqdn':
+        return not result.hosts_found
+    if result.type == 'url':
+        return not result.reachable or result.fqdn is None or failed(result.fqdn)
+    return False
+
+
+def timed_out(result: pydantic.BaseModel) -> bool:
+    """Checks whether a stage of the result (or of its nested results) was abandoned at the deadline."""
+    if result.timed_out:
+        return True
+    if result.type == 'fqdn':
+        return any(timed_out(ip) for ip in result.destination_ips)
+    if result.type == 'url':
+        return result.fqdn is not None and timed_out(result.fqdn)
+    return False
+
+
+class Diff(pydantic.BaseModel):
+    """The differences between a previous and the current result set."""
+
+    added: list[str] = []
+    removed: list[str] = []
+    changed: dict[str, list[str]] = {}
+    unchanged: int = 0
+
+
+def diff(
+    previous: dict[str, pydantic.BaseModel],
+    current: typing.Iterable[pydantic.BaseModel],
+    scope: set[str],
+) -> Diff:
+    """
+    Compares the current results with the previous ones, ignoring the `*_checked_at` timestamps.
+
+    Args:
+        previous (dict[str, pydantic.BaseModel]): The previous results by target.
+        current (Iterable[pydantic.BaseModel]): The current results.
+        scope (set[str]): The targets of the current run. Previous targets outside of it count as removed.
+
+    Returns:
+        Diff: The added, removed and changed targets.
+
+    """
+    d = Diff()
+    seen = set()
+
+    for result in current:
+        key = results.key(result)
+        seen.add(key)
+        before = previous.get(key)
+        if before is None:
+            d.added.append(key)
+            continue
+        old, new = _comparable(before.model_dump()), _comparable(result.model_dump())
+        fields = [f for f in new if old.get(f) != new[f]]
+        if fields:
+            d.changed[key] = fields
+        else:
+            d.unchanged += 1
+
+    d.removed = sorted(k for k in previous if k not in seen and k not in scope)
+    d.added.sort()
+
+    return d
+
+
+def print_diff(d: Diff, limit: int = 50) -> None:
+    """Prints a compact summary of a `Diff`."""
+    verbose.info(
+        f'Diff against the previous results: {len(d.added)} new, {len(d.removed)} removed, '
+        f'{len(d.changed)} changed, {d.unchanged} unchanged.'
+    )
+
+    lines = [f'+ {k}' for k in d.added]
+    lines += [f'- {k}' for k in d.removed]
+    lines += [f'~ {k} ({", ".join(fields)})' for k, fields in sorted(d.changed.items())]
+    for line in lines[:limit]:
+        verbose.info(line)
+    if len(lines) > limit:
+        verbose.info(f'... and {len(lines) - limit} more.')
+
+
+def _comparable(value: typing.Any, field: str = '') -> typing.Any:
+    """Strips the `*_checked_at` timestamps from a dumped result, and sorts the lists whose order is not meaningful."""
+    if isinstance(value, dict):
+        return {k: _comparable(v, k) for k, v in value.items() if not k.endswith(CHECKED_AT_SUFFIX)}
+    if isinstance(value, list):
+        items = [_comparable(v) for v in value]
+        if field in ORDERED_FIELDS:
+            return items
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    return value
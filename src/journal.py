@@ -0,0 +1,91 @@
+import pydantic
+
+import os
+import threading
+import time
+import typing
+
+import results
+
+
+_OPEN_JOURNALS: list['Journal'] = []
+
+
+class Journal:
+    """Append-only checkpoint journal of completed target results.
+
+    Every result is written as a JSON line and handed to the OS immediately, so a crash of the process loses nothing.
+    The `fsync` calls that protect against a crash of the host are batched by count and time.
+    """
+
+    def __init__(self, filepath: str, fsync_every: int = 100, fsync_interval: float = 1.0):
+        self.filepath = filepath
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = open(filepath, 'ab')
+        self._terminate_partial_line()
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        _OPEN_JOURNALS.append(self)
+
+    def record(self, result: pydantic.BaseModel) -> None:
+        """Appends a completed result to the journal."""
+        line = result.model_dump_json().encode() + b'\n'
+
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync()
+
+    def close(self) -> None:
+        """Flushes the pending results to the disk and closes the journal."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            self._fsync()
+            self._file.close()
+
+        if self in _OPEN_JOURNALS:
+            _OPEN_JOURNALS.remove(self)
+
+    def _terminate_partial_line(self) -> None:
+        """Makes sure that new results do not get glued to a line that was cut off by a crash."""
+        if self._file.tell() == 0:
+            return
+
+        with open(self.filepath, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                self._file.write(b'\n')
+
+    def _fsync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+
+def load(filepath: str) -> typing.Iterator[pydantic.BaseModel]:
+    """
+    Loads the results recorded in a journal.
+
+    Args:
+        filepath (str): The path to the journal.
+
+    Yields:
+        pydantic.BaseModel: The recorded results. A missing journal has no results.
+
+    """
+    if os.path.exists(filepath):
+        yield from results.read_jsonl(filepath)
+
+
+def close_all() -> None:
+    """Closes every open journal, e.g. right before the process is terminated."""
+    for j in list(_OPEN_JOURNALS):
+        j.close()
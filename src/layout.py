@@ -0,0 +1,205 @@
+import networkx as nx
+import numpy as np
+import scipy.signal
+import scipy.spatial
+
+
+def multilevel_layout(
+    G: nx.Graph,
+    seed: int = 42,
+    coarse_size: int = 200,
+    iterations: int = 50,
+    max_cluster: int = 4,
+) -> dict:
+    """
+    Computes a force-directed layout that scales to graphs with tens of thousands of nodes.
+
+    The graph is coarsened by repeatedly aggregating every node with (up to `max_cluster - 1` of) its unassigned
+    neighbours, until it has at most `coarse_size` nodes. The coarsest graph is laid out from scratch, and every finer
+    level starts from the positions of its parents and is only refined. The refinement is Fruchterman-Reingold with an
+    approximate repulsion: the near field comes from the nearest nodes (found with a k-d tree) and the far field from
+    a particle mesh, i.e. the node density on a grid convolved (with an FFT) with the repulsive force. Every iteration
+    is thus O(n log n) instead of O(n^2).
+
+    Args:
+        G (nx.Graph): The graph.
+        seed (int): The seed of the random initial positions.
+        coarse_size (int): The size under which the graph is not coarsened any further.
+        iterations (int): The refinement iterations of the coarsest level. Finer levels get fewer.
+        max_cluster (int): The maximum number of nodes that are merged into one. Hubs (e.g. the center of a star) would
+            otherwise swallow all of their neighbours at once, which leaves them stacked on a single point.
+
+    Returns:
+        dict: The position (a numpy array [x, y] in [-1, 1]) of every node.
+
+    """
+    nodes = list(G.nodes)
+    if not nodes:
+        return {}
+
+    index = {n: i for i, n in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges if u != v], dtype=np.int64).reshape(-1, 2)
+    rng = np.random.default_rng(seed)
+
+    # Coarsen.
+    levels = []
+    n, level_edges = len(nodes), edges
+    while n > coarse_size:
+        clusters, count = _aggregate(n, level_edges, max_cluster, rng)
+        if count > 0.95 * n:
+            break
+        levels.append((n, level_edges, clusters))
+        level_edges = _coarse_edges(level_edges, clusters)
+        n = count
+
+    # Lay out the coarsest level and refine every finer level.
+    pos = rng.uniform(-1, 1, size=(n, 2))
+    pos = _refine(pos, level_edges, iterations, rng, temperature=0.2)
+    for depth, (fine_n, fine_edges, clusters) in enumerate(reversed(levels)):
+        pos = _normalize(pos)[clusters] + rng.normal(scale=1 / np.sqrt(fine_n), size=(fine_n, 2))
+        pos = _refine(pos, fine_edges, max(10, iterations // (depth + 2)), rng, temperature=0.05)
+
+    pos = _normalize(pos)
+
+    return {node: pos[i] for i, node in enumerate(nodes)}
+
+
+def _aggregate(n: int, edges: np.ndarray, max_cluster: int, rng: np.random.Generator) -> tuple[np.ndarray, int]:
+    """Assigns every node and some of its still unassigned neighbours to a common cluster, visiting them randomly."""
+    neighbours = _adjacency(n, edges)
+    clusters = np.full(n, -1, dtype=np.int64)
+    count = 0
+
+    # The leaves of a hub (e.g. the targets around the center) have no other neighbour to merge with, so they are
+    # merged with each other first.
+    degree = np.array([len(nb) for nb in neighbours])
+    for hub in np.flatnonzero(degree > max_cluster):
+        leaves = [leaf for leaf in neighbours[hub] if degree[leaf] == 1 and clusters[leaf] < 0]
+        for i in range(0, len(leaves) - 1, max_cluster):
+            clusters[leaves[i : i + max_cluster]] = count
+            count += 1
+
+    for node in rng.permutation(n):
+        if clusters[node] >= 0:
+            continue
+        clusters[node] = count
+        size = 1
+        for other in neighbours[node]:
+            if size == max_cluster:
+                break
+            if clusters[other] < 0:
+                clusters[other] = count
+                size += 1
+        count += 1
+
+    return clusters, count
+
+
+def _adjacency(n: int, edges: np.ndarray) -> list[np.ndarray]:
+    if len(edges) == 0:
+        return [np.empty(0, dtype=np.int64)] * n
+
+    both = np.concatenate([edges, edges[:, ::-1]])
+    both = both[np.argsort(both[:, 0], kind='stable')]
+    bounds = np.searchsorted(both[:, 0], np.arange(n + 1))
+
+    return [both[bounds[i] : bounds[i + 1], 1] for i in range(n)]
+
+
+def _coarse_edges(edges: np.ndarray, clusters: np.ndarray) -> np.ndarray:
+    if len(edges) == 0:
+        return edges
+
+    coarse = np.sort(clusters[edges], axis=1)
+    coarse = coarse[coarse[:, 0] != coarse[:, 1]]
+
+    return np.unique(coarse, axis=0)
+
+
+def _refine(
+    pos: np.ndarray,
+    edges: np.ndarray,
+    iterations: int,
+    rng: np.random.Generator,
+    temperature: float,
+    neighbours: int = 16,
+) -> np.ndarray:
+    """Fruchterman-Reingold iterations with cut-off repulsion."""
+    n = len(pos)
+    if n < 2:
+        return np.zeros((n, 2))
+
+    # The nodes live in [-1, 1]^2, i.e. an area of 4.
+    k = 2 / np.sqrt(n)
+    cutoff = 2 * k
+    t = temperature
+
+    for _ in range(iterations):
+        disp = np.zeros_like(pos)
+
+        # Repulsion from the nearest nodes within the cut-off. Bounding their number keeps dense regions (which the
+        # first iterations after a prolongation are full of) from turning the iteration quadratic again.
+        dist, idx = scipy.spatial.cKDTree(pos).query(pos, k=neighbours + 1, distance_upper_bound=cutoff)
+        dist, idx = dist[:, 1:], idx[:, 1:]
+        found = idx < n
+        delta = pos[:, None, :] - np.concatenate([pos, np.zeros((1, 2))])[idx]
+        dist = np.where(found, np.maximum(dist, 1e-6), np.inf)
+        disp += ((k * k / dist**2)[:, :, None] * delta).sum(axis=1)
+
+        # Repulsion from everything else, through the mesh.
+        disp += k * k * _mesh_repulsion(pos)
+
+        # Attraction along the edges.
+        if len(edges) > 0:
+            delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            dist = np.maximum(np.linalg.norm(delta, axis=1), 1e-6)
+            force = (dist / k)[:, None] * delta
+            disp += _scatter(edges[:, 1], force, n) - _scatter(edges[:, 0], force, n)
+
+        # Move every node at most by the temperature, then cool down.
+        length = np.maximum(np.linalg.norm(disp, axis=1), 1e-9)
+        pos = pos + disp / length[:, None] * np.minimum(length, t)[:, None]
+        t *= 0.95
+
+    # Overlapping nodes would otherwise stay stacked.
+    return pos + rng.normal(scale=k * 1e-3, size=pos.shape)
+
+
+def _mesh_repulsion(pos: np.ndarray) -> np.ndarray:
+    """Approximates sum_j (x_i - x_j) / |x_i - x_j|^2 over the nodes j that are in other grid cells than i."""
+    n = len(pos)
+    size = int(np.clip(np.sqrt(n), 16, 256))
+
+    lo = pos.min(axis=0)
+    h = max(float((pos.max(axis=0) - lo).max()), 1e-9) / (size - 1)
+    cells = np.rint((pos - lo) / h).astype(np.int64)
+    flat = cells[:, 0] * size + cells[:, 1]
+    density = np.bincount(flat, minlength=size * size).reshape(size, size).astype(np.float64)
+
+    offsets = np.arange(-(size - 1), size)
+    dx, dy = np.meshgrid(offsets, offsets, indexing='ij')
+    r2 = (dx * dx + dy * dy).astype(np.float64)
+    r2[size - 1, size - 1] = np.inf
+
+    # With the (larger) kernel first, 'valid' aligns its center (offset 0) with every density cell.
+    fx = scipy.signal.fftconvolve(dx / r2 / h, density, mode='valid')
+    fy = scipy.signal.fftconvolve(dy / r2 / h, density, mode='valid')
+
+    return np.column_stack([fx.ravel()[flat], fy.ravel()[flat]])
+
+
+def _scatter(index: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    """Sums the 2D `values` per `index` (a much faster `np.add.at`)."""
+    return np.column_stack(
+        [
+            np.bincount(index, weights=values[:, 0], minlength=n),
+            np.bincount(index, weights=values[:, 1], minlength=n),
+        ]
+    )
+
+
+def _normalize(pos: np.ndarray) -> np.ndarray:
+    pos = pos - pos.mean(axis=0)
+    scale = np.abs(pos).max()
+
+    return pos / scale if scale > 0 else pos
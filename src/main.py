@@ -1,25 +1,18 @@
 import click
 import rich.console
-import requests
 
 import os
 import sys
-import urllib3
-import warnings
 import signal
+import time
 import types
 
 from __version__ import __version__
-import analysis
-import visualization
-import targets
 import validation
 import verbose
 import utils
-import print
 
 
-warnings.simplefilter('ignore', urllib3.exceptions.InsecureRequestWarning)
 CONTEXT_SETTINGS = dict(max_content_width=120, help_option_names=['-help'])
 
 
@@ -30,14 +23,22 @@ def ctrl_c_signal_handler(sig: int, frame: types.FrameType | None) -> None:
         sig (int): Signal number (e.g., SIGINT).
         frame (FrameType | None): Current stack frame at the time of the signal.
     """
-    verbose.info("'Ctrl+C!' was pressed. Exit.", False)
+    verbose.info("'Ctrl+C!' was pressed. Exit.")
+    verbose.stop(timeout=1.0)
+    # Only the modules that were imported (lazily) can have open files.
+    for name in ('journal', 'database', 'tracing', 'recording'):
+        module = sys.modules.get(name)
+        if module is not None:
+            module.close_all()
     os._exit(1)
 
 
-@click.command(
+@click.group(
     context_settings=CONTEXT_SETTINGS,
-    cls=utils.CustomCommand,
+    cls=utils.CustomGroup,
+    invoke_without_command=True,
 )
+@click.pass_context
 @click.version_option(
     __version__,
     '-version',
@@ -72,6 +73,62 @@ def ctrl_c_signal_handler(sig: int, frame: types.FrameType | None) -> None:
     cls=utils.CustomOption,
     category='DEBUG',
 )
+@click.option(
+    '-stats',
+    help='Display the performance metrics of every analysis stage at the end (stderr).',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-stats-file',
+    help='Append periodic JSON snapshots of the performance metrics to a file.',
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-stats-interval',
+    help='Seconds between two snapshots of the performance metrics.',
+    type=float,
+    default=5.0,
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-trace',
+    help='Record every lookup as a Chrome trace event timeline (file).',
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-record',
+    'record_dir',
+    help="Record every DNS, RDAP, ping and HTTP response into a directory, for a later '-replay' (overwrites it).",
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-replay',
+    'replay_dir',
+    help="Serve the DNS, RDAP, ping and HTTP responses of a '-record' directory instead of the network.",
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-replay-latency',
+    help="Serve the responses of '-replay' after their recorded latency, instead of at once.",
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
 @click.option(
     '-target',
     help='Targets to analyze (comma-separated).',
@@ -106,6 +163,22 @@ def ctrl_c_signal_handler(sig: int, frame: types.FrameType | None) -> None:
     cls=utils.CustomOption,
     category='INPUT',
 )
+@click.option(
+    '-collapse',
+    help='Query the RDAP data of the IPs and CIDRs within another CIDR once, for that CIDR.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='INPUT',
+)
+@click.option(
+    '-shard',
+    help="Analyze only the 'K'th of 'N' slices of the targets (e.g. '1/4'), chosen by a stable hash.",
+    type=str,
+    default='',
+    callback=validation.validate_shard,
+    cls=utils.CustomOption,
+    category='INPUT',
+)
 @click.option(
     '-json',
     help='Write output in JSON lines format.',
@@ -120,6 +193,20 @@ def ctrl_c_signal_handler(sig: int, frame: types.FrameType | None) -> None:
     cls=utils.CustomOption,
     category='OUTPUT',
 )
+@click.option(
+    '-csv',
+    help='Write output in CSV format (one row per target/destination IP).',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
+@click.option(
+    '-tsv',
+    help='Write output in TSV format (one row per target/destination IP).',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
 @click.option(
     '-visualize',
     help='Visualize output as a network graph image. Specify the filename.',
@@ -127,6 +214,24 @@ def ctrl_c_signal_handler(sig: int, frame: types.FrameType | None) -> None:
     callback=validation.validate_png_filename,
     category='OUTPUT',
 )
+@click.option(
+    '-export',
+    help='Export the network graph without rendering it (.graphml, .gexf or .json file).',
+    type=str,
+    default='',
+    callback=validation.validate_graph_filename,
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
+@click.option(
+    '-database',
+    'database_file',
+    help='Also write the results into a SQLite database (file) for later queries.',
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
 @click.option(
     '-threads',
     help='The max number of worker threads.',
@@ -135,20 +240,162 @@ def ctrl_c_signal_handler(sig: int, frame: types.FrameType | None) -> None:
     cls=utils.CustomOption,
     category='TWEAK',
 )
+@click.option(
+    '-adaptive',
+    help="Adapt the DNS, RDAP, ping and HTTP concurrency to their latency and errors, from '-threads'.",
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='TWEAK',
+)
+@click.option(
+    '-target-timeout',
+    help="Abandon the remaining stages of a target after this long, e.g. '90s' or '5m' (0: never).",
+    type=str,
+    default='5m',
+    callback=validation.validate_duration,
+    cls=utils.CustomOption,
+    category='TWEAK',
+)
+@click.option(
+    '-max-runtime',
+    help="Abandon the remaining stages of every target once the run takes this long, e.g. '30m' or '2h'.",
+    type=str,
+    default='',
+    callback=validation.validate_duration,
+    cls=utils.CustomOption,
+    category='TWEAK',
+)
+@click.option(
+    '-rdap-per-ip',
+    help='Query the RDAP data of every IP, instead of reusing the network range of an earlier reply.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='TWEAK',
+)
+@click.option(
+    '-geoip-source',
+    help='Refresh the geoip database from this URL or local mirror (file) instead of GitHub.',
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='TWEAK',
+)
+@click.option(
+    '-parse-workers',
+    help="Parse the '-list' file in this many processes (0: in the main process).",
+    type=click.IntRange(min=0),
+    default=0,
+    cls=utils.CustomOption,
+    category='TWEAK',
+)
+@click.option(
+    '-socket',
+    'socket_path',
+    help="The Unix socket of the 'serve' daemon (default: $SCOPEZ_SOCKET or a per-user socket in the temp directory).",
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='DAEMON',
+)
+@click.option(
+    '-no-daemon',
+    help="Analyze in this process even when a 'serve' daemon is running.",
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DAEMON',
+)
+@click.option(
+    '-journal',
+    'journal_file',
+    help='Append the completed results to a checkpoint journal (file).',
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='RESUME',
+)
+@click.option(
+    '-resume',
+    help="Skip the targets found in the '-journal' and replay their results.",
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='RESUME',
+)
+@click.option(
+    '-previous',
+    help='Re-analyze only the new, failed or stale targets of a previous JSON lines output (file).',
+    type=str,
+    default='',
+    callback=validation.validate_file_exists,
+    cls=utils.CustomOption,
+    category='INCREMENTAL',
+)
+@click.option(
+    '-freshness',
+    help="How long the previous results stay fresh per stage (default: 'rdap=7d,dns=1h,ping=1h,http=1h').",
+    type=str,
+    default='rdap=7d,dns=1h,ping=1h,http=1h',
+    callback=validation.validate_freshness,
+    cls=utils.CustomOption,
+    category='INCREMENTAL',
+)
 def cli(
+    ctx: click.Context,
     no_color: bool,
     silent: bool,
     debug: bool,
     simulate: bool,
+    stats: bool,
+    stats_file: str,
+    stats_interval: float,
+    trace: str,
+    record_dir: str,
+    replay_dir: str,
+    replay_latency: bool,
     target: str,
     list: str,
     exclude_targets: str,
     exclude_file: str,
+    collapse: bool,
+    shard: tuple[int, int] | None,
     json: bool,
     table: bool,
+    csv: bool,
+    tsv: bool,
     visualize: str,
+    export: str,
+    database_file: str,
     threads: int,
+    adaptive: bool,
+    target_timeout: float,
+    max_runtime: float,
+    rdap_per_ip: bool,
+    geoip_source: str,
+    parse_workers: int,
+    socket_path: str,
+    no_daemon: bool,
+    journal_file: str,
+    resume: bool,
+    previous: str,
+    freshness: str,
 ) -> None:
+    # The options are those of the analysis, which does not run when a subcommand (e.g. 'merge') is invoked.
+    if ctx.invoked_subcommand is not None:
+        return
+
+    started = time.monotonic()
+
+    # The heavy modules are imported here and not at the top of the file, so that e.g. '-version' and '-help' start
+    # fast. The optional features (e.g. '-visualize') import their modules only when they are used.
+    import analysis
+    import geoip
+    import incremental
+    import journal
+    import metrics
+    import print
+    import results
+    import targets
+    import tracing
+
     #
     # Global
     #
@@ -169,8 +416,49 @@ def cli(
     # CLI Validation
     #
 
-    if json and table:
-        raise click.UsageError("You can not use '-json' and '-table' options at the same time.")
+    if json + table + csv + tsv > 1:
+        raise click.UsageError("You can only use one of the '-json', '-table', '-csv' and '-tsv' options.")
+
+    if resume and journal_file == '':
+        raise click.UsageError("The '-resume' option requires the '-journal' option.")
+
+    if record_dir != '' and replay_dir != '':
+        raise click.UsageError("You can only use one of the '-record' and '-replay' options.")
+
+    if replay_latency and replay_dir == '':
+        raise click.UsageError("The '-replay-latency' option requires the '-replay' option.")
+
+    #
+    # Daemon
+    #
+
+    # A running 'serve' daemon has its caches warm, unless this run needs the state of the local analysis. The daemon
+    # also analyzes with its own settings, so setting one of them explicitly needs a local analysis too. (The targets
+    # are always parsed locally, e.g. with '-parse-workers'.)
+    use_daemon = False
+    tuned = any(
+        ctx.get_parameter_source(name) != click.core.ParameterSource.DEFAULT
+        for name in ('threads', 'adaptive', 'target_timeout', 'geoip_source')
+    )
+    local = (
+        journal_file
+        or previous
+        or database_file
+        or trace
+        or stats
+        or stats_file
+        or max_runtime
+        or collapse
+        or rdap_per_ip
+        or record_dir
+        or replay_dir
+        or tuned
+    )
+    if not no_daemon and not local:
+        import daemon
+
+        socket_path = socket_path or daemon.SOCKET_PATH
+        use_daemon = daemon.is_running(socket_path)
 
     #
     # Welcome
@@ -183,17 +471,21 @@ def cli(
     # GeoIP2
     #
 
-    verbose.info("Make sure 'geoip2-ipv4.csv' is downloaded.")
-    GEOIP_SHA256 = '4d5b63c8a4dc7d78d395de2106f1ff1a38a654da67cdecde80ba7fe55db4cc7a'
     exe_location = os.path.dirname(os.path.abspath(__file__))
     geoip_filepath = os.path.join(exe_location, 'geoip2-ipv4.csv')
-    if not validation._file_exists(geoip_filepath) or not validation._verify_sha256(geoip_filepath, GEOIP_SHA256):
-        verbose.info('Download the geoip database from GitHub.')
-        GEOIP_URL = 'https://raw.githubusercontent.com/datasets/geoip2-ipv4/refs/heads/main/data/geoip2-ipv4.csv'
-        response = requests.get(GEOIP_URL, verify=False, timeout=3600)
-        response.raise_for_status()
-        with open(geoip_filepath, 'wb') as f:
-            f.write(response.content)
+    if replay_dir != '':
+        # A replay sends nothing over the network.
+        if not validation._file_exists(geoip_filepath):
+            raise click.ClickException("The geoip database is missing. Run 'scopez' once to download it.")
+    elif not use_daemon:
+        verbose.info("Make sure 'geoip2-ipv4.csv' is up to date.")
+        try:
+            if geoip.refresh(geoip_filepath, geoip_source or geoip.GEOIP_URL):
+                verbose.info(f"Downloaded the geoip database from '{geoip_source or geoip.GEOIP_URL}'.")
+        except geoip.RefreshError as e:
+            if not validation._file_exists(geoip_filepath):
+                raise click.ClickException(f'The geoip database could not be downloaded: {e}')
+            verbose.warning(f'The geoip database could not be refreshed, so the existing one is used: {e}')
 
     #
     # Input
@@ -205,7 +497,10 @@ def cli(
         targeter.parse_targets_str(target)
     elif list != '':
         verbose.info(f"Parse targets from the file located at '{list}'.")
-        targeter.parse_targets_file(list)
+        if parse_workers > 0:
+            targeter.parse_targets_file_parallel(list, parse_workers)
+        else:
+            targeter.parse_targets_file(list)
     elif exclude_targets != '':
         verbose.info("Exclude targets from the 'exclude_targets' CLI parameter.")
         targeter.parse_exclusions_str(exclude_targets)
@@ -223,6 +518,14 @@ def cli(
     if targeter.total_count() == 0:
         raise click.UsageError('You must supply at least one target.')
 
+    #
+    # Sharding
+    #
+
+    if shard is not None:
+        removed = targeter.shard(*shard)
+        verbose.info(f'Analyze the shard {shard[0]}/{shard[1]}: {targeter.total_count()} target(s), {removed} skipped.')
+
     #
     # Simulation
     #
@@ -236,17 +539,174 @@ def cli(
     # Analysis
     #
 
-    analyzer = analysis.Analyzer()
-    analyzer.parse_geoip_data(geoip_filepath)
-    verbose.info('Analyze the targets.')
-    if len(targeter.ipv4s) > 0:
-        analyzer.analyze_ipv4s(targeter.ipv4s, threads)
-    if len(targeter.cidrs_v4) > 0:
-        analyzer.analyze_cidrs(targeter.cidrs_v4, threads)
-    if len(targeter.fqdns) > 0:
-        analyzer.analyze_fqdns(targeter.fqdns, threads)
-    if len(targeter.urls) > 0:
-        analyzer.analyze_urls(targeter.urls, threads)
+    analyzer = analysis.Analyzer(target_timeout=target_timeout)
+    if max_runtime > 0:
+        analyzer.limit_runtime(max_runtime, started)
+    scope = set(targeter.ipv4s + targeter.cidrs_v4 + targeter.fqdns + targeter.urls)
+
+    #
+    # Resume
+    #
+
+    if resume:
+        verbose.info(f"Resume from the journal located at '{journal_file}'.")
+        resumed = set()
+        for r in journal.load(journal_file):
+            key = results.key(r)
+            if key in scope and key not in resumed:
+                resumed.add(key)
+                analyzer.restore(r)
+        skipped = targeter.discard(resumed)
+        verbose.info(f'Skip {skipped} target(s) that were analyzed by a previous run.')
+
+    #
+    # Incremental
+    #
+
+    previous_results = {}
+    if previous != '':
+        verbose.info(f"Compare with the previous results located at '{previous}'.")
+        previous_results = {results.key(r): r for r in results.read_jsonl(previous)}
+        windows = incremental.parse_freshness(freshness)
+        now = time.time()
+        carried = set()
+        for key in set(targeter.ipv4s + targeter.cidrs_v4 + targeter.fqdns + targeter.urls):
+            r = previous_results.get(key)
+            if r is not None and not incremental.failed(r) and incremental.is_fresh(r, windows, now):
+                carried.add(key)
+                analyzer.restore(r)
+        targeter.discard(carried)
+        verbose.info(f'Carry forward {len(carried)} fresh target(s).')
+        analyzer.previous_results = {k: r for k, r in previous_results.items() if not incremental.failed(r)}
+        analyzer.freshness = windows
+
+    #
+    # Collapse
+    #
+
+    if collapse:
+        analyzer.covering = targeter.collapse()
+        networks = set(analyzer.covering.values())
+        covered_ips = sum(t in analyzer.covering for t in targeter.ipv4s)
+        covered_cidrs = sum(analyzer.covering.get(t, t) != t for t in targeter.cidrs_v4)
+        verbose.info(
+            f'{covered_cidrs} CIDR(s) and {covered_ips} IP(s) lie within {len(networks)} other CIDR(s): '
+            f'query {len(networks)} instead of {len(networks) + covered_cidrs + covered_ips} RDAP lookup(s) for them.'
+        )
+
+    if rdap_per_ip:
+        analyzer.rdap_ranges = None
+
+    #
+    # Record / Replay
+    #
+
+    if record_dir != '':
+        verbose.info(f"Record the responses into '{record_dir}'.")
+        import recording
+
+        analyzer.recorder = recording.Recorder(record_dir)
+
+    if replay_dir != '':
+        import recording
+
+        try:
+            analyzer.replay(recording.Replayer(replay_dir, latency=replay_latency))
+        except FileNotFoundError as e:
+            raise click.ClickException(str(e))
+        verbose.info(f"Replay the {len(analyzer.replayer)} response(s) recorded in '{replay_dir}'.")
+        if not replay_latency:
+            # The delays between the queries spare the servers, which are not queried.
+            analyzer.dns_delay = 0.0
+            analyzer.rdap_retry_delay = 0.0
+
+    checkpoint = None
+    if journal_file != '':
+        checkpoint = journal.Journal(journal_file)
+        analyzer.result_callbacks.append(checkpoint.record)
+
+    db = None
+    if database_file != '':
+        verbose.info(f"Write the results to the database located at '{database_file}'.")
+        import database
+
+        db = database.ResultDatabase(database_file)
+        # The results of '-resume' and '-previous' were not analyzed by this run, so they are not reported by it.
+        for r in analyzer.results():
+            db.record(r)
+        analyzer.result_callbacks.append(db.record)
+
+    tracer = None
+    if trace != '':
+        tracer = tracing.Tracer(trace)
+        analyzer.stats.observers.append(tracer.observe)
+
+    snapshots = None
+    if stats_file != '':
+        snapshots = metrics.SnapshotWriter(analyzer.stats, stats_file, stats_interval).start()
+
+    if use_daemon:
+        verbose.info(f"Analyze the targets with the daemon listening on '{socket_path}'.")
+        try:
+            for r in daemon.request(targeter.ipv4s + targeter.cidrs_v4 + targeter.fqdns + targeter.urls, socket_path):
+                analyzer.restore(r)
+        except daemon.DaemonError as e:
+            raise click.ClickException(f"{e} (use '-no-daemon' to analyze in this process)")
+    else:
+        analyzer.parse_geoip_data(geoip_filepath)
+        if adaptive:
+            verbose.info(f'Adapt the concurrency of every stage, starting from {threads}.')
+            threads = analyzer.adapt_concurrency(threads)
+        verbose.info('Analyze the targets.')
+        verbose.start()
+        if len(targeter.ipv4s) > 0:
+            analyzer.analyze_ipv4s(targeter.ipv4s, threads)
+        if len(targeter.cidrs_v4) > 0:
+            analyzer.analyze_cidrs(targeter.cidrs_v4, threads)
+        if len(targeter.fqdns) > 0:
+            analyzer.analyze_fqdns(targeter.fqdns, threads)
+        if len(targeter.urls) > 0:
+            analyzer.analyze_urls(targeter.urls, threads)
+        verbose.stop()
+
+        timed_out = sum(incremental.timed_out(r) for r in analyzer.results())
+        if timed_out > 0:
+            verbose.warning(f"{timed_out} target(s) timed out. Their abandoned stages are listed in 'timed_out'.")
+        if analyzer.replayer is not None and analyzer.replayer.misses > 0:
+            verbose.warning(
+                f"{analyzer.replayer.misses} request(s) had no recorded response in '{replay_dir}', so their stages "
+                'were abandoned.'
+            )
+    if checkpoint is not None:
+        checkpoint.close()
+    if db is not None:
+        db.close()
+    if snapshots is not None:
+        snapshots.stop()
+    if tracer is not None:
+        tracer.close()
+    if analyzer.recorder is not None:
+        analyzer.recorder.close()
+    if stats:
+        analyzer.stats.print_summary(rich.console.Console(stderr=True, no_color=no_color))
+
+    difference = None
+    if previous != '':
+        difference = incremental.diff(previous_results, analyzer.results(), scope)
+
+    if export != '':
+        verbose.info(f"Export the network graph to '{export}'.")
+        import graph
+
+        graph.export(
+            graph.build(
+                analyzer.analyzed_ipv4s,
+                analyzer.analyzed_cidrs,
+                analyzer.analyzed_fqdns,
+                analyzer.analyzed_urls,
+            ),
+            export,
+        )
 
     #
     # stdout
@@ -254,6 +714,8 @@ def cli(
 
     if visualize:
         verbose.info('Visualize the targets as a network graph.')
+        import visualization
+
         visualizer = visualization.Visualizer()
         visualizer.create_visualization_image(
             analyzer.analyzed_ipv4s,
@@ -262,43 +724,297 @@ def cli(
             analyzer.analyzed_urls,
             visualize,
         )
+        if difference is not None:
+            incremental.print_diff(difference)
         return
 
     verbose.info('Print the results in the stdout.')
     verbose.SILENT = False
-    if len(targeter.ipv4s) > 0:
-        if table:
-            print.Printer.print_ipv4s_as_table(analyzer.analyzed_ipv4s)
-        elif json:
-            print.Printer.print_as_json(analyzer.analyzed_ipv4s)
-        else:
-            print.Printer.print_ipv4s_as_table(analyzer.analyzed_ipv4s)
-    if len(targeter.cidrs_v4) > 0:
-        if table:
-            print.Printer.print_cidrs_as_table(analyzer.analyzed_cidrs)
-        elif json:
-            print.Printer.print_as_json(analyzer.analyzed_cidrs)
-        else:
-            print.Printer.print_cidrs_as_table(analyzer.analyzed_cidrs)
-    if len(targeter.fqdns) > 0:
-        if table:
-            print.Printer.print_fqdns_as_table(analyzer.analyzed_fqdns)
-        elif json:
-            print.Printer.print_as_json(analyzer.analyzed_fqdns)
-        else:
-            print.Printer.print_fqdns_as_table(analyzer.analyzed_fqdns)
-    if len(targeter.urls) > 0:
-        if table:
-            print.Printer.print_urls_as_table(analyzer.analyzed_urls)
-        elif json:
-            print.Printer.print_as_json(analyzer.analyzed_urls)
-        else:
-            print.Printer.print_urls_as_table(analyzer.analyzed_urls)
-    if len(targeter.invalids) > 0:
-        if table:
-            print.Printer.print_invalids_as_table(targeter.invalids)
-        else:
-            print.Printer.print_invalids_as_table(targeter.invalids)
+    print.Printer.print_results(
+        'json' if json else 'csv' if csv else 'tsv' if tsv else 'table',
+        analyzer.analyzed_ipv4s,
+        analyzer.analyzed_cidrs,
+        analyzer.analyzed_fqdns,
+        analyzer.analyzed_urls,
+        targeter.invalids,
+    )
+
+    #
+    # Diff
+    #
+
+    if difference is not None:
+        verbose.SILENT = silent
+        incremental.print_diff(difference)
+
+
+@cli.command(
+    'merge',
+    context_settings=CONTEXT_SETTINGS,
+    cls=utils.CustomCommand,
+)
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '-no-color',
+    help='Disable colors in CLI output.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-silent',
+    help='Display only results in output.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-json',
+    help='Write output in JSON lines format.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
+@click.option(
+    '-table',
+    help='Write output in Table format.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
+@click.option(
+    '-csv',
+    help='Write output in CSV format (one row per target/destination IP).',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
+@click.option(
+    '-tsv',
+    help='Write output in TSV format (one row per target/destination IP).',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
+@click.option(
+    '-visualize',
+    help='Visualize output as a network graph image. Specify the filename.',
+    cls=utils.CustomOption,
+    callback=validation.validate_png_filename,
+    category='OUTPUT',
+)
+@click.option(
+    '-export',
+    help='Export the network graph without rendering it (.graphml, .gexf or .json file).',
+    type=str,
+    default='',
+    callback=validation.validate_graph_filename,
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
+@click.option(
+    '-database',
+    'database_file',
+    help='Also write the results into a SQLite database (file) for later queries.',
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='OUTPUT',
+)
+def merge(
+    files: tuple[str, ...],
+    no_color: bool,
+    silent: bool,
+    json: bool,
+    table: bool,
+    csv: bool,
+    tsv: bool,
+    visualize: str,
+    export: str,
+    database_file: str,
+) -> None:
+    """Merge the JSON lines outputs of several runs into one deduplicated, ordered result set.
+
+    Every target is kept once, with its most recently checked result, e.g. when the shards of a '-shard' scan overlap.
+    """
+    import print
+    import results
+
+    verbose.SILENT = silent
+    verbose.HIGHLIGHT = False
+    verbose.SOFT_WRAP = True
+    verbose.CONSOLE = rich.console.Console(no_color=no_color)
+
+    if json + table + csv + tsv > 1:
+        raise click.UsageError("You can only use one of the '-json', '-table', '-csv' and '-tsv' options.")
+
+    verbose.info(f'Merge the results of {len(files)} file(s).')
+    merged = {t: [] for t in results.MODELS}
+    for r in results.merge(files):
+        merged[r.type].append(r)
+    verbose.info(f'Merged {sum(len(v) for v in merged.values())} unique result(s).')
+
+    if export != '':
+        verbose.info(f"Export the network graph to '{export}'.")
+        import graph
+
+        graph.export(graph.build(merged['ipv4'], merged['cidr'], merged['fqdn'], merged['url']), export)
+
+    if database_file != '':
+        verbose.info(f"Write the results to the database located at '{database_file}'.")
+        import database
+
+        db = database.ResultDatabase(database_file)
+        for rs in merged.values():
+            for r in rs:
+                db.record(r)
+        db.close()
+
+    if visualize:
+        verbose.info('Visualize the targets as a network graph.')
+        import visualization
+
+        visualization.Visualizer().create_visualization_image(
+            merged['ipv4'], merged['cidr'], merged['fqdn'], merged['url'], visualize
+        )
+        return
+
+    verbose.SILENT = False
+    print.Printer.print_results(
+        'json' if json else 'csv' if csv else 'tsv' if tsv else 'table',
+        merged['ipv4'],
+        merged['cidr'],
+        merged['fqdn'],
+        merged['url'],
+        [],
+    )
+
+
+@cli.command(
+    'serve',
+    context_settings=CONTEXT_SETTINGS,
+    cls=utils.CustomCommand,
+)
+@click.option(
+    '-no-color',
+    help='Disable colors in CLI output.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-silent',
+    help='Display only results in output.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-debug',
+    help='Display debug messages.',
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DEBUG',
+)
+@click.option(
+    '-socket',
+    'socket_path',
+    help='Listen on this Unix socket (default: $SCOPEZ_SOCKET or a per-user socket in the temp directory).',
+    type=str,
+    default='',
+    cls=utils.CustomOption,
+    category='DAEMON',
+)
+@click.option(
+    '-threads',
+    help='The max number of worker threads.',
+    type=click.IntRange(min=1),
+    default=10,
+    cls=utils.CustomOption,
+    category='DAEMON',
+)
+@click.option(
+    '-adaptive',
+    help="Adapt the DNS, RDAP, ping and HTTP concurrency to their latency and errors, from '-threads'.",
+    is_flag=True,
+    cls=utils.CustomOption,
+    category='DAEMON',
+)
+@click.option(
+    '-target-timeout',
+    help="Abandon the remaining stages of a target after this long, e.g. '90s' or '5m' (0: never).",
+    type=str,
+    default='5m',
+    callback=validation.validate_duration,
+    cls=utils.CustomOption,
+    category='DAEMON',
+)
+@click.option(
+    '-max-requests',
+    help='The max number of batches that are analyzed at the same time. The rest wait for their turn.',
+    type=click.IntRange(min=1),
+    default=4,
+    cls=utils.CustomOption,
+    category='DAEMON',
+)
+@click.option(
+    '-freshness',
+    help="How long the cached results stay fresh per stage (default: 'rdap=7d,dns=1h,ping=1h,http=1h').",
+    type=str,
+    default='rdap=7d,dns=1h,ping=1h,http=1h',
+    callback=validation.validate_freshness,
+    cls=utils.CustomOption,
+    category='DAEMON',
+)
+def serve(
+    no_color: bool,
+    silent: bool,
+    debug: bool,
+    socket_path: str,
+    threads: int,
+    adaptive: bool,
+    target_timeout: float,
+    max_requests: int,
+    freshness: str,
+) -> None:
+    """Keep the analysis warm in a daemon, which the CLI runs reuse over a Unix socket.
+
+    The GeoIP index and the recent results stay in memory, so repeated lookups skip the DNS, RDAP, ping and HTTP
+    queries for as long as they are fresh. The geoip database is reloaded whenever its file changes.
+    """
+    import asyncio
+
+    import api
+    import daemon
+
+    verbose.SILENT = silent
+    verbose.HIGHLIGHT = False
+    verbose.SOFT_WRAP = True
+    verbose.DEBUG = debug
+    verbose.CONSOLE = rich.console.Console(no_color=no_color)
+
+    geoip_filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geoip2-ipv4.csv')
+    if not validation._file_exists(geoip_filepath):
+        raise click.ClickException("The geoip database is missing. Run 'scopez' once to download it.")
+
+    scanner = api.Scanner(
+        concurrency=threads,
+        freshness=freshness,
+        geoip_filepath=geoip_filepath,
+        adaptive=adaptive,
+        target_timeout=target_timeout,
+    )
+    server = daemon.Daemon(scanner, geoip_filepath, max_requests)
+    verbose.start()
+    try:
+        asyncio.run(server.serve(socket_path or daemon.SOCKET_PATH))
+    except daemon.DaemonError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        verbose.info("'Ctrl+C!' was pressed. Exit.")
+    finally:
+        verbose.stop(timeout=1.0)
+        scanner.close()
 
 
 if __name__ == '__main__':
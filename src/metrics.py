@@ -0,0 +1,237 @@
+import rich.console
+import rich.table
+
+import bisect
+import contextlib
+import json
+import threading
+import time
+import typing
+
+
+# Upper bounds (seconds) of the latency histogram buckets: 0.1ms, 0.2ms, ... ~105s.
+BUCKETS = [0.0001 * 2**i for i in range(21)]
+
+
+class Histogram:
+    """A latency histogram with logarithmic buckets."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.min = seconds if self.count == 0 else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p: float) -> float:
+        """Estimates the `p`th percentile as the upper bound of the bucket that contains it."""
+        if self.count == 0:
+            return 0.0
+
+        rank = p / 100 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c > 0:
+                return min(BUCKETS[i] if i < len(BUCKETS) else self.max, self.max)
+
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'min': round(self.min, 6),
+            'max': round(self.max, 6),
+            'p50': round(self.percentile(50), 6),
+            'p90': round(self.percentile(90), 6),
+            'p99': round(self.percentile(99), 6),
+        }
+
+
+class StageMetrics:
+    """The counters, gauges and latencies of a single analysis stage (e.g. 'dns' or 'rdap')."""
+
+    def __init__(self):
+        self.calls = 0
+        self.outcomes: dict[str, int] = {}
+        self.retries = 0
+        self.cache_hits = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.limit: int | None = None
+        self.latency = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            'calls': self.calls,
+            'outcomes': dict(self.outcomes),
+            'retries': self.retries,
+            'cache_hits': self.cache_hits,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'limit': self.limit,
+            'latency': self.latency.snapshot(),
+        }
+
+
+class Span:
+    """A single, in-progress stage call. The caller may set its `outcome` (default: 'ok', or 'error' on exceptions)."""
+
+    def __init__(self, stage: str, target: str):
+        self.stage = stage
+        self.target = target
+        self.outcome: str | None = None
+        self.args: dict[str, typing.Any] = {}
+        self.thread = threading.current_thread()
+        self.start = time.perf_counter()
+
+
+class Metrics:
+    """Thread-safe performance metrics of the analysis stages."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._stages: dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+        self.observers: list[typing.Callable[[Span, float], None]] = []
+
+    @contextlib.contextmanager
+    def track(self, stage: str, target: str = '') -> typing.Iterator[Span]:
+        """
+        Measures a call of a stage.
+
+        Args:
+            stage (str): The name of the stage.
+            target (str): The target that the call is made for.
+
+        Yields:
+            Span: The call, whose `outcome` the caller may set.
+
+        """
+        span = Span(stage, target)
+        with self._lock:
+            s = self._stage(stage)
+            s.in_flight += 1
+            s.max_in_flight = max(s.max_in_flight, s.in_flight)
+
+        try:
+            yield span
+        except BaseException:
+            span.outcome = span.outcome or 'error'
+            raise
+        finally:
+            elapsed = time.perf_counter() - span.start
+            outcome = span.outcome or 'ok'
+            with self._lock:
+                s = self._stage(stage)
+                s.in_flight -= 1
+                s.calls += 1
+                s.outcomes[outcome] = s.outcomes.get(outcome, 0) + 1
+                s.latency.observe(elapsed)
+            span.outcome = outcome
+            for observer in self.observers:
+                observer(span, elapsed)
+
+    def retry(self, stage: str) -> None:
+        with self._lock:
+            self._stage(stage).retries += 1
+
+    def cache_hit(self, stage: str) -> None:
+        with self._lock:
+            self._stage(stage).cache_hits += 1
+
+    def set_limit(self, stage: str, limit: int) -> None:
+        """Publishes the current concurrency limit of an adaptive stage."""
+        with self._lock:
+            self._stage(stage).limit = limit
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'time': round(time.time(), 3),
+                'uptime': round(time.time() - self.started, 3),
+                'stages': {name: s.snapshot() for name, s in sorted(self._stages.items())},
+            }
+
+    def print_summary(self, console: rich.console.Console) -> None:
+        """Prints a table with the metrics of every stage."""
+        t = rich.table.Table(box=rich.box.ASCII, title='Stage Metrics')
+
+        t.add_column('Stage')
+        t.add_column('Calls')
+        t.add_column('Outcomes')
+        t.add_column('Retries')
+        t.add_column('Cache Hits')
+        t.add_column('Max In-Flight')
+        t.add_column('Limit')
+        t.add_column('p50')
+        t.add_column('p99')
+        t.add_column('Max')
+        t.add_column('Total Time')
+
+        for name, s in self.snapshot()['stages'].items():
+            latency = s['latency']
+            t.add_row(
+                name,
+                str(s['calls']),
+                ' '.join(f'{k}={v}' for k, v in sorted(s['outcomes'].items())),
+                str(s['retries']),
+                str(s['cache_hits']),
+                str(s['max_in_flight']),
+                str(s['limit']) if s['limit'] is not None else '-',
+                _format_seconds(latency['p50']),
+                _format_seconds(latency['p99']),
+                _format_seconds(latency['max']),
+                _format_seconds(latency['sum']),
+            )
+
+        console.print(t)
+
+    def _stage(self, stage: str) -> StageMetrics:
+        s = self._stages.get(stage)
+        if s is None:
+            s = self._stages[stage] = StageMetrics()
+        return s
+
+
+class SnapshotWriter:
+    """Appends periodic JSON snapshots of the metrics to a file in a background thread."""
+
+    def __init__(self, metrics: Metrics, filepath: str, interval: float = 5.0):
+        self.metrics = metrics
+        self.filepath = filepath
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-snapshots', daemon=True)
+
+    def start(self) -> 'SnapshotWriter':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the thread and writes a final snapshot."""
+        self._stop.set()
+        self._thread.join()
+        self._write()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def _write(self) -> None:
+        with open(self.filepath, 'a') as f:
+            f.write(json.dumps(self.metrics.snapshot()) + '\n')
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f'{seconds:.2f}s'
+    return f'{seconds * 1000:.1f}ms'
@@ -7,31 +7,40 @@ class CIDR(pydantic.BaseModel):
     cidr: str = ''
     number_of_hosts: int = 0
     visibility: str = ''
-    asn_country_code: str = ''
+    asn_country_code: typing.Optional[str] = ''
     asn_description: str = ''
     asn_network: str = ''
-    geoip_continent: str = ''
-    geoip_country: str = ''
+    geoip_continent: typing.Optional[str] = ''
+    geoip_country: typing.Optional[str] = ''
+    timed_out: list[str] = []
+    rdap_checked_at: float = 0.0
 
 
 class IPV4(pydantic.BaseModel):
     type: str = 'ipv4'
     ipv4: str = ''
     visibility: str = ''
-    asn_country_code: str = ''
+    asn_country_code: typing.Optional[str] = ''
     asn_description: str = ''
     asn_network: str = ''
-    geoip_continent: str = ''
-    geoip_country: str = ''
+    geoip_continent: typing.Optional[str] = ''
+    geoip_country: typing.Optional[str] = ''
+    cdn: str = ''
     pingable: bool = False
+    timed_out: list[str] = []
+    rdap_checked_at: float = 0.0
+    ping_checked_at: float = 0.0
 
 
 class FQDN(pydantic.BaseModel):
     type: str = 'fqdn'
     fqdn: str = ''
-    dns_chain: list[str] = ''
+    dns_chain: list[str] = []
     hosts_found: bool = False
     destination_ips: list[IPV4] = []
+    cdn: str = ''
+    timed_out: list[str] = []
+    dns_checked_at: float = 0.0
 
 
 class URL(pydantic.BaseModel):
@@ -40,10 +49,19 @@ class URL(pydantic.BaseModel):
     scheme: str = ''
     username: str = ''
     password: str = ''
-    port: int = ''
+    port: int = 0
     path: str = ''
     reachable: bool = False
+    status_code: int = 0
+    server: str = ''
+    redirects: list[str] = []
+    tls_subject: str = ''
+    tls_sans: list[str] = []
+    tls_expires_at: float = 0.0
+    cdn: str = ''
     fqdn: FQDN = None
+    timed_out: list[str] = []
+    http_checked_at: float = 0.0
 
 
 class GeoIPRecord(pydantic.BaseModel):
@@ -1,10 +1,48 @@
 import rich.table
 import rich.json
 
+import contextlib
+import csv
+import io
+import sys
+import time
+import typing
+
+import pydantic_core
+
 import models
 import verbose
 
 
+# The columns of the CSV/TSV output. Every target is a row, except for the FQDNs and URLs, which get a row per
+# destination IP.
+CSV_COLUMNS = [
+    'type',
+    'target',
+    'dns_chain',
+    'ipv4',
+    'number_of_hosts',
+    'visibility',
+    'asn_country_code',
+    'asn_description',
+    'asn_network',
+    'geoip_continent',
+    'geoip_country',
+    'pingable',
+    'reachable',
+    'status_code',
+    'server',
+    'redirects',
+    'tls_subject',
+    'tls_sans',
+    'tls_expires_at',
+    'cdn',
+    'timed_out',
+]
+CSV_BUFFER_SIZE = 1 << 20
+JSONL_FLUSH_SIZE = 1 << 16
+
+
 class Printer:
     """Prints the target's analysis' results in various formats."""
 
@@ -12,10 +50,120 @@ class Printer:
     # ALL
     #
 
+    @staticmethod
+    def print_results(
+        output_format: str,
+        ipv4s: list[models.IPV4],
+        cidrs: list[models.CIDR],
+        fqdns: list[models.FQDN],
+        urls: list[models.URL],
+        invalids: list[str],
+    ) -> None:
+        """
+        Prints all the results in one of the output formats.
+
+        Args:
+            output_format (str): 'table', 'json', 'csv' or 'tsv'.
+            ipv4s (list[models.IPV4]): The analyzed IPs.
+            cidrs (list[models.CIDR]): The analyzed CIDRs.
+            fqdns (list[models.FQDN]): The analyzed FQDNs.
+            urls (list[models.URL]): The analyzed URLs.
+            invalids (list[str]): The targets that could not be parsed.
+
+        """
+        if output_format in ('csv', 'tsv'):
+            Printer.print_as_csv(ipv4s, cidrs, fqdns, urls, invalids, delimiter=',' if output_format == 'csv' else '\t')
+            return
+
+        if len(ipv4s) > 0:
+            if output_format == 'json':
+                Printer.print_as_json(ipv4s)
+            else:
+                Printer.print_ipv4s_as_table(ipv4s)
+        if len(cidrs) > 0:
+            if output_format == 'json':
+                Printer.print_as_json(cidrs)
+            else:
+                Printer.print_cidrs_as_table(cidrs)
+        if len(fqdns) > 0:
+            if output_format == 'json':
+                Printer.print_as_json(fqdns)
+            else:
+                Printer.print_fqdns_as_table(fqdns)
+        if len(urls) > 0:
+            if output_format == 'json':
+                Printer.print_as_json(urls)
+            else:
+                Printer.print_urls_as_table(urls)
+        if len(invalids) > 0:
+            Printer.print_invalids_as_table(invalids)
+
+    @staticmethod
+    def print_as_csv(
+        ipv4s: list[models.IPV4],
+        cidrs: list[models.CIDR],
+        fqdns: list[models.FQDN],
+        urls: list[models.URL],
+        invalids: list[str],
+        delimiter: str = ',',
+    ) -> None:
+        """
+        Writes all the results as CSV (see `CSV_COLUMNS`) straight to the stdout, through a large buffer and without
+        Rich, so that millions of rows are written at disk speed. A stdout without a file descriptor (e.g. a
+        `io.StringIO`) is written to as is.
+
+        """
+        if verbose.SILENT:
+            return
+
+        # Whatever the console printed before must come first.
+        sys.stdout.flush()
+        try:
+            stdout = open(
+                sys.stdout.fileno(), 'w', buffering=CSV_BUFFER_SIZE, encoding='utf-8', newline='', closefd=False
+            )
+        except (AttributeError, io.UnsupportedOperation):
+            stdout = contextlib.nullcontext(sys.stdout)
+        with stdout as out:
+            writer = csv.writer(out, delimiter=delimiter)
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(_csv_rows(ipv4s, cidrs, fqdns, urls, invalids))
+
     @staticmethod
     def print_as_json(targets: list[any]) -> None:
+        """
+        Prints the targets as JSON lines. A terminal gets them highlighted by Rich, while a pipe or a file gets the raw
+        JSON bytes of pydantic, written to the stdout in batches of `JSONL_FLUSH_SIZE` bytes.
+
+        """
+        if verbose.SILENT:
+            return
+
+        if sys.stdout.isatty():
+            for t in targets:
+                verbose.normal(rich.json.JSON(t.model_dump_json(), indent=None))
+            return
+
+        # Whatever the console printed before must come first.
+        sys.stdout.flush()
+        try:
+            out = sys.stdout.buffer
+        except (AttributeError, io.UnsupportedOperation):
+            # A stdout without a binary buffer (e.g. a `io.StringIO`) gets the JSON as text.
+            for t in targets:
+                sys.stdout.write(t.model_dump_json() + '\n')
+            sys.stdout.flush()
+            return
+
+        batch = bytearray()
         for t in targets:
-            verbose.normal(rich.json.JSON(t.model_dump_json(), indent=None))
+            batch += pydantic_core.to_json(t)
+            batch += b'\n'
+            if len(batch) >= JSONL_FLUSH_SIZE:
+                out.write(batch)
+                batch.clear()
+        out.write(batch)
+        out.flush()
 
     #
     # CIDRs
@@ -70,6 +218,7 @@ class Printer:
         t.add_column('ASN Network')
         t.add_column('GeoIP Continent')
         t.add_column('GeoIP Country')
+        t.add_column('CDN')
         t.add_column('Pingable')
 
         for ipv4 in ipv4s:
@@ -81,6 +230,7 @@ class Printer:
                 ipv4.asn_network,
                 ipv4.geoip_continent,
                 ipv4.geoip_country,
+                ipv4.cdn,
                 'yes' if ipv4.pingable else 'no',
             )
 
@@ -113,6 +263,7 @@ class Printer:
         t.add_column('ASN Network')
         t.add_column('GeoIP Continent')
         t.add_column('GeoIP Country')
+        t.add_column('CDN')
         t.add_column('Pingable')
 
         for fqdn in fqdns:
@@ -126,6 +277,7 @@ class Printer:
                         ip.asn_network,
                         ip.geoip_continent,
                         ip.geoip_country,
+                        ip.cdn or fqdn.cdn,
                         'yes' if ip.pingable else 'no',
                     )
             else:
@@ -137,6 +289,7 @@ class Printer:
                     'N/A',
                     'N/A',
                     'N/A',
+                    fqdn.cdn or 'N/A',
                     'N/A',
                 )
 
@@ -170,8 +323,10 @@ class Printer:
         t.add_column('ASN Network')
         t.add_column('GeoIP Continent')
         t.add_column('GeoIP Country')
+        t.add_column('CDN')
         t.add_column('Pingable')
         t.add_column('Reachable')
+        t.add_column('Status')
 
         for url in urls:
             if url.fqdn.hosts_found:
@@ -184,8 +339,10 @@ class Printer:
                         ip.asn_network,
                         ip.geoip_continent,
                         ip.geoip_country,
+                        ip.cdn or url.cdn,
                         'yes' if ip.pingable else 'no',
                         'yes' if url.reachable else 'no',
+                        str(url.status_code or 'N/A'),
                     )
             else:
                 t.add_row(
@@ -196,6 +353,8 @@ class Printer:
                     'N/A',
                     'N/A',
                     'N/A',
+                    url.cdn or 'N/A',
+                    'N/A',
                     'N/A',
                     'N/A',
                 )
@@ -234,3 +393,108 @@ class Printer:
     def print_invalids_as_raw(invalids: list[str]) -> None:
         for invalid in invalids:
             verbose.normal(f'[white]invalid[/white],[red]{invalid}[/red]')
+
+
+def _csv_rows(
+    ipv4s: list[models.IPV4],
+    cidrs: list[models.CIDR],
+    fqdns: list[models.FQDN],
+    urls: list[models.URL],
+    invalids: list[str],
+) -> typing.Iterator[list]:
+    for ip in ipv4s:
+        yield [
+            'ipv4',
+            ip.ipv4,
+            '',
+            ip.ipv4,
+            '',
+            *_network_cells(ip),
+            _yes_no(ip.pingable),
+            *_http_cells(None),
+            ip.cdn,
+            _stages(ip.timed_out),
+        ]
+
+    for c in cidrs:
+        yield [
+            'cidr',
+            c.cidr,
+            '',
+            '',
+            c.number_of_hosts,
+            *_network_cells(c),
+            '',
+            *_http_cells(None),
+            '',
+            _stages(c.timed_out),
+        ]
+
+    for f in fqdns:
+        yield from _resolution_rows('fqdn', f.fqdn, f, None, [])
+
+    for u in urls:
+        yield from _resolution_rows('url', u.url, u.fqdn, u, u.timed_out)
+
+    for invalid in invalids:
+        yield ['invalid', invalid] + [''] * (len(CSV_COLUMNS) - 2)
+
+
+def _resolution_rows(
+    kind: str, target: str, fqdn: models.FQDN, url: models.URL | None, timed_out: list[str]
+) -> typing.Iterator[list]:
+    chain = ' > '.join(fqdn.dns_chain)
+    http = _http_cells(url)
+    timed_out = fqdn.timed_out + timed_out
+    if fqdn.hosts_found:
+        for ip in fqdn.destination_ips:
+            stages = _stages(timed_out + ip.timed_out)
+            yield [
+                kind,
+                target,
+                chain,
+                ip.ipv4,
+                '',
+                *_network_cells(ip),
+                _yes_no(ip.pingable),
+                *http,
+                # Every IP is classified on its own, e.g. when a name resolves to the IPs of several providers.
+                ip.cdn or fqdn.cdn,
+                stages,
+            ]
+    else:
+        yield [kind, target, chain, '', '', '', '', '', '', '', '', '', *http, fqdn.cdn, _stages(timed_out)]
+
+
+def _network_cells(result: models.IPV4 | models.CIDR) -> list:
+    return [
+        result.visibility,
+        result.asn_country_code or '',
+        result.asn_description,
+        result.asn_network,
+        result.geoip_continent or '',
+        result.geoip_country or '',
+    ]
+
+
+def _http_cells(url: models.URL | None) -> list:
+    """The `reachable` to `tls_expires_at` cells, which are empty for the targets that are not URLs."""
+    if url is None:
+        return [''] * 7
+    return [
+        _yes_no(url.reachable),
+        url.status_code or '',
+        url.server,
+        ' > '.join(url.redirects),
+        url.tls_subject,
+        ' '.join(url.tls_sans),
+        time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(url.tls_expires_at)) if url.tls_expires_at else '',
+    ]
+
+
+def _stages(stages: list[str]) -> str:
+    return ' '.join(dict.fromkeys(stages))
+
+
+def _yes_no(value: bool) -> str:
+    return 'yes' if value else 'no'
@@ -0,0 +1,102 @@
+import ipaddress
+import math
+import threading
+import time
+
+
+class RangeCache:
+    """The RDAP replies of a run by the address range of their network, so that an address within a range that was
+    already looked up needs no query of its own.
+
+    The AS fields of an `ipwhois` reply (`asn_description`, `asn_country_code`, ...) come from the ASN lookup of the
+    queried address and are only valid within its `asn_cidr`, which can be much smaller than the RDAP network (e.g.
+    8.8.8.0/24 within 8.0.0.0/9). So such a reply is only stored under the part of its network range that is also
+    within its `asn_cidr`.
+
+    A range is stored as the CIDRs that it spans (most ranges are a single CIDR), in a hash table per prefix length
+    that is searched from the longest prefix to the shortest, as in `cdn.CDNIndex`. So the most specific network wins
+    when ranges nest.
+    """
+
+    def __init__(self, max_age: float = math.inf):
+        """
+        Creates an empty cache.
+
+        Args:
+            max_age (float): The seconds after which a reply is stale and no longer returned, e.g. in a long-lived
+                `api.Scanner`. Stale replies are evicted, so the cache does not grow without bound.
+
+        """
+        self.max_age = max_age
+        self._networks: dict[int, dict[int, tuple[float, dict]]] = {}
+        self._lengths: list[int] = []
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return sum(len(networks) for networks in self._networks.values())
+
+    def add(self, reply: dict) -> bool:
+        """
+        Stores an RDAP reply (in the `ipwhois` format) under the range of its network, limited to its `asn_cidr` if
+        the reply has one.
+
+        Args:
+            reply (dict): The reply, whose `network` has a `start_address` and an `end_address`.
+
+        Returns:
+            bool: `False` if the reply has no (IPv4) range, or its `asn_cidr` is unknown or does not overlap with it, in
+                which case it is not stored.
+
+        """
+        network = reply.get('network') or {}
+        try:
+            first = ipaddress.IPv4Address(network.get('start_address'))
+            last = ipaddress.IPv4Address(network.get('end_address'))
+            if 'asn_cidr' in reply:
+                asn_cidr = ipaddress.IPv4Network(reply['asn_cidr'], strict=False)
+                first = max(first, asn_cidr.network_address)
+                last = min(last, asn_cidr.broadcast_address)
+        except (TypeError, ValueError):
+            return False
+        if first > last:
+            return False
+
+        added = time.monotonic()
+        with self._lock:
+            # Every stale reply is evicted once per `max_age`, also those of the ranges that are not looked up again.
+            if added - self._pruned_at >= self.max_age:
+                self._prune(added)
+            for n in ipaddress.summarize_address_range(first, last):
+                self._networks.setdefault(n.prefixlen, {})[int(n.network_address)] = (added, reply)
+            self._lengths = sorted(self._networks, reverse=True)
+
+        return True
+
+    def get(self, address: str | ipaddress.IPv4Address) -> dict | None:
+        """Returns the reply of the most specific (fresh) range that contains the address, if any. The stale replies
+        that it finds on the way are evicted."""
+        value = int(ipaddress.IPv4Address(address))
+        now = time.monotonic()
+        for length in self._lengths:
+            networks = self._networks.get(length, {})
+            key = value & (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+            found = networks.get(key)
+            if found is None:
+                continue
+            if now - found[0] < self.max_age:
+                return found[1]
+            with self._lock:
+                if networks.get(key) is found:
+                    del networks[key]
+        return None
+
+    def _prune(self, now: float) -> None:
+        """Evicts every stale reply. Must be called with the lock held."""
+        for length, networks in list(self._networks.items()):
+            for key in [k for k, (added, _) in networks.items() if now - added >= self.max_age]:
+                del networks[key]
+            if not networks:
+                del self._networks[length]
+        self._lengths = sorted(self._networks, reverse=True)
+        self._pruned_at = now
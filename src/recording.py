@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import typing
+
+
+# The stages whose external responses are recorded, each in a `<stage>.jsonl` file of the recording directory.
+STAGES = ('dns', 'rdap', 'ping', 'http')
+
+_OPEN_RECORDERS: list['Recorder'] = []
+
+
+class Recorder:
+    """Records every external response of an analysis (DNS answers, RDAP replies, ping and HTTP probe results), so
+    that a `Replayer` can serve them to a later run instead of the network.
+
+    Every response is a JSON line of the file of its stage: the `key` of the request (e.g. 'example.com A'), the
+    `latency` of the response in seconds and the fields of the response. A request that was sent several times (e.g.
+    retried after a timeout) has a line per response, in order. Lines are written as they complete, so an interrupted
+    recording stays readable. A new recording replaces the one already in the directory, so that a replay serves the
+    responses of a single run.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Creates the recording directory (if needed) and truncates the file of every stage.
+
+        Args:
+            directory (str): The recording directory.
+
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = {stage: open(os.path.join(directory, f'{stage}.jsonl'), 'w') for stage in STAGES}
+        self._lock = threading.Lock()
+        _OPEN_RECORDERS.append(self)
+
+    def record(self, stage: str, key: str, latency: float, response: dict) -> None:
+        """Appends a response of a stage to the recording."""
+        line = json.dumps({'key': key, 'latency': round(latency, 6), **response}) + '\n'
+
+        with self._lock:
+            f = self._files[stage]
+            if f.closed:
+                return
+            f.write(line)
+            f.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+
+        if self in _OPEN_RECORDERS:
+            _OPEN_RECORDERS.remove(self)
+
+
+class Replayer:
+    """Serves the responses of a `Recorder` recording instead of the network.
+
+    The responses to a request are served in the order in which they were recorded. A request that has no (further)
+    response was not sent by the recorded run (e.g. because its deadline expired first, or because the targets differ),
+    and is counted in `misses`.
+    """
+
+    def __init__(self, directory: str, latency: bool = False):
+        """
+        Loads a recording.
+
+        Args:
+            directory (str): The recording directory.
+            latency (bool): Whether the responses are served after their recorded latency, or at once.
+
+        Raises:
+            FileNotFoundError: If the directory does not exist.
+
+        """
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"no recording at '{directory}'")
+
+        self.directory = directory
+        self.latency = latency
+        self.misses = 0
+        self._responses: dict[tuple[str, str], list[dict]] = {}
+        self._served: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+        for stage in STAGES:
+            filepath = os.path.join(directory, f'{stage}.jsonl')
+            if not os.path.exists(filepath):
+                continue
+            with open(filepath) as f:
+                for line in f:
+                    if line.strip() == '':
+                        continue
+                    try:
+                        response = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Cut off by an interrupted recording.
+                    self._responses.setdefault((stage, response.pop('key')), []).append(response)
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self._responses.values())
+
+    def responses(self, stage: str) -> typing.Iterator[dict]:
+        """Yields every recorded response of a stage."""
+        for (s, _), responses in self._responses.items():
+            if s == stage:
+                yield from responses
+
+    def next(self, stage: str, key: str) -> dict | None:
+        """Returns the next recorded response (with its `latency`) to a request of a stage, or `None` if there is none."""
+        with self._lock:
+            responses = self._responses.get((stage, key), [])
+            served = self._served.get((stage, key), 0)
+            if served >= len(responses):
+                self.misses += 1
+                return None
+            self._served[(stage, key)] = served + 1
+            return responses[served]
+
+
+def close_all() -> None:
+    """Closes every open recording, e.g. right before the process is terminated."""
+    for r in list(_OPEN_RECORDERS):
+        r.close()
@@ -0,0 +1,97 @@
+import pydantic
+
+import json
+import typing
+
+import models
+
+
+MODELS: dict[str, type[pydantic.BaseModel]] = {
+    'ipv4': models.IPV4,
+    'cidr': models.CIDR,
+    'fqdn': models.FQDN,
+    'url': models.URL,
+}
+
+
+def key(result: pydantic.BaseModel) -> str:
+    """
+    Returns the raw target that produced a result (e.g. the IP address of a `models.IPV4`).
+
+    Args:
+        result (pydantic.BaseModel): An analysis result.
+
+    Returns:
+        str: The raw target.
+
+    """
+    return getattr(result, result.type)
+
+
+def parse(line: str | bytes) -> pydantic.BaseModel:
+    """
+    Parses a single JSON line, as written by the `-json` output, back into its model.
+
+    Args:
+        line (str | bytes): A JSON object with a `type` field.
+
+    Returns:
+        pydantic.BaseModel: The result model.
+
+    """
+    data = json.loads(line)
+    return MODELS[data['type']].model_validate(data)
+
+
+def read_jsonl(filepath: str) -> typing.Iterator[pydantic.BaseModel]:
+    """
+    Reads the results of a JSON lines file.
+
+    Blank lines and lines that cannot be parsed (e.g. the last line of a file that was being written when the process
+    crashed) are skipped.
+
+    Args:
+        filepath (str): The path to the JSON lines file.
+
+    Yields:
+        pydantic.BaseModel: The result models.
+
+    """
+    with open(filepath, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield parse(line)
+            except (ValueError, KeyError):
+                continue
+
+
+def checked_at(result: pydantic.BaseModel) -> float:
+    """Returns when the result was last checked, i.e. its most recent `*_checked_at` timestamp."""
+    return max((v for k, v in result if k.endswith('_checked_at')), default=0.0)
+
+
+def merge(filepaths: list[str]) -> list[pydantic.BaseModel]:
+    """
+    Merges the JSON lines outputs of several runs (e.g. of `-shard`) into one result set.
+
+    Every target is kept once, with its most recently checked result. The results are ordered by type (as in `MODELS`)
+    and then by target.
+
+    Args:
+        filepaths (list[str]): The JSON lines files.
+
+    Returns:
+        list[pydantic.BaseModel]: The merged results.
+
+    """
+    merged: dict[tuple[str, str], pydantic.BaseModel] = {}
+    for filepath in filepaths:
+        for r in read_jsonl(filepath):
+            k = (r.type, key(r))
+            if k not in merged or checked_at(r) >= checked_at(merged[k]):
+                merged[k] = r
+
+    order = {t: i for i, t in enumerate(MODELS)}
+    return [merged[k] for k in sorted(merged, key=lambda k: (order[k[0]], k[1]))]
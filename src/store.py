@@ -0,0 +1,257 @@
+import pydantic
+
+import array
+import threading
+import types
+import typing
+
+
+# String fields that are (nearly) unique per result. They are packed into a contiguous byte buffer instead of
+# being interned, because a pool would only add a dictionary entry per value.
+TEXT_FIELDS = {'ipv4', 'cidr', 'fqdn', 'url', 'path'}
+# The byte of a `None` in a boolean column.
+BOOL_NONE = 2
+
+
+class _NullMask:
+    """Marks the rows whose value is `None`. The mask is only allocated once the first `None` is appended, so a column
+    without any costs nothing."""
+
+    def __init__(self):
+        self._nulls: bytearray | None = None
+
+    def append(self, row: int, value: typing.Any) -> None:
+        if value is None and self._nulls is None:
+            self._nulls = bytearray(row)
+        if self._nulls is not None:
+            self._nulls.append(value is None)
+
+    def is_null(self, index: int) -> bool:
+        return self._nulls is not None and bool(self._nulls[index])
+
+
+class StringPool:
+    """Interns repeated strings (e.g. 'Public', country names, ASN descriptions) and hands out integer codes."""
+
+    def __init__(self):
+        self._codes: dict[str, int] = {}
+        self._values: list[str | None] = [None]  # Code 0 is reserved for `None`.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def encode(self, value: str | None) -> int:
+        if value is None:
+            return 0
+
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._values)
+                    self._values.append(value)
+                    self._codes[value] = code
+
+        return code
+
+    def decode(self, code: int) -> str | None:
+        return self._values[code]
+
+
+class _TextColumn:
+    """Unique strings packed back-to-back into a single UTF-8 buffer."""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._ends = array.array('Q')
+        self._nulls = _NullMask()
+
+    def append(self, value: str | None) -> None:
+        self._nulls.append(len(self._ends), value)
+        self._data += (value or '').encode()
+        self._ends.append(len(self._data))
+
+    def get(self, index: int) -> str | None:
+        if self._nulls.is_null(index):
+            return None
+        start = self._ends[index - 1] if index > 0 else 0
+        return self._data[start : self._ends[index]].decode()
+
+
+class _CategoryColumn:
+    """Repeated strings stored as codes into the shared `StringPool`."""
+
+    def __init__(self, pool: StringPool):
+        self._pool = pool
+        self._codes = array.array('I')
+
+    def append(self, value: str | None) -> None:
+        self._codes.append(self._pool.encode(value))
+
+    def get(self, index: int) -> str | None:
+        return self._pool.decode(self._codes[index])
+
+
+class _CategoryListColumn:
+    """A `list[str]` per row (e.g. a DNS chain) stored as pooled codes plus row boundaries."""
+
+    def __init__(self, pool: StringPool):
+        self._pool = pool
+        self._codes = array.array('I')
+        self._ends = array.array('Q')
+
+    def append(self, value: list[str] | None) -> None:
+        self._codes.extend(self._pool.encode(v) for v in value or [])
+        self._ends.append(len(self._codes))
+
+    def get(self, index: int) -> list[str]:
+        start = self._ends[index - 1] if index > 0 else 0
+        return [self._pool.decode(c) for c in self._codes[start : self._ends[index]]]
+
+
+class _BoolColumn:
+    def __init__(self):
+        self._data = bytearray()
+
+    def append(self, value: bool | None) -> None:
+        self._data.append(BOOL_NONE if value is None else 1 if value else 0)
+
+    def get(self, index: int) -> bool | None:
+        value = self._data[index]
+        return None if value == BOOL_NONE else bool(value)
+
+
+class _NumberColumn:
+    def __init__(self, typecode: str, cast: typing.Callable):
+        self._data = array.array(typecode)
+        self._cast = cast
+        self._nulls = _NullMask()
+
+    def append(self, value: int | float | None) -> None:
+        self._nulls.append(len(self._data), value)
+        self._data.append(self._cast(value or 0))
+
+    def get(self, index: int) -> int | float | None:
+        if self._nulls.is_null(index):
+            return None
+        return self._data[index]
+
+
+class _ModelColumn:
+    """A nested, optional model stored as a row index into a nested `ResultStore`."""
+
+    def __init__(self, store: 'ResultStore'):
+        self._store = store
+        self._rows = array.array('q')
+
+    def append(self, value: pydantic.BaseModel | None) -> None:
+        if value is None:
+            self._rows.append(-1)
+        else:
+            self._rows.append(len(self._store))
+            self._store.append(value)
+
+    def get(self, index: int) -> pydantic.BaseModel | None:
+        row = self._rows[index]
+        return None if row < 0 else self._store[row]
+
+
+class _ModelListColumn:
+    """A `list[Model]` per row (e.g. the destination IPs of a FQDN) stored as a nested `ResultStore`."""
+
+    def __init__(self, store: 'ResultStore'):
+        self._store = store
+        self._ends = array.array('Q')
+
+    def append(self, value: list[pydantic.BaseModel] | None) -> None:
+        for v in value or []:
+            self._store.append(v)
+        self._ends.append(len(self._store))
+
+    def get(self, index: int) -> list[pydantic.BaseModel]:
+        start = self._ends[index - 1] if index > 0 else 0
+        return [self._store[i] for i in range(start, self._ends[index])]
+
+
+class _ObjectColumn:
+    """Fallback for field types that have no compact representation."""
+
+    def __init__(self):
+        self._data = []
+
+    def append(self, value: typing.Any) -> None:
+        self._data.append(value)
+
+    def get(self, index: int) -> typing.Any:
+        return self._data[index]
+
+
+class ResultStore:
+    """Compact, column-oriented storage for analysis results.
+
+    The columns are derived from the fields of the pydantic `model_cls`. Results are decomposed on `append()` and are
+    turned back into pydantic models only when they are read, i.e. at the output boundary.
+    """
+
+    def __init__(self, model_cls: type[pydantic.BaseModel], pool: StringPool | None = None):
+        self.model_cls = model_cls
+        self.pool = pool if pool is not None else StringPool()
+        self._length = 0
+        self._lock = threading.RLock()
+        self._columns = {name: self._make_column(name, f.annotation) for name, f in model_cls.model_fields.items()}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> typing.Iterator[pydantic.BaseModel]:
+        for i in range(self._length):
+            yield self[i]
+
+    def __getitem__(self, index: int) -> pydantic.BaseModel:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('result store index out of range')
+
+        return self.model_cls.model_construct(**{name: c.get(index) for name, c in self._columns.items()})
+
+    def append(self, result: pydantic.BaseModel) -> None:
+        with self._lock:
+            for name, column in self._columns.items():
+                column.append(getattr(result, name))
+            self._length += 1
+
+    def extend(self, results: typing.Iterable[pydantic.BaseModel]) -> None:
+        for r in results:
+            self.append(r)
+
+    def _make_column(self, name: str, annotation: typing.Any):
+        origin = typing.get_origin(annotation)
+        args = typing.get_args(annotation)
+
+        # Optional[X] / X | None
+        if origin in (typing.Union, types.UnionType):
+            non_none = [a for a in args if a is not type(None)]
+            if len(non_none) == 1:
+                return self._make_column(name, non_none[0])
+            return _ObjectColumn()
+
+        if annotation is bool:
+            return _BoolColumn()
+        if annotation is int:
+            return _NumberColumn('q', int)
+        if annotation is float:
+            return _NumberColumn('d', float)
+        if annotation is str:
+            return _TextColumn() if name in TEXT_FIELDS else _CategoryColumn(self.pool)
+        if isinstance(annotation, type) and issubclass(annotation, pydantic.BaseModel):
+            return _ModelColumn(ResultStore(annotation, self.pool))
+        if origin is list and len(args) == 1:
+            if args[0] is str:
+                return _CategoryListColumn(self.pool)
+            if isinstance(args[0], type) and issubclass(args[0], pydantic.BaseModel):
+                return _ModelListColumn(ResultStore(args[0], self.pool))
+
+        return _ObjectColumn()
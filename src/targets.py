@@ -1,8 +1,12 @@
 import fqdn
 import pydantic
-import rich.panel
 
+import bisect
+import concurrent.futures
+import hashlib
 import ipaddress
+import mmap
+import os
 import sys
 import urllib.parse
 
@@ -36,24 +40,38 @@ class Targeter(pydantic.BaseModel):
         with file as f:
             for line in f:
                 val = line.strip()
-                if self._validate_ipv4(val):
-                    self.ipv4s.append(val)
-                elif self._validate_ipv4_with_port(val):
-                    self.ipv4s_with_port.append(val)
-                elif self._validate_ipv6(val):
-                    self.ipv6s.append(val)
-                elif self._validate_ipv6_with_port(val):
-                    self.ipv6s_with_port.append(val)
-                elif self._validate_fqdn(val):
-                    self.fqdns.append(val)
-                elif self._validate_fqdn_with_port(val):
-                    self.fqdns_with_port.append(val)
-                elif self._validate_cidr_ipv4(val):
-                    self.cidrs_v4.append(val)
-                elif self._validate_url(val):
-                    self.urls.append(val)
-                else:
-                    self.invalids.append(val)
+                getattr(self, self._classify(val)).append(val)
+
+        self._remove_duplicates()
+        self._sort_ascending()
+
+    def parse_targets_file_parallel(self, targets_filepath: str, workers: int, chunk_size: int = 16 << 20) -> None:
+        """
+        Parses the targets from a (huge) text file in a pool of worker processes.
+
+        The file is memory-mapped and split into chunks of about `chunk_size` bytes on newline boundaries. Every worker
+        maps the file itself and classifies the lines of its chunks, so only the byte offsets and the classified
+        targets cross the process boundary. Stdin and empty files are parsed serially.
+
+        Args:
+            targets_filepath (str): Path to file or "-" to read from stdin.
+            workers (int): The number of worker processes (at least 1).
+            chunk_size (int): The approximate size of a chunk in bytes.
+
+        """
+        if targets_filepath == '-' or os.path.getsize(targets_filepath) == 0:
+            self.parse_targets_file(targets_filepath)
+            return
+
+        with open(targets_filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Every worker gets at least one chunk, even of a small file.
+            chunks = _chunk_boundaries(mm, max(min(chunk_size, len(mm) // workers), 1))
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = executor.map(_parse_chunk, [targets_filepath] * len(chunks), *zip(*chunks))
+            for part in parts:
+                for name, values in part.items():
+                    getattr(self, name).extend(values)
 
         self._remove_duplicates()
         self._sort_ascending()
@@ -67,24 +85,7 @@ class Targeter(pydantic.BaseModel):
 
         """
         for val in targets_str.split(','):
-            if self._validate_ipv4(val):
-                self.ipv4s.append(val)
-            elif self._validate_ipv4_with_port(val):
-                self.ipv4s_with_port.append(val)
-            elif self._validate_ipv6(val):
-                self.ipv6s.append(val)
-            elif self._validate_ipv6_with_port(val):
-                self.ipv6s_with_port.append(val)
-            elif self._validate_fqdn(val):
-                self.fqdns.append(val)
-            elif self._validate_fqdn_with_port(val):
-                self.fqdns_with_port.append(val)
-            elif self._validate_cidr_ipv4(val):
-                self.cidrs_v4.append(val)
-            elif self._validate_url(val):
-                self.urls.append(val)
-            else:
-                self.invalids.append(val)
+            getattr(self, self._classify(val)).append(val)
 
         self._remove_duplicates()
         self._sort_ascending()
@@ -136,6 +137,97 @@ class Targeter(pydantic.BaseModel):
             else:
                 self._remove_from_list(self.invalids, val)
 
+    def discard(self, targets: set[str]) -> int:
+        """
+        Removes the given targets, e.g. the ones that have already been analyzed.
+
+        Args:
+            targets (set[str]): The raw targets to remove.
+
+        Returns:
+            int: The number of removed targets.
+
+        """
+        before = self.total_count()
+
+        self.ipv4s = [t for t in self.ipv4s if t not in targets]
+        self.cidrs_v4 = [t for t in self.cidrs_v4 if t not in targets]
+        self.fqdns = [t for t in self.fqdns if t not in targets]
+        self.urls = [t for t in self.urls if t not in targets]
+
+        return before - self.total_count()
+
+    def shard(self, index: int, count: int) -> int:
+        """
+        Keeps only the targets of one shard, so that `count` processes can split the same input without coordination.
+
+        Args:
+            index (int): The shard to keep, from 1 to `count`.
+            count (int): The number of shards.
+
+        Returns:
+            int: The number of removed targets.
+
+        """
+        before = self.total_count()
+
+        def keep(values: list[str]) -> list[str]:
+            return [v for v in values if shard_of(v, count) == index]
+
+        self.ipv4s = keep(self.ipv4s)
+        self.ipv4s_with_port = keep(self.ipv4s_with_port)
+        self.ipv6s = keep(self.ipv6s)
+        self.ipv6s_with_port = keep(self.ipv6s_with_port)
+        self.fqdns = keep(self.fqdns)
+        self.fqdns_with_port = keep(self.fqdns_with_port)
+        self.cidrs_v4 = keep(self.cidrs_v4)
+        self.cidrs_v6 = keep(self.cidrs_v6)
+        self.urls = keep(self.urls)
+        self.invalids = keep(self.invalids)
+
+        return before - self.total_count()
+
+    def collapse(self) -> dict[str, str]:
+        """
+        Finds the public IPs and CIDRs that lie within another CIDR of the targets, so that they can share its RDAP data.
+
+        Two CIDRs are either disjoint or nested, so the outermost CIDRs are disjoint address intervals. They are merged
+        out of the CIDRs sorted by their first address (and the largest first), after which the interval of any address
+        is found with `bisect`.
+
+        Returns:
+            dict[str, str]: The outermost CIDR of every covered IP and CIDR, and of every CIDR that covers one (itself).
+
+        """
+        networks = sorted(
+            (n for n in map(ipaddress.IPv4Network, self.cidrs_v4) if not n.is_private),
+            key=lambda n: (int(n.network_address), -n.num_addresses),
+        )
+
+        starts, ends, outermost = [], [], []
+        for n in networks:
+            if ends and int(n.broadcast_address) <= ends[-1]:
+                continue  # Nested in the previous outermost CIDR.
+            starts.append(int(n.network_address))
+            ends.append(int(n.broadcast_address))
+            outermost.append(str(n))
+
+        def find(first: int, last: int) -> str | None:
+            i = bisect.bisect_right(starts, first) - 1
+            return outermost[i] if i >= 0 and last <= ends[i] else None
+
+        covering = {}
+        for n in networks:
+            top = find(int(n.network_address), int(n.broadcast_address))
+            if top != str(n):
+                covering[str(n)] = covering[top] = top
+        for ip in map(ipaddress.IPv4Address, self.ipv4s):
+            top = find(int(ip), int(ip))
+            if top is not None:
+                covering[str(ip)] = covering[top] = top
+
+        return covering
+
     def total_count(self) -> int:
         return (
             len(self.ipv4s)
@@ -151,6 +243,8 @@ class Targeter(pydantic.BaseModel):
 
     def print_targets(self) -> None:
         """Prints the parsed targets in a beautifull format."""
+        import rich.panel
+
         console = verbose.CONSOLE
 
         if len(self.ipv4s) > 0:
@@ -203,6 +297,27 @@ class Targeter(pydantic.BaseModel):
             for i in self.invalids:
                 console.print(f' - {i}', highlight=False)
 
+    def _classify(self, value: str) -> str:
+        """Returns the name of the list that a raw target belongs to, e.g. 'ipv4s' or 'invalids'."""
+        if self._validate_ipv4(value):
+            return 'ipv4s'
+        elif self._validate_ipv4_with_port(value):
+            return 'ipv4s_with_port'
+        elif self._validate_ipv6(value):
+            return 'ipv6s'
+        elif self._validate_ipv6_with_port(value):
+            return 'ipv6s_with_port'
+        elif self._validate_fqdn(value):
+            return 'fqdns'
+        elif self._validate_fqdn_with_port(value):
+            return 'fqdns_with_port'
+        elif self._validate_cidr_ipv4(value):
+            return 'cidrs_v4'
+        elif self._validate_url(value):
+            return 'urls'
+        else:
+            return 'invalids'
+
     def _remove_from_list(self, target_list: list[str], item: str) -> None:
         """Helper function to remove an item from a list if it exists."""
         if item in target_list:
@@ -302,3 +417,76 @@ class Targeter(pydantic.BaseModel):
     def _validate_url(self, value: str) -> bool:
         parsed = urllib.parse.urlparse(value)
         return parsed.scheme in ('http', 'https', 'ftp') and bool(parsed.netloc)
+
+
+def _chunk_boundaries(mm: mmap.mmap, chunk_size: int) -> list[tuple[int, int]]:
+    """Splits the mapped file into `(start, end)` byte ranges of about `chunk_size`, each ending after a newline."""
+    chunks = []
+    start = 0
+    while start < len(mm):
+        end = mm.find(b'\n', min(start + chunk_size, len(mm)) - 1)
+        end = len(mm) if end < 0 else end + 1
+        chunks.append((start, end))
+        start = end
+
+    return chunks
+
+
+def _parse_chunk(targets_filepath: str, start: int, end: int) -> dict[str, list[str]]:
+    """Classifies the lines of a chunk of the targets file. It runs in a worker process."""
+    targeter = Targeter()
+    with open(targets_filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Split on '\n' only, as the serial parser does, not on every line boundary of `str.splitlines()` (e.g. '\x0c'
+        # or '\u2028'). The '\r' of a '\r\n' line ending is stripped with the whitespace.
+        for line in mm[start:end].decode(errors='replace').removesuffix('\n').split('\n'):
+            val = line.strip()
+            getattr(targeter, targeter._classify(val)).append(val)
+
+    return targeter.model_dump()
+
+
+def normalize(target: str) -> str:
+    """
+    Returns the canonical form of a raw target, e.g. a lowercase FQDN or a compressed IP address, so that the same
+    target is written differently in different inputs only by accident.
+
+    Args:
+        target (str): The raw target.
+
+    Returns:
+        str: The normalized target.
+
+    """
+    target = target.strip()
+
+    try:
+        return str(ipaddress.ip_address(target))
+    except ValueError:
+        pass
+    try:
+        return str(ipaddress.ip_network(target, strict=False))
+    except ValueError:
+        pass
+
+    if '://' in target:
+        parsed = urllib.parse.urlsplit(target)
+        return urllib.parse.urlunsplit(parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower()))
+
+    return target.lower().rstrip('.')
+
+
+def shard_of(target: str, count: int) -> int:
+    """
+    Picks the shard (from 1 to `count`) of a target with a stable hash (BLAKE2b) of its normalized form. Unlike
+    `hash()`, it is the same on every machine and in every run.
+
+    Args:
+        target (str): The raw target.
+        count (int): The number of shards.
+
+    Returns:
+        int: The shard of the target.
+
+    """
+    digest = hashlib.blake2b(normalize(target).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count + 1
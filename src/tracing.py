@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+import time
+
+import metrics
+
+
+_OPEN_TRACERS: list['Tracer'] = []
+
+
+class Tracer:
+    """Writes every tracked stage call as a Chrome trace event (JSON array format).
+
+    The file can be opened in a timeline viewer such as Perfetto or `chrome://tracing`. Events are streamed to the
+    disk as they complete; the closing bracket is optional in this format, so an interrupted trace stays readable.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = open(filepath, 'w')
+        self._file.write('[\n')
+        self._first = True
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._threads: dict[int, str] = {}
+        _OPEN_TRACERS.append(self)
+
+    def observe(self, span: metrics.Span, elapsed: float) -> None:
+        """Records a completed stage call. Meant to be registered in `metrics.Metrics.observers`."""
+        tid = span.thread.ident or 0
+        event = {
+            'name': span.stage,
+            'cat': span.stage,
+            'ph': 'X',
+            'ts': round((span.start - self._origin) * 1e6, 1),
+            'dur': round(elapsed * 1e6, 1),
+            'pid': self._pid,
+            'tid': tid,
+            'args': {'target': span.target, 'outcome': span.outcome, **span.args},
+        }
+
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._threads.get(tid) != span.thread.name:
+                # Thread ids get reused by later thread pools, so (re)name them whenever the name changes.
+                self._threads[tid] = span.thread.name
+                self._write(
+                    {'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid, 'args': {'name': span.thread.name}}
+                )
+            self._write(event)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write('\n]\n')
+            self._file.close()
+
+        if self in _OPEN_TRACERS:
+            _OPEN_TRACERS.remove(self)
+
+    def _write(self, event: dict) -> None:
+        if not self._first:
+            self._file.write(',\n')
+        self._first = False
+        self._file.write(json.dumps(event))
+
+
+def close_all() -> None:
+    """Closes every open trace, e.g. right before the process is terminated."""
+    for t in list(_OPEN_TRACERS):
+        t.close()
@@ -42,3 +42,14 @@ class CustomCommand(click.Command):
         for category, params in categories.items():
             with formatter.section(category):
                 formatter.write_dl([(p.opts[0], p.help or '') for p in params])
+
+
+class CustomGroup(click.Group):
+    """Like `CustomCommand`, but for a command that also has subcommands (e.g. `scopez merge`)."""
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return list(self.commands)
+
+    def format_options(self, ctx: click.Context, formatter: click.HelpFormatter):
+        CustomCommand.format_options(self, ctx, formatter)
+        self.format_commands(ctx, formatter)
@@ -18,6 +18,52 @@ def validate_png_filename(ctx, param, value):
     return value
 
 
+def validate_graph_filename(ctx, param, value):
+    if value != '' and os.path.splitext(value)[1].lower() not in ('.graphml', '.gexf', '.json'):
+        raise click.BadParameter("Output filename must end with '.graphml', '.gexf' or '.json'.")
+    return value
+
+
+def validate_shard(ctx, param, value):
+    if value == '':
+        return None
+
+    try:
+        index, count = (int(v) for v in value.split('/'))
+    except ValueError:
+        raise click.BadParameter("Use 'K/N', e.g. '1/4' for the first of four shards.")
+    if not 1 <= index <= count:
+        raise click.BadParameter("The shard 'K' must be between 1 and 'N'.")
+    return index, count
+
+
+def validate_freshness(ctx, param, value):
+    import incremental
+
+    try:
+        incremental.parse_freshness(value)
+    except ValueError as e:
+        reason = str(e)
+        raise click.BadParameter(
+            f"{reason[:1].upper()}{reason[1:]}. Use comma-separated 'stage=duration' pairs, e.g. 'rdap=7d,dns=1h'."
+        )
+    return value
+
+
+def validate_duration(ctx, param, value):
+    import incremental
+
+    if value == '':
+        return 0.0
+    try:
+        seconds = incremental.parse_duration(value)
+    except ValueError:
+        raise click.BadParameter("Use a number of seconds with an optional unit, e.g. '90', '30m' or '2h'.")
+    if seconds < 0:
+        raise click.BadParameter('The duration cannot be negative.')
+    return seconds
+
+
 def _file_exists(filepath: str) -> bool:
     """
     Checks if a file exists at the given path.
@@ -1,10 +1,32 @@
 from __version__ import __version__
 
+import queue
+import threading
+import time
+import typing
+
 SILENT = False
 HIGHLIGHT = False
 SOFT_WRAP = False
 DEBUG = False
-CONSOLE = {}
+CONSOLE = None  # Without a console (e.g. when the modules are used as a library) every function is a no-op.
+DEBUG_RATE = 50  # Debug messages per second that are displayed. The rest are only counted.
+REFRESH_INTERVAL = 0.1  # Seconds between two refreshes of the progress bars.
+
+# While the writer thread runs (see `start()`), the messages are queued and printed by it alone, so that the worker
+# threads never wait for the console.
+_queue: queue.SimpleQueue | None = None
+_writer: threading.Thread | None = None
+_STOP = object()
+
+# name -> [completed, total] of every progress bar. The writer thread polls them, so an update is just an increment.
+_progress: dict[str, list[int]] = {}
+_progress_lock = threading.Lock()
+
+_debug_lock = threading.Lock()
+_debug_window = 0.0
+_debug_shown = 0
+_debug_suppressed = 0
 
 
 def print_banner(silent: bool, highlight: bool = True) -> None:
@@ -17,34 +39,185 @@ def print_banner(silent: bool, highlight: bool = True) -> None:
         https://github.com/xcalts/scopez
 """
     if not silent:
-        CONSOLE.print(logo, highlight=False)
+        _print(logo, highlight=False)
 
 
 def critical(message: str) -> None:
     if not SILENT:
-        CONSOLE.print(f'[bold red][CRITICAL][/bold red] {message}', highlight=HIGHLIGHT, soft_wrap=SOFT_WRAP)
+        _print(f'[bold red][CRITICAL][/bold red] {message}')
 
 
 def error(message: str) -> None:
     if not SILENT:
-        CONSOLE.print(f'[red][ERROR]   [/red] {message}', highlight=HIGHLIGHT, soft_wrap=SOFT_WRAP)
+        _print(f'[red][ERROR]   [/red] {message}')
 
 
 def warning(message: str) -> None:
     if not SILENT:
-        CONSOLE.print(f'[yellow][WARNING] [/yellow] {message}', highlight=HIGHLIGHT, soft_wrap=SOFT_WRAP)
+        _print(f'[yellow][WARNING] [/yellow] {message}')
 
 
 def info(message: str) -> None:
     if not SILENT:
-        CONSOLE.print(f'[green][INFO]    [/green] {message}', highlight=HIGHLIGHT, soft_wrap=SOFT_WRAP)
+        _print(f'[green][INFO]    [/green] {message}')
 
 
 def debug(message: str) -> None:
-    if not SILENT and DEBUG:
-        CONSOLE.print(f'[blue][DEBUG]   [/blue] {message}', highlight=HIGHLIGHT, soft_wrap=SOFT_WRAP)
+    if not SILENT and DEBUG and _debug_allowed():
+        _print(f'[blue][DEBUG]   [/blue] {message}')
 
 
-def normal(message: str) -> None:
+def normal(message: typing.Any) -> None:
     if not SILENT:
-        CONSOLE.print(message, highlight=HIGHLIGHT, soft_wrap=SOFT_WRAP)
+        _print(message)
+
+
+#
+# Writer Thread
+#
+
+
+def start() -> None:
+    """Starts the writer thread. From now on, the messages are printed asynchronously and the progress is shown."""
+    global _queue, _writer
+
+    if _writer is not None or CONSOLE is None:
+        return
+
+    _queue = queue.SimpleQueue()
+    _writer = threading.Thread(target=_write, args=(_queue,), name='verbose-writer', daemon=True)
+    _writer.start()
+
+
+def stop(timeout: float | None = None) -> None:
+    """Prints the queued messages, stops the writer thread and goes back to printing synchronously."""
+    global _queue, _writer
+
+    if _writer is None:
+        return
+
+    _report_suppressed()
+    _queue.put(_STOP)
+    _writer.join(timeout)
+    _queue, _writer = None, None
+    with _progress_lock:
+        _progress.clear()
+
+
+def progress_start(name: str, total: int) -> None:
+    """Shows a progress bar (with throughput and ETA) for `total` units of work, e.g. the targets of a kind."""
+    if _writer is None or SILENT:
+        return
+
+    with _progress_lock:
+        _progress[name] = [0, total]
+
+
+def progress_advance(name: str, n: int = 1) -> None:
+    counter = _progress.get(name)
+    if counter is not None:
+        with _progress_lock:
+            counter[0] += n
+
+
+def _print(message: typing.Any, **kwargs) -> None:
+    if CONSOLE is None:
+        return
+
+    kwargs.setdefault('highlight', HIGHLIGHT)
+    kwargs.setdefault('soft_wrap', SOFT_WRAP)
+
+    q = _queue
+    if q is not None:
+        q.put((message, kwargs))
+    else:
+        CONSOLE.print(message, **kwargs)
+
+
+def _debug_allowed() -> bool:
+    """Allows up to `DEBUG_RATE` debug messages per second and counts the rest."""
+    global _debug_window, _debug_shown, _debug_suppressed
+
+    now = time.monotonic()
+    with _debug_lock:
+        if now - _debug_window >= 1.0:
+            suppressed, _debug_suppressed = _debug_suppressed, 0
+            _debug_window, _debug_shown = now, 0
+        else:
+            suppressed = 0
+
+        allowed = _debug_shown < DEBUG_RATE
+        if allowed:
+            _debug_shown += 1
+        else:
+            _debug_suppressed += 1
+
+    if suppressed:
+        _print(f'[blue][DEBUG]   [/blue] ... {suppressed} more debug message(s) were suppressed.')
+
+    return allowed
+
+
+def _report_suppressed() -> None:
+    global _debug_suppressed
+
+    with _debug_lock:
+        suppressed, _debug_suppressed = _debug_suppressed, 0
+    if suppressed:
+        _print(f'[blue][DEBUG]   [/blue] ... {suppressed} more debug message(s) were suppressed.')
+
+
+def _write(q: queue.SimpleQueue) -> None:
+    """The body of the writer thread: prints the queued messages and refreshes the progress bars."""
+    import rich.progress
+
+    console = CONSOLE
+    bars = rich.progress.Progress(
+        rich.progress.TextColumn('[progress.description]{task.description}'),
+        rich.progress.BarColumn(),
+        rich.progress.MofNCompleteColumn(),
+        rich.progress.TaskProgressColumn(),
+        rich.progress.TextColumn('{task.fields[rate]}'),
+        rich.progress.TimeElapsedColumn(),
+        rich.progress.TimeRemainingColumn(),
+        console=console,
+        auto_refresh=False,
+        disable=not console.is_terminal,
+    )
+    tasks = {}
+
+    with bars:
+        while True:
+            try:
+                item = q.get(timeout=REFRESH_INTERVAL)
+            except queue.Empty:
+                item = None
+
+            # Print everything that is queued in one go.
+            while item is not None:
+                if item is _STOP:
+                    _sync_progress(bars, tasks)
+                    bars.refresh()
+                    return
+                message, kwargs = item
+                bars.console.print(message, **kwargs)
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            _sync_progress(bars, tasks)
+            bars.refresh()
+
+
+def _sync_progress(bars, tasks: dict) -> None:
+    with _progress_lock:
+        counters = {name: tuple(c) for name, c in _progress.items()}
+
+    for name, (completed, total) in counters.items():
+        task = tasks.get(name)
+        if task is None:
+            task = tasks[name] = bars.add_task(name, total=total, rate='')
+        bars.update(task, completed=completed)
+        speed = bars.tasks[task].speed
+        bars.update(task, rate=f'{speed:.1f}/s' if speed else '')
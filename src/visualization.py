@@ -1,20 +1,29 @@
 import pydantic
 import networkx as nx
-import matplotlib.pyplot as plt
 import numpy as np
 
-import PIL
 import pathlib
 import os.path
 
+import graph
+import layout
 import models
 import verbose
 
 BASE_DIR = pathlib.Path(__file__).resolve().parent
 
+# The figure is rendered at a fixed resolution, which the icons are composited into directly.
+WIDTH, HEIGHT, DPI = 1920, 1080, 100
+ICON_SIZE = 24
+MIN_ICON_SIZE = 4
+
 
 class Visualizer(pydantic.BaseModel):
-    """Visualizes the data using a network graph."""
+    """Visualizes the data using a network graph. The graph itself is built by the `graph` module."""
+
+    collapse_threshold: int = 50  # IPs of one ASN beyond which they are drawn as a single summary node.
+    exact_layout_limit: int = 300  # Nodes up to which the (quadratic) Kamada-Kawai layout is used.
+    max_labels: int = 200
 
     def create_visualization_image(
         self,
@@ -24,125 +33,162 @@ class Visualizer(pydantic.BaseModel):
         analyzed_urls: list[models.URL],
         out_path: str = 'network.png',
     ) -> None:
-        verbose.debug('Specify an icon per entity.')
-        icons_paths = {
-            'ipv4': os.path.join(BASE_DIR, 'icons', 'ipv4.png'),
-            'cidr': os.path.join(BASE_DIR, 'icons', 'cidr.png'),
-            'fqdn': os.path.join(BASE_DIR, 'icons', 'fqdn.png'),
-            'url': os.path.join(BASE_DIR, 'icons', 'url.png'),
-            '404': os.path.join(BASE_DIR, 'icons', '404.png'),
-            'target': os.path.join(BASE_DIR, 'icons', 'target.png'),
-        }
-        icons = {k: PIL.Image.open(fname) for k, fname in icons_paths.items()}
-
         verbose.debug('Create the network graph nodes.')
-        total = len(analyzed_ipv4s) + len(analyzed_cidrs) + len(analyzed_fqdns) + len(analyzed_urls)
-        G = nx.Graph()
-        if total > 1:
-            G.add_node('center', image=icons['target'], name='center')
-        for ip in analyzed_ipv4s:
-            G.add_node(ip.ipv4, image=icons['ipv4'], name=ip.ipv4)
-            if total > 1:
-                G.add_edge('center', ip.ipv4)
-
-        for c in analyzed_cidrs:
-            G.add_node(c.cidr, image=icons['cidr'], name=c.cidr)
-            if total > 1:
-                G.add_edge('center', c.cidr)
-
-        for f in analyzed_fqdns:
-            G.add_node(f.fqdn, image=icons['fqdn'], name=f.fqdn)
-            if total > 1:
-                G.add_edge('center', f.fqdn)
-
-            _chain_wo_fqdn = [node for node in f.dns_chain if node != f.fqdn]
-            if _chain_wo_fqdn:
-                for link in _chain_wo_fqdn:
-                    G.add_node(link, image=icons['fqdn'], name=link)
-                    G.add_edge(f.fqdn, link)
-
-            if f.hosts_found:
-                for ip in f.destination_ips:
-                    _ipnode = f'{f.fqdn}_{ip}'
-                    G.add_node(_ipnode, image=icons['ipv4'], name=ip.ipv4)
-                    G.add_edge(f.dns_chain[-1], _ipnode)
-            else:
-                error = f'{f.fqdn} not found'
-                G.add_node(error, image=icons['404'], name='404', kind='404')
-                G.add_edge(f.dns_chain[-1], error)
-
-        for u in analyzed_urls:
-            G.add_node(u.url, image=icons['url'], name=u.url)
-            if total > 1:
-                G.add_edge('center', u.url)
-
-            G.add_node(u.fqdn.fqdn, image=icons['fqdn'], name=u.fqdn.fqdn)
-            G.add_edge(u.url, u.fqdn.fqdn)
-
-            _chain_wo_fqdn = [node for node in u.fqdn.dns_chain if node != u.fqdn.fqdn]
-            if _chain_wo_fqdn:
-                for link in _chain_wo_fqdn:
-                    G.add_node(link, image=icons['fqdn'], name=link)
-                    G.add_edge(u.fqdn.fqdn, link)
-
-            if u.fqdn.hosts_found:
-                for ip in u.fqdn.destination_ips:
-                    _ipnode = f'{u.fqdn.fqdn}_{ip}'
-                    G.add_node(_ipnode, image=icons['ipv4'], name=ip.ipv4)
-                    G.add_edge(u.fqdn.dns_chain[-1], _ipnode)
-            else:
-                error = f'{u.fqdn.fqdn} not found'
-                G.add_node(error, image=icons['404'], name='404', kind='404')
-                G.add_edge(u.fqdn.dns_chain[-1], error)
+        G = graph.build(analyzed_ipv4s, analyzed_cidrs, analyzed_fqdns, analyzed_urls)
+
+        verbose.debug('Collapse the large ASN groups.')
+        G = graph.collapse_groups(G, self.collapse_threshold)
+
+        verbose.debug(f'Lay out {G.number_of_nodes()} nodes and {G.number_of_edges()} edges.')
+        pos = self.layout(G)
+
+        self.render(G, pos, out_path)
+
+    def layout(self, G: nx.Graph) -> dict:
+        """
+        Computes the node positions. Small graphs get the Kamada-Kawai layout, large graphs the multilevel one.
+
+        Args:
+            G (nx.Graph): The graph.
+
+        Returns:
+            dict: The position of every node.
+
+        """
+        if G.number_of_nodes() <= self.exact_layout_limit:
+            pos = nx.kamada_kawai_layout(G)
+        else:
+            pos = layout.multilevel_layout(G)
+
+        if 'center' in pos:
+            origin = pos['center']
+            pos = {n: p - origin for n, p in pos.items()}
+
+        return pos
+
+    def render(self, G: nx.Graph, pos: dict, out_path: str) -> None:
+        """
+        Renders the graph into an image.
+
+        The edges are a single `LineCollection` and the icons are composited from a sprite atlas into a single RGBA
+        canvas, which is drawn with one `imshow`, so the cost of an extra node is a few array operations instead of
+        a matplotlib artist.
+
+        Args:
+            G (nx.Graph): The graph.
+            pos (dict): The position of every node.
+            out_path (str): The filename of the image.
+
+        """
+        import matplotlib.collections
+        import matplotlib.pyplot as plt
+
+        nodes = list(G.nodes)
+        xy = np.array([pos[n] for n in nodes]).reshape(-1, 2)
+
+        # The icons and edges shrink as the graph grows, so that they stay distinguishable.
+        shrink = min(1.0, np.sqrt(self.exact_layout_limit / max(len(nodes), 1)))
+        icon_size = max(MIN_ICON_SIZE, int(ICON_SIZE * shrink))
+        margin = ICON_SIZE * 2
 
         verbose.debug('Initialize the figure.')
-        pos = nx.kamada_kawai_layout(G)
-        if total > 1:
-            pos['center'] = np.array([0.0, 0.0])
-        fig, ax = plt.subplots(figsize=(19.2, 10.8))
+        lo = xy.min(axis=0) if len(xy) else np.full(2, -1.0)
+        hi = xy.max(axis=0) if len(xy) else np.full(2, 1.0)
+        span = np.maximum(hi - lo, 1e-9)
+        scale = np.array([(WIDTH - 2 * margin) / span[0], (HEIGHT - 2 * margin) / span[1]])
+        pixels = (xy - lo) * scale + margin
+        pixels[:, 1] = HEIGHT - pixels[:, 1]
+        extent = (
+            lo[0] - margin / scale[0],
+            hi[0] + margin / scale[0],
+            lo[1] - margin / scale[1],
+            hi[1] + margin / scale[1],
+        )
+
+        fig = plt.figure(figsize=(WIDTH / DPI, HEIGHT / DPI), dpi=DPI)
+        ax = fig.add_axes((0, 0, 1, 1))
+        ax.set_xlim(extent[0], extent[1])
+        ax.set_ylim(extent[2], extent[3])
+        ax.set_axis_off()
 
         verbose.debug('Draw the edges.')
-        nx.draw_networkx_edges(
-            G,
-            pos=pos,
-            ax=ax,
-            arrows=True,
-            min_source_margin=15,
-            min_target_margin=15,
-        )
+        index = {n: i for i, n in enumerate(nodes)}
+        segments = [(xy[index[u]], xy[index[v]]) for u, v in G.edges]
+        edges = matplotlib.collections.LineCollection(segments, colors='k', linewidths=max(0.1, shrink), zorder=1)
+        ax.add_collection(edges)
 
-        # --- Draw ---
         verbose.debug('Draw the icons.')
-        tr_figure = ax.transData.transform
-        tr_axes = fig.transFigure.inverted().transform
-        icon_size = (ax.get_xlim()[1] - ax.get_xlim()[0]) * 0.01
-        icon_center = icon_size / 2.0
-        for n in G.nodes:
-            xf, yf = tr_figure(pos[n])
-            xa, ya = tr_axes((xf, yf))
-            # get overlapped axes and plot icon
-            a = plt.axes([xa - icon_center, ya - icon_center, icon_size, icon_size])
-            a.imshow(G.nodes[n]['image'])
-            a.axis('off')
+        atlas = self._load_atlas(icon_size)
+        canvas = np.zeros((HEIGHT, WIDTH, 4), dtype=np.float32)
+        for n, (px, py) in zip(nodes, pixels):
+            data = G.nodes[n]
+            sprite = atlas[(data['kind'], bool(data.get('summary')))]
+            _composite(canvas, sprite, int(px), int(py))
+        alpha = canvas[..., 3:4]
+        np.divide(canvas[..., :3], alpha, out=canvas[..., :3], where=alpha > 0)
+        ax.imshow(canvas, extent=extent, origin='upper', interpolation='nearest', aspect='auto', zorder=2)
 
         verbose.debug('Add the labels.')
         label_options = {'ec': 'k', 'fc': 'white', 'alpha': 0.7}
-        for n in G.nodes:
-            node_name = G.nodes[n].get('name', '')
-
-            if node_name == 'center':
-                continue
-
+        offset = (icon_size / 2 + 2) / scale[1]
+        for n in self._labelled(G):
             ax.text(
                 pos[n][0],
-                pos[n][1] + 0.035,  # offset upward
-                node_name,
+                pos[n][1] + offset,  # offset upward
+                G.nodes[n]['name'],
                 fontsize=6,
                 bbox=label_options,
                 ha='center',  # <-- center horizontally
                 va='bottom',  # <-- place box just above the node
+                zorder=3,
             )
 
         verbose.debug('Save the image.')
-        ax.set_axis_off()  # hides axes and ticks
-        plt.savefig(out_path, dpi=100, bbox_inches='tight')
+        fig.savefig(out_path, dpi=DPI)
+        plt.close(fig)
+
+    # --- Helpers ---
+
+    def _labelled(self, G: nx.Graph) -> list:
+        """Picks the nodes to label: summaries first, then the best connected ones, up to `max_labels`."""
+        candidates = [n for n, data in G.nodes(data=True) if data['name'] != 'center']
+        if len(candidates) <= self.max_labels:
+            return candidates
+
+        degree = dict(G.degree(candidates))
+        candidates.sort(key=lambda n: (not G.nodes[n].get('summary'), -degree[n]))
+
+        return candidates[: self.max_labels]
+
+    def _load_atlas(self, icon_size: int) -> dict:
+        """Loads every icon once, resized to `icon_size` pixels (twice that for summary nodes), as RGBA floats."""
+        import PIL.Image
+
+        atlas = {}
+        for kind in ('ipv4', 'cidr', 'fqdn', 'url', '404', 'target'):
+            with PIL.Image.open(os.path.join(BASE_DIR, 'icons', f'{kind}.png')) as icon:
+                icon = icon.convert('RGBA')
+                for summary in (False, True):
+                    size = icon_size * 2 if summary else icon_size
+                    resized = icon.resize((size, size), PIL.Image.LANCZOS)
+                    sprite = np.asarray(resized, dtype=np.float32) / 255
+                    sprite[..., :3] *= sprite[..., 3:4]  # Premultiplied alpha.
+                    atlas[(kind, summary)] = sprite
+
+        return atlas
+
+
+def _composite(canvas: np.ndarray, sprite: np.ndarray, x: int, y: int) -> None:
+    """Blends the premultiplied `sprite` over `canvas`, centered at the pixel (x, y) and clipped to the canvas."""
+    h, w = sprite.shape[:2]
+    top, left = y - h // 2, x - w // 2
+    y0, x0 = max(top, 0), max(left, 0)
+    y1, x1 = min(top + h, canvas.shape[0]), min(left + w, canvas.shape[1])
+    if y0 >= y1 or x0 >= x1:
+        return
+
+    src = sprite[y0 - top : y1 - top, x0 - left : x1 - left]
+    dst = canvas[y0:y1, x0:x1]
+    alpha = src[..., 3:4]
+    dst *= 1 - alpha
+    dst += src
@@ -0,0 +1,155 @@
+import calendar
+import ipaddress
+import time
+import typing
+
+
+# The DER tags (universal, or context-specific in the SAN extension) of the parsed fields.
+SEQUENCE = 0x30
+SET = 0x31
+OID = 0x06
+OCTET_STRING = 0x04
+UTC_TIME = 0x17
+GENERALIZED_TIME = 0x18
+VERSION = 0xA0
+EXTENSIONS = 0xA3
+SAN_DNS_NAME = 0x82
+SAN_IP_ADDRESS = 0x87
+
+# The DER encoded object identifiers of the subject attributes, with their RFC 4514 names.
+ATTRIBUTES = {
+    bytes.fromhex('550403'): 'CN',
+    bytes.fromhex('550406'): 'C',
+    bytes.fromhex('550407'): 'L',
+    bytes.fromhex('550408'): 'ST',
+    bytes.fromhex('55040a'): 'O',
+    bytes.fromhex('55040b'): 'OU',
+}
+SUBJECT_ALT_NAME = bytes.fromhex('551d11')
+
+
+class Certificate(typing.NamedTuple):
+    """The fields of an X.509 certificate that describe the server it was issued to."""
+
+    subject: str
+    sans: list[str]
+    expires_at: float
+
+
+def parse(der: bytes) -> Certificate:
+    """
+    Parses the subject, the subject alternative names and the expiry of a DER encoded certificate.
+
+    The standard library only decodes the certificates that it verified (`ssl.SSLSocket.getpeercert()`), while a probe
+    accepts any certificate, so the few fields are read from the DER structure instead.
+
+    Args:
+        der (bytes): The certificate, e.g. from `ssl.SSLSocket.getpeercert(binary_form=True)`.
+
+    Returns:
+        Certificate: The subject (e.g. 'CN=example.com, O=Example'), the DNS names and IPs it is valid for, and the
+            UNIX time at which it expires.
+
+    Raises:
+        ValueError: If the certificate is malformed.
+
+    """
+    try:
+        certificate = _children(_value(der, SEQUENCE))
+        tbs = _children(_value(certificate[0], SEQUENCE))
+        if tbs[0][0] == VERSION:
+            tbs = tbs[1:]
+        # serialNumber, signature, issuer, validity, subject, subjectPublicKeyInfo, ..., [3] extensions
+        validity = _children(_value(tbs[3], SEQUENCE))
+        subject = _name(tbs[4])
+        expires_at = _time(validity[1])
+        sans = []
+        for field in tbs[6:]:
+            if field[0] == EXTENSIONS:
+                sans = _subject_alt_names(_value(field, EXTENSIONS))
+    except (IndexError, KeyError, ValueError) as e:
+        raise ValueError(f'malformed certificate: {e}') from e
+
+    return Certificate(subject, sans, expires_at)
+
+
+def _tlv(data: bytes, offset: int = 0) -> tuple[int, int, int]:
+    """Reads the tag and the length of the element at `offset`, and returns them with the offset of its value."""
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[offset : offset + size], 'big')
+        offset += size
+    if offset + length > len(data):
+        raise ValueError('truncated element')
+    return tag, length, offset
+
+
+def _value(element: bytes, tag: int) -> bytes:
+    found, length, offset = _tlv(element)
+    if found != tag:
+        raise ValueError(f'expected the tag {tag:#x}, found {found:#x}')
+    return element[offset : offset + length]
+
+
+def _children(data: bytes) -> list[bytes]:
+    """Splits the value of a constructed element into its (encoded) children."""
+    children = []
+    offset = 0
+    while offset < len(data):
+        _, length, start = _tlv(data, offset)
+        children.append(data[offset : start + length])
+        offset = start + length
+    return children
+
+
+def _name(element: bytes) -> str:
+    attributes = []
+    for rdn in _children(_value(element, SEQUENCE)):
+        for pair in _children(_value(rdn, SET)):
+            oid, value = _children(_value(pair, SEQUENCE))
+            name = ATTRIBUTES.get(_value(oid, OID))
+            if name is not None:
+                attributes.append(f'{name}={_string(value)}')
+    return ', '.join(attributes)
+
+
+def _string(element: bytes) -> str:
+    tag, length, offset = _tlv(element)
+    value = element[offset : offset + length]
+    if tag == 0x1E:  # BMPString
+        return value.decode('utf-16-be', errors='replace')
+    return value.decode('utf-8', errors='replace')
+
+
+def _time(element: bytes) -> float:
+    tag, length, offset = _tlv(element)
+    value = element[offset : offset + length].decode('ascii')
+    if tag == UTC_TIME:
+        # Two-digit years are 1950-2049 (RFC 5280).
+        value = ('19' if int(value[:2]) >= 50 else '20') + value
+    elif tag != GENERALIZED_TIME:
+        raise ValueError(f'expected a time, found the tag {tag:#x}')
+    return float(calendar.timegm(time.strptime(value[:14], '%Y%m%d%H%M%S')))
+
+
+def _subject_alt_names(data: bytes) -> list[str]:
+    for extension in _children(_value(data, SEQUENCE)):
+        fields = _children(_value(extension, SEQUENCE))
+        if _value(fields[0], OID) != SUBJECT_ALT_NAME:
+            continue
+
+        names = []
+        # extnID, critical (optional), extnValue
+        for general_name in _children(_value(_value(fields[-1], OCTET_STRING), SEQUENCE)):
+            tag, length, offset = _tlv(general_name)
+            value = general_name[offset : offset + length]
+            if tag == SAN_DNS_NAME:
+                names.append(value.decode('ascii', errors='replace'))
+            elif tag == SAN_IP_ADDRESS:
+                names.append(str(ipaddress.ip_address(value)))
+        return names
+
+    return []